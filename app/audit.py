@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from . import database, models
+from .conflicts import Interval, overlapping_pairs
+from .crud import GROUP_CLASS_TEACHERS
+
+# 전체 시간표 겹침 점검. (공간, 요일) / (선생님, 요일) 그룹마다 한 번 정렬하고 훑어서
+# 겹치는 모든 쌍과, 단체수업 예외로 무시한 쌍(사유 포함)을 한 줄씩 낸다.
+# 행은 공간/선생님 순(ix_schedules_room_day / ix_schedules_teacher_day 순서)으로 AUDIT_CHUNK 행씩 서버 측 커서로 읽고,
+# 공간/선생님 하나의 행만 메모리에 두었다가 그 공간/선생님이 끝나면 바로 결과를 낸다.
+# CLI: python -m app.audit [--format text|ndjson]
+
+AUDIT_CHUNK = int(os.getenv("AUDIT_CHUNK", "1000"))
+
+KINDS = ("room", "teacher")  # 출력 순서
+
+def schedules_query(kind: str):
+    # kind("room" | "teacher") 가 비어 있지 않은 수업을 (id, 요일, 시작) 순으로
+    column = getattr(models.Schedule, f"{kind}_id")
+    return (
+        select(
+            models.Schedule.id,
+            models.Schedule.teacher_id,
+            models.Schedule.room_id,
+            models.Schedule.student_id,
+            models.Schedule.day_of_week,
+            models.Schedule.start_min,
+            models.Schedule.end_min,
+            models.Schedule.type,
+        )
+        .where(column.isnot(None))
+        .order_by(column, models.Schedule.day_of_week, models.Schedule.start_min)
+        .execution_options(yield_per=AUDIT_CHUNK)
+    )
+
+def count_query():
+    return select(func.count()).select_from(models.Schedule)
+
+def name_queries():
+    return {
+        "teacher": select(models.Teacher.id, models.Teacher.name),
+        "room": select(models.Room.id, models.Room.name),
+        "student": select(models.Student.id, models.Student.name),
+    }
+
+class Audit:
+    # kind 별로 정렬된 행을 feed 로 받아, 공간/선생님이 바뀔 때마다 앞의 공간/선생님의 요일별 겹침을 낸다.
+    # occupancy=(요일 목록, start_min, end_min) 이면 공간 행으로 그 구간의 점유 시간(booked)도 센다
+    def __init__(self, names: Dict[str, Dict[int, str]],
+                 occupancy: Optional[Tuple[Iterable[str], int, int]] = None):
+        self.names = names
+        self.group_teachers = {tid for tid, name in names["teacher"].items() if name in GROUP_CLASS_TEACHERS}
+        self.occupancy = (set(occupancy[0]), occupancy[1], occupancy[2]) if occupancy else None
+        self.conflicts = self.ignored = self.booked = 0
+        self._key: Optional[Tuple[str, int]] = None
+        self._rows: list = []
+
+    def feed(self, kind: str, rows) -> Iterator[dict]:
+        position = 2 if kind == "room" else 1  # 행에서 room_id / teacher_id 위치
+        for row in rows:
+            key = (kind, row[position])
+            if key != self._key:
+                yield from self.flush()
+                self._key = key
+            self._rows.append(row)
+            if kind == "room" and self.occupancy:
+                days, start_min, end_min = self.occupancy
+                if row[4] in days:
+                    self.booked += max(0, min(row[6], end_min) - max(row[5], start_min))
+
+    def flush(self) -> Iterator[dict]:
+        # 모아 둔 공간/선생님 하나의 결과 (요일 순)
+        if not self._rows:
+            return
+        (kind, entity_id), rows = self._key, self._rows
+        self._rows = []
+        by_day: Dict[str, list] = {}
+        for row in rows:
+            by_day.setdefault(row[4], []).append(row)
+        for day in sorted(by_day, key=models.day_to_index):
+            yield from self._group(kind, entity_id, day, by_day[day])
+
+    def _group(self, kind: str, entity_id: int, day: str, rows: list) -> Iterator[dict]:
+        described: Dict[int, dict] = {}
+
+        def describe(i):
+            # 한 행이 여러 쌍에 나올 수 있으므로 한 번만 만든다
+            if i in described:
+                return described[i]
+            sid, teacher_id, room_id, student_id, day, start, end, typ = rows[i]
+            described[i] = {
+                "id": sid,
+                "start_time": models.minutes_to_time(start),
+                "end_time": models.minutes_to_time(end),
+                "type": typ.value,
+                "teacher": self.names["teacher"].get(teacher_id),
+                "room": self.names["room"].get(room_id),
+                "student": self.names["student"].get(student_id),
+            }
+            return described[i]
+
+        intervals = [
+            Interval(i, start, end, typ == models.ScheduleType.CLASS and teacher_id in self.group_teachers)
+            for i, (sid, teacher_id, room_id, student_id, _, start, end, typ) in enumerate(rows)
+        ]
+        for a, b in overlapping_pairs(intervals):
+            finding = {
+                "status": "conflict",
+                "kind": kind,
+                "day_of_week": day,
+                kind: {"id": entity_id, "name": self.names[kind].get(entity_id)},
+                "schedules": [describe(a.ref), describe(b.ref)],
+            }
+            if a.exempt or b.exempt:
+                teacher = self.names["teacher"].get(rows[(a if a.exempt else b).ref][1])
+                finding["status"] = "ignored"
+                finding["reason"] = f"단체수업 예외 ({teacher} 선생님 수업)"
+                self.ignored += 1
+            else:
+                self.conflicts += 1
+            yield finding
+
+    def summary(self, schedules: int) -> dict:
+        return {"summary": {"schedules": schedules, "conflicts": self.conflicts, "ignored": self.ignored}}
+
+def find_conflicts(db: Session) -> Iterator[dict]:
+    # 동기 세션용 (CLI). 마지막은 summary
+    audit = Audit({kind: dict(db.execute(stmt).all()) for kind, stmt in name_queries().items()})
+    for kind in KINDS:
+        yield from audit.feed(kind, db.execute(schedules_query(kind)))
+    yield from audit.flush()
+    yield audit.summary(db.scalar(count_query()))
+
+async def find_conflicts_async(db: AsyncSession, audit: Optional[Audit] = None) -> AsyncIterator[dict]:
+    # find_conflicts 의 비동기 판. 정렬/훑기는 읽은 묶음마다 스레드에서 (다른 요청을 막지 않게)
+    if audit is None:
+        audit = Audit({kind: dict((await db.execute(stmt)).all()) for kind, stmt in name_queries().items()})
+    for kind in KINDS:
+        result = await db.stream(schedules_query(kind))
+        async for rows in result.partitions():
+            for finding in await asyncio.to_thread(list, audit.feed(kind, rows)):
+                yield finding
+    for finding in await asyncio.to_thread(list, audit.flush()):
+        yield finding
+    yield audit.summary(await db.scalar(count_query()))
+
+async def summarize(db: AsyncSession, *, days: List[str], start_min: int, end_min: int) -> dict:
+    # 지점 요약 (GET /admin/branches/report): 겹침 수와 [start_min, end_min) 의 공간 점유율
+    names = {kind: dict((await db.execute(stmt)).all()) for kind, stmt in name_queries().items()}
+    audit = Audit(names, (days, start_min, end_min))
+    summary = {}
+    async for finding in find_conflicts_async(db, audit):
+        if "summary" in finding:
+            summary = finding["summary"]
+    capacity = len(names["room"]) * len(days) * (end_min - start_min)
+    return {
+        **summary,
+        "rooms": len(names["room"]),
+        "booked_minutes": audit.booked,
+        "occupancy": round(audit.booked / capacity, 4) if capacity else 0.0,
+    }
+
+async def ndjson_stream(chunk_size: int = 500) -> AsyncIterator[bytes]:
+    # GET /admin/conflicts 응답. StreamingResponse 가 다 보낼 때까지 쓰는 자체 세션을 열고
+    # 줄마다 보내지 않고 chunk_size 줄씩 묶어 보낸다.
+    chunk = []
+    async with database.ReadSessionLocal() as db:
+        async for finding in find_conflicts_async(db):
+            chunk.append(json.dumps(finding, ensure_ascii=False))
+            if len(chunk) >= chunk_size:
+                yield ("\n".join(chunk) + "\n").encode()
+                chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+def text_line(finding: dict) -> str:
+    if "summary" in finding:
+        s = finding["summary"]
+        return f"시간표 {s['schedules']}건: 겹침 {s['conflicts']}건, 단체수업 예외 {s['ignored']}건"
+    a, b = finding["schedules"]
+    mark = "❌" if finding["status"] == "conflict" else "➖"
+    who = finding[finding["kind"]]["name"]
+    line = (f"{mark} [{finding['kind']}:{who}] {finding['day_of_week']} "
+            f"#{a['id']} {a['start_time']}-{a['end_time']} {a['teacher']}/{a['student']} ↔ "
+            f"#{b['id']} {b['start_time']}-{b['end_time']} {b['teacher']}/{b['student']}")
+    if finding.get("reason"):
+        line += f" ({finding['reason']})"
+    return line
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--format", choices=["text", "ndjson"], default="text")
+    parser.add_argument("--only-conflicts", action="store_true", help="단체수업 예외로 무시한 쌍은 출력하지 않음")
+    args = parser.parse_args()
+    found = 0
+    with Session(database.engine_sync) as db:
+        for finding in find_conflicts(db):
+            if args.only_conflicts and finding.get("status") == "ignored":
+                continue
+            if finding.get("status") == "conflict":
+                found += 1
+            sys.stdout.write(json.dumps(finding, ensure_ascii=False) + "\n" if args.format == "ndjson" else text_line(finding) + "\n")
+    return 1 if found else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
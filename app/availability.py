@@ -0,0 +1,84 @@
+from sqlalchemy import or_, select
+from typing import Dict, Iterable, List, Optional, Tuple
+from . import crud, models
+
+# 보강/변경 수업용 빈 시간 찾기.
+# 요청한 요일들의 관련 시간표(후보 공간, 선생님, 학생)를 한 번에 읽고, 요일마다
+# 바쁜 구간을 정렬·병합한 뒤 빈 구간을 훑어 duration 이 들어가는 시작 시각을 모은다.
+
+def availability_query(*, days: List[str], room_ids: Iterable[int],
+                       teacher_id: Optional[int] = None, student_id: Optional[int] = None):
+    who = [models.Schedule.room_id.in_(list(room_ids))]
+    if teacher_id is not None:
+        who.append(models.Schedule.teacher_id == teacher_id)
+    if student_id is not None:
+        who.append(models.Schedule.student_id == student_id)
+    return (
+        select(
+            models.Schedule.day_of_week,
+            models.Schedule.start_min,
+            models.Schedule.end_min,
+            models.Schedule.room_id,
+            models.Schedule.teacher_id,
+            models.Schedule.student_id,
+            crud.group_class_exempt().label("exempt"),
+        )
+        .where(models.Schedule.day_of_week.in_(days), or_(*who))
+    )
+
+def merge(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def free_starts(busy: List[Tuple[int, int]], *, window_start: int, window_end: int, duration: int, step: int):
+    # busy: 병합·정렬된 바쁜 구간. 빈 구간마다 step 간격으로 정렬된 시작 시각을 낸다.
+    cursor = window_start
+    for start, end in busy + [(window_end, window_end)]:
+        gap_end = min(start, window_end)
+        first = cursor + (-(cursor - window_start) % step)
+        for s in range(first, gap_end - duration + 1, step):
+            yield s
+        cursor = max(cursor, end)
+        if cursor >= window_end:
+            break
+
+def find_free_slots(rows, *, days: List[str], rooms: Dict[int, str], teacher_id: Optional[int], student_id: Optional[int],
+                    window_start: int, window_end: int, duration: int, step: int) -> List[dict]:
+    # 공간/선생님 충돌은 is_overlap 과 같이 단체수업 예외를 적용하고, 학생은 모든 일정이 막는다
+    person_busy: Dict[str, list] = {day: [] for day in days}
+    room_busy: Dict[Tuple[str, int], list] = {}
+    for day, start, end, room_id, sch_teacher_id, sch_student_id, exempt in rows:
+        if student_id is not None and sch_student_id == student_id:
+            person_busy[day].append((start, end))
+        if exempt:
+            continue
+        if teacher_id is not None and sch_teacher_id == teacher_id:
+            person_busy[day].append((start, end))
+        if room_id in rooms:
+            room_busy.setdefault((day, room_id), []).append((start, end))
+
+    slots = []
+    for day in days:
+        common = merge(person_busy[day])
+        for room_id, room_name in rooms.items():
+            own = room_busy.get((day, room_id))
+            busy = merge(common + own) if own else common
+            for s in free_starts(busy, window_start=window_start, window_end=window_end, duration=duration, step=step):
+                slots.append((models.day_to_index(day), s, room_name, room_id, day))
+    slots.sort()
+    return [
+        {
+            "day_of_week": day,
+            "start_time": models.minutes_to_time(s),
+            "end_time": models.minutes_to_time(s + duration),
+            "room_id": room_id,
+            "room_name": room_name,
+        }
+        for _, s, room_name, room_id, day in slots
+    ]
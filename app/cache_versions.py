@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from typing import Callable, Optional
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from . import models
+
+# cache_versions 버전 도장: 여러 워커가 같은 DB 를 쓸 때 프로세스 메모리 캐시를 맞춘다.
+# 캐시가 기대는 테이블을 바꾸는 트랜잭션은 커밋 전에 bump 로 버전을 올리고(RETURNING 으로 새 버전을 받는다),
+# 워커는 버전을 읽어 마지막으로 본 값과 다르면 캐시를 버린다 (VersionWatch).
+#   "dimensions": 선생님/공간/학생 (dimension_cache)
+#   "schedules" : 시간표 (겹침 인덱스, 주간 시간표/달력 캐시)
+
+SCHEDULES = "schedules"
+SCHEDULE_VERSION_CHECK_SECONDS = float(os.getenv("SCHEDULE_VERSION_CHECK_SECONDS", "1"))
+
+V = models.CacheVersion
+
+def read(db: Session, name: str) -> int:
+    return db.scalar(select(V.version).where(V.name == name)) or 0
+
+def bump(db: Session, name: str) -> int:
+    # 커밋 전에 부른다. 올린 뒤의 버전 (커밋 후 VersionWatch.wrote 에 넘긴다)
+    version = db.scalar(
+        update(V).where(V.name == name).values(version=V.version + 1).returning(V.version),
+        execution_options={"synchronize_session": False}
+    )
+    if version is None:
+        version = 1
+        db.execute(insert(V).values(name=name, version=version))
+    return version
+
+class VersionWatch:
+    # 한 버전 도장에 대해 이 워커가 마지막으로 본 값. 다른 워커의 쓰기를 보면 on_change() 로 캐시를 버린다.
+    def __init__(self, name: str, on_change: Callable[[], None], check_interval: float = SCHEDULE_VERSION_CHECK_SECONDS):
+        self.name = name
+        self.on_change = on_change
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self.version: Optional[int] = None  # None: 본 적 없음
+        self.checked = 0.0
+        self.changes = 0
+
+    def due(self) -> bool:
+        # 조회 경로: check_interval 에 한 번만 DB 의 버전을 읽는다
+        return self.version is None or time.monotonic() - self.checked >= self.check_interval
+
+    def observe(self, version: int):
+        with self._lock:
+            changed = version != self.version
+            self.version = version
+            self.checked = time.monotonic()
+        if changed:
+            self._changed()
+
+    def check(self, db: Session) -> int:
+        # 버전을 읽어 반영 (동기 Session, AsyncSession 은 run_sync)
+        version = read(db, self.name)
+        self.observe(version)
+        return version
+
+    def wrote(self, version: int):
+        # 이 워커가 bump 한 트랜잭션이 커밋되고 캐시에 반영까지 한 뒤. 그 사이 다른 워커의 쓰기가 없었으면
+        # (version == 본 값 + 1) 캐시는 그대로 쓴다. 더 작은 값은 이미 본 변경 (동시에 커밋된 이 워커의 다른 쓰기)
+        with self._lock:
+            if self.version is not None and version <= self.version:
+                return
+            changed = self.version is None or version != self.version + 1
+            self.version = version
+        if changed:
+            self._changed()
+
+    def _changed(self):
+        with self._lock:
+            self.changes += 1
+        self.on_change()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"version": self.version, "changes": self.changes}
@@ -0,0 +1,340 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Iterable, List, Optional, Set
+from . import database
+
+# 시간표 변경 알림 (GET /schedules/stream SSE, /schedules/ws WebSocket).
+# 시간표 쓰기(생성/수정/삭제/일괄 수정/입력/전체 삭제)가 커밋되면 publish() 로 이벤트를 낸다. 이벤트에는 계속 커지는
+# rev 와 관련 schedule/선생님/공간/학생 id 가 들어 있고, 구독자는 선생님/공간/학생으로 걸러 받는다.
+# 구독자마다 크기가 정해진 큐(CHANGEFEED_QUEUE_SIZE)를 두고, 가득 차면(느린 클라이언트) 쌓인 이벤트를 버리고
+# "resync" 하나만 넣는다. 클라이언트는 resync 를 받으면 시간표를 다시 읽는다. 쓰기 쪽은 기다리지 않는다.
+# 최근 이벤트(CHANGEFEED_REPLAY 개)는 다시 연결한 클라이언트(Last-Event-ID / since)에게 이어서 보낸다.
+# 백엔드(CHANGEFEED_BACKEND):
+#   memory : 프로세스 안에서만 전달 (워커 하나)
+#   sqlite : CHANGEFEED_OUTBOX_PATH 의 SQLite outbox 테이블에 쓰고, 워커마다 폴링해서 자기 구독자에게 보낸다.
+#            rev 는 outbox 의 rowid 라 워커가 여러 개여도 같은 순서다. 시간표 DB 와 같은 트랜잭션은 아니다(커밋 후에 쓴다).
+#            publish 는 이벤트를 쓰기 스레드에 넘기기만 한다 (요청 경로에서 outbox 잠금을 기다리지 않는다).
+#            쓰기/폴링 스레드는 오류가 나면 기록하고 잠시 쉬었다가 다시 연결해서 계속한다.
+
+CHANGEFEED_BACKEND = os.getenv("CHANGEFEED_BACKEND", "memory")
+CHANGEFEED_QUEUE_SIZE = int(os.getenv("CHANGEFEED_QUEUE_SIZE", "256"))
+CHANGEFEED_REPLAY = int(os.getenv("CHANGEFEED_REPLAY", "1000"))
+CHANGEFEED_HEARTBEAT = float(os.getenv("CHANGEFEED_HEARTBEAT", "15"))
+CHANGEFEED_OUTBOX_PATH = os.getenv("CHANGEFEED_OUTBOX_PATH", "./changefeed.db")
+CHANGEFEED_POLL_MS = float(os.getenv("CHANGEFEED_POLL_MS", "200"))
+CHANGEFEED_OUTBOX_RETENTION = float(os.getenv("CHANGEFEED_OUTBOX_RETENTION", "3600"))  # 초
+CHANGEFEED_OUTBOX_PENDING = int(os.getenv("CHANGEFEED_OUTBOX_PENDING", "10000"))  # 쓰기를 기다리는 최대 이벤트 수
+OUTBOX_MAX_BACKOFF = 30.0
+
+logger = logging.getLogger(__name__)
+
+ENTITY_KEYS = ("teacher_ids", "room_ids", "student_ids")
+
+def make_event(op: str, *, schedule_ids: Iterable = (), teacher_ids: Iterable = (), room_ids: Iterable = (),
+               student_ids: Iterable = (), all: bool = False) -> dict:
+    def ids(values):
+        return sorted({v for v in values if v is not None})
+
+    return {
+        "op": op,
+        "branch": database.current().name,  # 지점(app.tenancy), 기본 DB 는 None
+        "schedule_ids": ids(schedule_ids),
+        "teacher_ids": ids(teacher_ids),
+        "room_ids": ids(room_ids),
+        "student_ids": ids(student_ids),
+        "all": all,
+        "ts": time.time(),
+    }
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, teacher_ids: Iterable[int] = (),
+                 room_ids: Iterable[int] = (), student_ids: Iterable[int] = (), max_size: int = CHANGEFEED_QUEUE_SIZE):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(max_size)
+        self.filters = {"teacher_ids": set(teacher_ids or ()), "room_ids": set(room_ids or ()),
+                        "student_ids": set(student_ids or ())}
+        self.branch = database.current().name
+        self.lagging = False
+        self.dropped = 0
+
+    def matches(self, event: dict) -> bool:
+        if event.get("branch") != self.branch:
+            return False
+        if event["all"] or not any(self.filters.values()):
+            return True
+        return any(self.filters[k].intersection(event[k]) for k in ENTITY_KEYS)
+
+    def offer(self, event: dict):
+        # 구독자의 이벤트 루프에서 실행
+        if self.lagging:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(resync_event(event["rev"]))
+            self.lagging = True
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[dict]:
+        # 다음 이벤트. timeout 동안 없으면 None (하트비트용)
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event["op"] == "resync":
+            self.lagging = False
+        return event
+
+def resync_event(rev: int) -> dict:
+    return {**make_event("resync", all=True), "rev": rev}
+
+class Hub:
+    # 프로세스 안의 구독자에게 이벤트를 나눠 준다. deliver 는 어느 스레드에서 불러도 된다.
+    def __init__(self, replay: int = CHANGEFEED_REPLAY):
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscriber] = set()
+        self._recent: deque = deque(maxlen=replay)
+        self.delivered = 0
+
+    def subscribe(self, subscriber: Subscriber, since: Optional[int] = None):
+        with self._lock:
+            self._subscribers.add(subscriber)
+            recent = list(self._recent)
+        if since is None or not recent or since >= recent[-1]["rev"]:
+            return
+        if since < recent[0]["rev"] - 1:
+            # 버퍼보다 오래된 지점: 놓친 이벤트를 다 줄 수 없다
+            subscriber.offer(resync_event(recent[-1]["rev"]))
+            return
+        for event in recent:
+            if event["rev"] > since and subscriber.matches(event):
+                subscriber.offer(event)
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def deliver(self, event: dict):
+        with self._lock:
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+            self.delivered += 1
+        for subscriber in subscribers:
+            if subscriber.matches(event):
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+                except RuntimeError:  # 루프가 닫힘
+                    self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "lagging": sum(s.lagging for s in subscribers),
+            "delivered": self.delivered,
+            "dropped": sum(s.dropped for s in subscribers),
+            "last_rev": self._recent[-1]["rev"] if self._recent else 0,
+        }
+
+class MemoryBackend:
+    def __init__(self, hub: Hub):
+        self.hub = hub
+        self._lock = threading.Lock()
+        self._revs = itertools.count(1)
+
+    def start(self):
+        pass
+
+    def publish(self, event: dict):
+        # rev 부여와 전달을 같은 잠금 안에서 해서 순서를 지킨다
+        with self._lock:
+            event["rev"] = next(self._revs)
+            self.hub.deliver(event)
+
+class SqliteOutboxBackend:
+    def __init__(self, hub: Hub, path: str = CHANGEFEED_OUTBOX_PATH, poll_interval: float = CHANGEFEED_POLL_MS / 1000,
+                 retention: float = CHANGEFEED_OUTBOX_RETENTION, max_pending: int = CHANGEFEED_OUTBOX_PENDING):
+        self.hub = hub
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: deque = deque()  # (순번, 이벤트)
+        self._seq = itertools.count(1)
+        self._has_pending = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self.dropped = 0
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS change_outbox "
+                     "(rev INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, payload TEXT NOT NULL)")
+        return conn
+
+    def publish(self, event: dict):
+        # 쓰기 스레드의 대기열에 넣고 바로 돌아온다. outbox 에 오래 못 쓰면 오래된 것부터 버린다
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append((next(self._seq), event))
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write, name="changefeed-outbox-writer", daemon=True)
+                self._writer.start()
+            self._has_pending.set()
+
+    def _write(self):
+        # 대기열을 한 트랜잭션으로 쓴다. 실패하면 같은 이벤트들을 다시 쓴다 (순서 유지)
+        conn: Optional[sqlite3.Connection] = None
+        backoff = self.poll_interval
+        while True:
+            self._has_pending.wait()
+            with self._lock:
+                batch = list(self._pending)
+            try:
+                if conn is None:
+                    conn = self.connect()
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("INSERT INTO change_outbox (created, payload) VALUES (?, ?)",
+                                 [(event["ts"], json.dumps(event)) for _, event in batch])
+                conn.execute("COMMIT")
+            except Exception:
+                logger.exception("changefeed outbox write failed, retrying in %.1fs", backoff)
+                conn = self._close(conn)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, OUTBOX_MAX_BACKOFF)
+                continue
+            backoff = self.poll_interval
+            with self._lock:
+                # 쓰는 사이에 넘쳐서 버려진 것은 이미 빠져 있으므로 순번으로 지운다
+                while self._pending and self._pending[0][0] <= batch[-1][0]:
+                    self._pending.popleft()
+                if not self._pending:
+                    self._has_pending.clear()
+            self._wake.set()
+
+    @staticmethod
+    def _close(conn: Optional[sqlite3.Connection]):
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return None
+
+    def start(self):
+        # 구독자가 처음 생길 때 폴링 스레드를 띄운다. 이전 이벤트는 보내지 않는다.
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="changefeed-outbox", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        # 오류(잠금 시간 초과, 파일 문제, 잘못된 payload 등)가 나도 스레드는 살아서 다시 연결한다
+        conn: Optional[sqlite3.Connection] = None
+        last: Optional[int] = None
+        pruned = 0.0
+        backoff = self.poll_interval
+        while True:
+            try:
+                if conn is None:
+                    conn = self.connect()
+                    if last is None:
+                        last = conn.execute("SELECT COALESCE(MAX(rev), 0) FROM change_outbox").fetchone()[0]
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                for rev, payload in conn.execute(
+                        "SELECT rev, payload FROM change_outbox WHERE rev > ? ORDER BY rev LIMIT 1000", (last,)).fetchall():
+                    last = rev
+                    event = json.loads(payload)
+                    event["rev"] = rev
+                    self.hub.deliver(event)
+                now = time.time()
+                if now - pruned > 60:
+                    conn.execute("DELETE FROM change_outbox WHERE created < ?", (now - self.retention,))
+                    pruned = now
+                backoff = self.poll_interval
+            except Exception:
+                logger.exception("changefeed outbox poll failed, retrying in %.1fs", backoff)
+                conn = self._close(conn)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, OUTBOX_MAX_BACKOFF)
+
+hub = Hub()
+BACKENDS = {"memory": MemoryBackend, "sqlite": SqliteOutboxBackend}
+if CHANGEFEED_BACKEND not in BACKENDS:
+    raise ValueError(f"CHANGEFEED_BACKEND must be one of {', '.join(BACKENDS)}")
+backend = BACKENDS[CHANGEFEED_BACKEND](hub)
+published = 0
+_published_lock = threading.Lock()  # publish 는 요청 스레드(run_sync)와 이벤트 루프 어디서나 불린다
+
+def publish(op: str, **ids) -> dict:
+    # 커밋이 끝난 뒤에 부른다 (make_event 와 같은 인자)
+    global published
+    event = make_event(op, **ids)
+    backend.publish(event)
+    with _published_lock:
+        published += 1
+    return event
+
+def subscribe(*, since: Optional[int] = None, teacher_ids: Optional[List[int]] = None,
+              room_ids: Optional[List[int]] = None, student_ids: Optional[List[int]] = None) -> Subscriber:
+    # 지금 실행 중인 이벤트 루프에 붙는 구독자. 끝나면 hub.unsubscribe
+    backend.start()
+    subscriber = Subscriber(asyncio.get_running_loop(), teacher_ids=teacher_ids or (), room_ids=room_ids or (),
+                            student_ids=student_ids or ())
+    hub.subscribe(subscriber, since)
+    return subscriber
+
+async def sse(subscriber: Subscriber) -> AsyncIterator[bytes]:
+    # text/event-stream. id 가 rev 라 브라우저 EventSource 는 다시 연결할 때 Last-Event-ID 로 보낸다
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            event = await subscriber.next(CHANGEFEED_HEARTBEAT)
+            if event is None:
+                yield b": ping\n\n"
+                continue
+            yield f"id: {event['rev']}\nevent: {event['op']}\ndata: {json.dumps(event)}\n\n".encode()
+    finally:
+        hub.unsubscribe(subscriber)
+
+async def pump_websocket(websocket, subscriber: Subscriber):
+    # 이벤트를 JSON 텍스트로 보내고, 클라이언트가 끊으면 끝낸다 (클라이언트가 보내는 메시지는 무시)
+    async def receive():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    async def send():
+        while True:
+            event = await subscriber.next(CHANGEFEED_HEARTBEAT)
+            await websocket.send_text(json.dumps(event if event is not None else {"op": "ping"}))
+
+    tasks = [asyncio.ensure_future(receive()), asyncio.ensure_future(send())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(subscriber)
+
+def stats() -> dict:
+    return {"backend": CHANGEFEED_BACKEND, "published": published, "outbox_dropped": getattr(backend, "dropped", 0),
+            **hub.stats()}
@@ -0,0 +1,23 @@
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Tuple
+
+class Interval(NamedTuple):
+    ref: Any       # schedule id 또는 가져오기(import) 행 번호 등 호출자가 정하는 식별자
+    start: int     # 분 단위
+    end: int
+    exempt: bool   # 단체수업 예외 대상
+
+def overlapping_pairs(intervals: Iterable[Interval]) -> Iterator[Tuple[Interval, Interval]]:
+    # 한 그룹(같은 공간 또는 같은 선생님, 같은 요일) 안에서 겹치는 모든 쌍.
+    # 시작 시각으로 한 번 정렬한 뒤 진행 중인 구간 목록만 유지하며 훑는다: O(n log n + 겹침 수)
+    active: List[Interval] = []
+    for iv in sorted(intervals, key=lambda x: (x.start, x.end)):
+        active = [a for a in active if a.end > iv.start]
+        for a in active:
+            yield a, iv
+        active.append(iv)
+
+def group_intervals(rows: Iterable[Tuple[Hashable, Interval]]) -> Dict[Hashable, List[Interval]]:
+    groups: Dict[Hashable, List[Interval]] = {}
+    for key, iv in rows:
+        groups.setdefault(key, []).append(iv)
+    return groups
@@ -1,6 +1,57 @@
-from sqlalchemy.orm import Session
-from . import models, schemas
-from typing import List, Optional
+from sqlalchemy import and_, not_, or_, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from . import cache_versions, changefeed, dimension_cache, models, revision_log, schemas
+from .database import PerDatabase
+from .dimension_cache import dimensions
+from .conflicts import Interval, group_intervals, overlapping_pairs
+from .interval_index import schedule_index
+from .timetable_cache import revisions
+from typing import Dict, Iterable, List, Optional, Tuple
+import base64
+import json
+import os
+
+# 같은 공간/시간에 여러 수업이 허용되는 단체수업 선생님
+GROUP_CLASS_TEACHERS = ["김현철", "한태희"]
+
+OVERLAP_MESSAGE = "해당 시간에 이미 공간 또는 선생님이 배정되어 있습니다. (단체수업/특정 선생님 제외)"
+
+def publish_change(op: str, entities: Iterable[Tuple[Optional[int], Optional[int], Optional[int]]],
+                   schedule_ids: Iterable[int] = ()):
+    # 커밋 후 변경 알림 (changefeed). entities: 바뀐 시간표의 (teacher_id, room_id, student_id) 들 (이동 전/후 모두)
+    entities = list(entities)
+    changefeed.publish(
+        op, schedule_ids=schedule_ids,
+        teacher_ids=[e[0] for e in entities], room_ids=[e[1] for e in entities], student_ids=[e[2] for e in entities]
+    )
+
+class InvalidScheduleError(ValueError):
+    # 요청 스키마만으로는 알 수 없는 잘못된 값 (기존 값과 합친 결과 등)
+    pass
+
+class ScheduleConflictError(Exception):
+    # 시간표 겹침. conflicts 에는 일괄 처리 시 겹친 항목 목록이 담긴다.
+    def __init__(self, message: str = OVERLAP_MESSAGE, conflicts: Optional[list] = None):
+        super().__init__(message)
+        self.conflicts = conflicts or []
+
+# 겹침 검사 방식: "index" (프로세스 메모리 인덱스) 또는 "sql" (DB 범위 조건).
+# 여러 워커가 같은 DB 를 쓰면 index 는 검사 때마다 "schedules" 버전을 읽어(PK 조회 1번) 다른 워커의 쓰기가 있었으면
+# 인덱스를 다시 읽는다.
+OVERLAP_CHECK = os.getenv("OVERLAP_CHECK", "index")
+
+def schedules_changed():
+    # 다른 워커가 시간표를 바꿨다: 겹침 인덱스와 주간 시간표/달력 캐시를 버린다
+    schedule_index.invalidate()
+    revisions.bump_all()
+
+schedule_version = PerDatabase(lambda: cache_versions.VersionWatch(cache_versions.SCHEDULES, schedules_changed))
+
+def log_change(db: Session, op: str, schedule_ids) -> int:
+    # 시간표를 바꾸는 트랜잭션에서 커밋 전에: 변경 기록과 "schedules" 버전.
+    # 돌려준 버전은 커밋하고 인덱스/캐시에 반영한 뒤 schedule_version.wrote 로 넘긴다
+    revision_log.append(db, op, schedule_ids)
+    return cache_versions.bump(db, cache_versions.SCHEDULES)
 
 def get_teacher(db: Session, teacher_id: int):
     return db.query(models.Teacher).filter(models.Teacher.id == teacher_id).first()
@@ -14,7 +65,9 @@ def get_teachers(db: Session):
 def create_teacher(db: Session, teacher: schemas.TeacherCreate):
     db_teacher = models.Teacher(**teacher.dict())
     db.add(db_teacher)
+    dimension_cache.bump(db)
     db.commit()
+    dimensions.invalidate()
     db.refresh(db_teacher)
     return db_teacher
 
@@ -30,7 +83,9 @@ def get_rooms(db: Session):
 def create_room(db: Session, room: schemas.RoomCreate):
     db_room = models.Room(**room.dict())
     db.add(db_room)
+    dimension_cache.bump(db)
     db.commit()
+    dimensions.invalidate()
     db.refresh(db_room)
     return db_room
 
@@ -46,15 +101,96 @@ def get_students(db: Session):
 def create_student(db: Session, student: schemas.StudentCreate):
     db_student = models.Student(**student.dict())
     db.add(db_student)
+    dimension_cache.bump(db)
     db.commit()
+    dimensions.invalidate()
     db.refresh(db_student)
     return db_student
 
+# 시간표 응답(schemas.Schedule)은 teacher/room/student 를 포함하므로 행마다 lazy load 가 일어나지 않도록
+# 관계를 한꺼번에 읽는다.
+#   selectin: 본 쿼리 + 관계별 IN 쿼리 1개씩 (기본값)
+#   joined:   LEFT OUTER JOIN 으로 한 번에
+#   identity: 작은 차원 테이블을 먼저 통째로 읽어 identity map 에 올려두고 lazy load 가 SQL 없이 풀리게 함
+SCHEDULE_LOAD_STRATEGY = os.getenv("SCHEDULE_LOAD_STRATEGY", "selectin")
+
+def preload_dimensions(db: Session):
+    # 선생님/공간/학생 전체를 세션 identity map 에 적재
+    db.query(models.Teacher).all()
+    db.query(models.Room).all()
+    db.query(models.Student).all()
+
+def schedule_options(strategy: str):
+    if strategy == "joined":
+        return [
+            joinedload(models.Schedule.teacher),
+            joinedload(models.Schedule.room),
+            joinedload(models.Schedule.student)
+        ]
+    if strategy == "identity":
+        return []
+    return [
+        selectinload(models.Schedule.teacher),
+        selectinload(models.Schedule.room),
+        selectinload(models.Schedule.student)
+    ]
+
+def schedule_query(db: Session, strategy: Optional[str] = None):
+    strategy = strategy or SCHEDULE_LOAD_STRATEGY
+    if strategy == "identity":
+        preload_dimensions(db)
+    return db.query(models.Schedule).options(*schedule_options(strategy))
+
 def get_schedule(db: Session, schedule_id: int):
-    return db.query(models.Schedule).filter(models.Schedule.id == schedule_id).first()
+    return schedule_query(db, "joined").filter(models.Schedule.id == schedule_id).first()
+
+# 목록 정렬 순서이자 커서 키: (요일 순서, 시작 시각, id)
+SCHEDULE_ORDER = (models.Schedule.day_index, models.Schedule.start_min, models.Schedule.id)
+
+def encode_cursor(schedule: models.Schedule) -> str:
+    raw = json.dumps([schedule.day_index, schedule.start_min, schedule.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    # 잘못된 커서는 ValueError
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        day_index, start_min, schedule_id = json.loads(raw)
+        return int(day_index), int(start_min), int(schedule_id)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
 
-def get_schedules(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Schedule).offset(skip).limit(limit).all()
+def schedule_filters(*, teacher_id: Optional[int] = None, room_id: Optional[int] = None,
+                     student_id: Optional[int] = None, day_of_week: Optional[str] = None,
+                     is_regular: Optional[int] = None, change_type: Optional[schemas.ChangeType] = None,
+                     cursor: Optional[str] = None):
+    # 목록 조회 조건. 커서가 있으면 (day_index, start_min, id) > 커서 키 조건을 더한다.
+    clauses = []
+    if teacher_id is not None:
+        clauses.append(models.Schedule.teacher_id == teacher_id)
+    if room_id is not None:
+        clauses.append(models.Schedule.room_id == room_id)
+    if student_id is not None:
+        clauses.append(models.Schedule.student_id == student_id)
+    if day_of_week is not None:
+        clauses.append(models.Schedule.day_of_week == day_of_week)
+    if is_regular is not None:
+        clauses.append(models.Schedule.is_regular == is_regular)
+    if change_type is not None:
+        clauses.append(models.Schedule.change_type == change_type)
+    if cursor:
+        clauses.append(tuple_(*SCHEDULE_ORDER) > tuple_(*decode_cursor(cursor)))
+    return clauses
+
+def get_schedules(db: Session, skip: int = 0, limit: int = 100, **filters):
+    return (
+        schedule_query(db)
+        .filter(*schedule_filters(**filters))
+        .order_by(*SCHEDULE_ORDER)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
 
 def create_schedule(db: Session, schedule: schemas.ScheduleCreate):
     # 겹침 검사
@@ -65,11 +201,17 @@ def create_schedule(db: Session, schedule: schemas.ScheduleCreate):
         start_time=schedule.start_time,
         end_time=schedule.end_time
     ):
-        raise Exception("해당 시간에 이미 공간 또는 선생님이 배정되어 있습니다. (단체수업/특정 선생님 제외)")
+        raise ScheduleConflictError(OVERLAP_MESSAGE)
     db_schedule = models.Schedule(**schedule.dict())
     db.add(db_schedule)
+    db.flush()
+    version = log_change(db, "insert", [db_schedule.id])
     db.commit()
-    db.refresh(db_schedule)
+    db_schedule = get_schedule(db, db_schedule.id)
+    index_schedule(db, db_schedule)
+    revisions.touch(db_schedule.teacher_id, db_schedule.room_id, db_schedule.student_id)
+    schedule_version.wrote(version)
+    publish_change("create", [(db_schedule.teacher_id, db_schedule.room_id, db_schedule.student_id)], [db_schedule.id])
     return db_schedule
 
 def update_schedule(db: Session, schedule_id: int, schedule_update: dict):
@@ -82,6 +224,8 @@ def update_schedule(db: Session, schedule_id: int, schedule_update: dict):
     day_of_week = schedule_update.get('day_of_week', schedule.day_of_week)
     start_time = schedule_update.get('start_time', schedule.start_time)
     end_time = schedule_update.get('end_time', schedule.end_time)
+    if models.time_to_minutes(end_time) <= models.time_to_minutes(start_time):
+        raise InvalidScheduleError("end_time must be after start_time")
     if is_overlap(db,
         teacher_id=teacher_id,
         room_id=room_id,
@@ -90,11 +234,19 @@ def update_schedule(db: Session, schedule_id: int, schedule_update: dict):
         end_time=end_time,
         exclude_schedule_id=schedule_id
     ):
-        raise Exception("해당 시간에 이미 공간 또는 선생님이 배정되어 있습니다. (단체수업/특정 선생님 제외)")
+        raise ScheduleConflictError(OVERLAP_MESSAGE)
+    before = (schedule.teacher_id, schedule.room_id, schedule.student_id)
     for key, value in schedule_update.items():
         setattr(schedule, key, value)
+    version = log_change(db, "update", [schedule_id])
     db.commit()
-    db.refresh(schedule)
+    schedule = get_schedule(db, schedule_id)
+    index_schedule(db, schedule)
+    after = (schedule.teacher_id, schedule.room_id, schedule.student_id)
+    revisions.touch(*before)
+    revisions.touch(*after)
+    schedule_version.wrote(version)
+    publish_change("update", [before, after], [schedule_id])
     return schedule
 
 def delete_schedule(db: Session, schedule_id: int):
@@ -102,46 +254,395 @@ def delete_schedule(db: Session, schedule_id: int):
     if not schedule:
         return None
     db.delete(schedule)
+    version = log_change(db, "delete", [schedule_id])
     db.commit()
+    schedule_index.remove(schedule_id)
+    revisions.touch(schedule.teacher_id, schedule.room_id, schedule.student_id)
+    schedule_version.wrote(version)
+    publish_change("delete", [(schedule.teacher_id, schedule.room_id, schedule.student_id)], [schedule_id])
     return schedule
 
 # 선생님별 주간 시간표
 
 def get_schedules_by_teacher_week(db: Session, teacher_id: int) -> List[models.Schedule]:
-    return db.query(models.Schedule).filter(models.Schedule.teacher_id == teacher_id).all()
+    return schedule_query(db).filter(models.Schedule.teacher_id == teacher_id).all()
 
 # 공간별 주간 시간표
 
 def get_schedules_by_room_week(db: Session, room_id: int) -> List[models.Schedule]:
-    return db.query(models.Schedule).filter(models.Schedule.room_id == room_id).all()
+    return schedule_query(db).filter(models.Schedule.room_id == room_id).all()
 
-def is_overlap(db: Session, *, teacher_id: int, room_id: int, day_of_week: str, start_time: str, end_time: str, exclude_schedule_id: int = None) -> bool:
-    # 겹치는 시간대가 있는지 검사 (단, 단체수업/특정 선생님은 예외)
-    # 1. 같은 공간, 같은 요일, 시간이 겹치는 수업
-    q = db.query(models.Schedule).filter(
+# 학생별 주간 시간표
+
+def get_schedules_by_student_week(db: Session, student_id: int) -> List[models.Schedule]:
+    return schedule_query(db).filter(models.Schedule.student_id == student_id).all()
+
+# 여러 선생님/공간/학생의 시간표를 IN 쿼리 한 번으로 읽어 id 별로 묶는다
+SCHEDULE_GROUP_COLUMNS = {
+    "teacher": models.Schedule.teacher_id,
+    "room": models.Schedule.room_id,
+    "student": models.Schedule.student_id,
+}
+
+def group_schedules(items: List[dict], kind: str, ids: List[int]) -> Dict[int, List[dict]]:
+    # 응답 dict 들을 id 별로. 요청한 id 는 시간표가 없어도 빈 목록으로 남긴다
+    grouped: Dict[int, List[dict]] = {i: [] for i in ids}
+    key = SCHEDULE_GROUP_COLUMNS[kind].key
+    for item in items:
+        grouped[item[key]].append(item)
+    return grouped
+
+def is_group_class(db: Session, schedule_type, teacher_id: Optional[int]) -> bool:
+    # 단체수업 예외: 지정된 선생님의 수업은 겹쳐도 허용
+    if schedule_type != models.ScheduleType.CLASS or teacher_id is None:
+        return False
+    teacher = dimensions.lookup(db, "teacher", teacher_id)
+    return teacher is not None and teacher.name in GROUP_CLASS_TEACHERS
+
+def index_schedule(db: Session, schedule: models.Schedule):
+    # 쓰기 후 겹침 인덱스 갱신
+    if schedule_index.is_stale():
+        return
+    schedule_index.add(
+        schedule.id,
+        teacher_id=schedule.teacher_id,
+        room_id=schedule.room_id,
+        day_of_week=schedule.day_of_week,
+        start_min=schedule.start_min,
+        end_min=schedule.end_min,
+        exempt=is_group_class(db, schedule.type, schedule.teacher_id)
+    )
+
+def rebuild_interval_index(db: Session):
+    # DB 전체 시간표를 한 번의 쿼리로 읽어 인덱스를 다시 만든다 (기동 시, 다른 워커의 변경 반영 시)
+    rows = db.query(
+        models.Schedule.id,
+        models.Schedule.teacher_id,
+        models.Schedule.room_id,
+        models.Schedule.day_of_week,
+        models.Schedule.start_min,
+        models.Schedule.end_min,
+        models.Schedule.type,
+        models.Teacher.name
+    ).outerjoin(models.Teacher, models.Schedule.teacher_id == models.Teacher.id)
+    schedule_index.load(
+        dict(
+            schedule_id=sid,
+            teacher_id=teacher_id,
+            room_id=room_id,
+            day_of_week=day,
+            start_min=start,
+            end_min=end,
+            exempt=typ == models.ScheduleType.CLASS and teacher_name in GROUP_CLASS_TEACHERS
+        )
+        for sid, teacher_id, room_id, day, start, end, typ, teacher_name in rows
+    )
+    return len(schedule_index)
+
+def overlaps(start_min: int, end_min: int):
+    # 시간 겹침 판정: start < :end AND end > :start
+    return and_(models.Schedule.start_min < end_min, models.Schedule.end_min > start_min)
+
+def group_class_exempt():
+    # 단체수업 예외 조건 (SQL)
+    return and_(
+        models.Schedule.type == models.ScheduleType.CLASS,
+        models.Schedule.teacher_id.in_(
+            select(models.Teacher.id).where(models.Teacher.name.in_(GROUP_CLASS_TEACHERS))
+        )
+    )
+
+def find_overlapping(db: Session, *, teacher_id: int, room_id: int, day_of_week: str, start_time: str, end_time: str, exclude_schedule_id: int = None) -> List[int]:
+    # 같은 요일, 같은 공간 또는 같은 선생님의 겹치는 수업 id 목록 (단체수업 예외 제외)
+    q = db.query(models.Schedule.id).filter(
         models.Schedule.day_of_week == day_of_week,
-        models.Schedule.room_id == room_id
+        or_(models.Schedule.room_id == room_id, models.Schedule.teacher_id == teacher_id),
+        overlaps(models.time_to_minutes(start_time), models.time_to_minutes(end_time)),
+        not_(group_class_exempt())
     )
     if exclude_schedule_id:
         q = q.filter(models.Schedule.id != exclude_schedule_id)
-    for sch in q:
-        # 시간 겹침 판정
-        if not (end_time <= sch.start_time or start_time >= sch.end_time):
-            # 단체수업 예외
-            if sch.type == models.ScheduleType.CLASS and sch.teacher and sch.teacher.name in ["김현철", "한태희"]:
-                continue
-            return True
-    # 2. 같은 선생님, 같은 요일, 시간이 겹치는 수업
-    q2 = db.query(models.Schedule).filter(
-        models.Schedule.day_of_week == day_of_week,
-        models.Schedule.teacher_id == teacher_id
+    return [sid for sid, in q]
+
+def is_overlap(db: Session, *, teacher_id: int, room_id: int, day_of_week: str, start_time: str, end_time: str, exclude_schedule_id: int = None) -> bool:
+    # 겹치는 시간대가 있는지 검사 (단, 단체수업/특정 선생님은 예외)
+    # 같은 공간 또는 같은 선생님의 같은 요일 수업과 시간이 겹치는지 판정
+    if OVERLAP_CHECK == "sql":
+        return bool(find_overlapping(db,
+            teacher_id=teacher_id,
+            room_id=room_id,
+            day_of_week=day_of_week,
+            start_time=start_time,
+            end_time=end_time,
+            exclude_schedule_id=exclude_schedule_id
+        ))
+    schedule_version.check(db)
+    if schedule_index.is_stale():
+        rebuild_interval_index(db)
+    return schedule_index.conflicts(
+        teacher_id=teacher_id,
+        room_id=room_id,
+        day_of_week=day_of_week,
+        start_min=models.time_to_minutes(start_time),
+        end_min=models.time_to_minutes(end_time),
+        exclude_schedule_id=exclude_schedule_id
     )
-    if exclude_schedule_id:
-        q2 = q2.filter(models.Schedule.id != exclude_schedule_id)
-    for sch in q2:
-        if not (end_time <= sch.start_time or start_time >= sch.end_time):
-            # 단체수업 예외
-            if sch.type == models.ScheduleType.CLASS and sch.teacher and sch.teacher.name in ["김현철", "한태희"]:
+
+def group_class_teacher_ids(db: Session) -> set:
+    if dimensions.enabled:
+        return set(dimensions.ids_by_name(db, "teacher", GROUP_CLASS_TEACHERS).values())
+    return {tid for tid, in db.query(models.Teacher.id).filter(models.Teacher.name.in_(GROUP_CLASS_TEACHERS))}
+
+def resolve_names(db: Session, model, names: Dict[str, dict], create: bool) -> Tuple[Dict[str, int], int]:
+    # 이름 -> id 를 차원 캐시에서 찾고, 캐시에 없는 이름만 IN 쿼리 한 번으로 확인한다. 그래도 없는 이름은
+    # create 이면 한 번에 입력하고(버전을 올린다), 아니면(dry run) 음수 임시 id 를 준다. (이름 -> id, 새로 만든/만들 개수)
+    if not names:
+        return {}, 0
+    found = dimensions.ids_by_name(db, dimension_cache.KINDS[model], names)
+    unknown = [name for name in names if name not in found]
+    if unknown:
+        found.update(db.query(model.name, model.id).filter(model.name.in_(unknown)))
+    missing = [name for name in names if name not in found]
+    if missing:
+        if create:
+            db.execute(model.__table__.insert(), [{"name": name, **names[name]} for name in missing])
+            dimension_cache.bump(db)
+            found.update(db.query(model.name, model.id).filter(model.name.in_(missing)))
+        else:
+            found.update((name, -i) for i, name in enumerate(missing, 1))
+    return found, len(missing)
+
+def find_batch_conflicts(db: Session, values: List[dict], exclude_ids=()) -> List[schemas.ScheduleImportConflict]:
+    # 입력할 행들을 기존 시간표 및 서로와 한 번의 sweep 으로 비교한다.
+    # 겹치는 쌍에서 먼저 들어간 쪽(기존 행, 또는 배치 안에서 앞선 행)이 단체수업이면 is_overlap 처럼 허용.
+    # exclude_ids: 이번에 옮겨지는 기존 행 (values 가 새 위치)
+    if not values:
+        return []
+    group_teachers = group_class_teacher_ids(db)
+    days = {v["day_of_week"] for v in values}
+    teacher_ids = {v["teacher_id"] for v in values if v["teacher_id"]}
+    room_ids = {v["room_id"] for v in values if v["room_id"]}
+    existing = db.query(
+        models.Schedule.id,
+        models.Schedule.teacher_id,
+        models.Schedule.room_id,
+        models.Schedule.day_of_week,
+        models.Schedule.start_min,
+        models.Schedule.end_min,
+        models.Schedule.type
+    ).filter(
+        models.Schedule.day_of_week.in_(days),
+        or_(models.Schedule.room_id.in_(room_ids), models.Schedule.teacher_id.in_(teacher_ids))
+    )
+
+    def keyed(ref, teacher_id, room_id, day, start, end, typ):
+        iv = Interval(ref, start, end, typ == models.ScheduleType.CLASS and teacher_id in group_teachers)
+        # 공간/선생님이 비어 있는(NULL) 행은 그 축으로는 아무것과도 겹치지 않는다
+        if room_id is not None:
+            yield ("room", room_id, day), iv
+        if teacher_id is not None:
+            yield ("teacher", teacher_id, day), iv
+
+    def entries():
+        for sid, teacher_id, room_id, day, start, end, typ in existing:
+            if sid in exclude_ids:
                 continue
-            return True
-    return False
+            yield from keyed((0, sid), teacher_id, room_id, day, start, end, typ)
+        for i, v in enumerate(values):
+            yield from keyed((1, i), v["teacher_id"], v["room_id"], v["day_of_week"], v["start_min"], v["end_min"], v["type"])
+
+    conflicts = []
+    for (kind, _, _), group in group_intervals(entries()).items():
+        for a, b in overlapping_pairs(group):
+            first, later = sorted((a, b), key=lambda iv: iv.ref)
+            if later.ref[0] == 0 or first.exempt:
+                continue
+            if first.ref[0] == 0:
+                conflicts.append(schemas.ScheduleImportConflict(row=later.ref[1], kind=kind, schedule_id=first.ref[1]))
+            else:
+                conflicts.append(schemas.ScheduleImportConflict(row=later.ref[1], kind=kind, other_row=first.ref[1]))
+    conflicts.sort(key=lambda c: (c.row, c.kind))
+    return conflicts
+
+def insert_values(db: Session, values: List[dict]):
+    # 검사를 마친 시간표 행들을 executemany 한 번으로 넣고 커밋 (RETURNING 으로 받은 id 를 변경 기록에 남긴다)
+    ids = []
+    version = None
+    if values:
+        table = models.Schedule.__table__
+        ids = db.scalars(table.insert().returning(table.c.id), values).all()
+        version = log_change(db, "insert", ids)
+    db.commit()
+    schedule_index.invalidate()
+    for v in values:
+        revisions.touch(v["teacher_id"], v["room_id"], v["student_id"])
+    if version is not None:
+        schedule_version.wrote(version)
+    if values:
+        publish_change("insert", [(v["teacher_id"], v["room_id"], v["student_id"]) for v in values], ids)
+
+def import_schedules(db: Session, rows: List[schemas.ScheduleImportRow], *, dry_run: bool = False, on_conflict: str = "abort") -> schemas.ScheduleImportResult:
+    # 이름 해석(선생님/공간/학생 각 1~2 쿼리) -> 배치 전체 겹침 검사 -> executemany 한 번, 하나의 트랜잭션
+    create = not dry_run
+    teachers: Dict[str, dict] = {}
+    for r in rows:
+        if not teachers.get(r.teacher, {}).get("subject"):
+            teachers[r.teacher] = {"subject": r.subject}
+    teacher_ids, created_teachers = resolve_names(db, models.Teacher, teachers, create)
+    room_ids, created_rooms = resolve_names(db, models.Room, {r.room: {} for r in rows}, create)
+    student_ids, created_students = resolve_names(db, models.Student, {r.student: {} for r in rows if r.student}, create)
+
+    values = []
+    for r in rows:
+        values.append(dict(
+            teacher_id=teacher_ids[r.teacher],
+            room_id=room_ids[r.room],
+            student_id=student_ids[r.student] if r.student else None,
+            day_of_week=r.day_of_week,
+            day_index=models.day_to_index(r.day_of_week),
+            start_time=r.start_time,
+            end_time=r.end_time,
+            start_min=models.time_to_minutes(r.start_time),
+            end_min=models.time_to_minutes(r.end_time),
+            type=models.ScheduleType(r.type.value),
+            is_regular=r.is_regular,
+            change_type=models.ChangeType(r.change_type.value) if r.change_type else None,
+            effective_from=r.effective_from,
+            effective_to=r.effective_to
+        ))
+    conflicts = find_batch_conflicts(db, values)
+
+    skip_rows = set()
+    if conflicts and on_conflict == "skip":
+        skip_rows = {c.row for c in conflicts}
+    elif conflicts and on_conflict != "allow":
+        skip_rows = set(range(len(values)))
+    to_insert = [v for i, v in enumerate(values) if i not in skip_rows]
+
+    if dry_run or (skip_rows and not to_insert):
+        db.rollback()
+        if not dry_run:
+            # 되돌렸으므로 만든 선생님/공간/학생도 없다 (dry run 은 만들 개수를 미리 보여 준다)
+            created_teachers = created_rooms = created_students = 0
+    else:
+        insert_values(db, to_insert)
+        if created_teachers or created_rooms or created_students:
+            dimensions.invalidate()
+    return schemas.ScheduleImportResult(
+        dry_run=dry_run,
+        rows=len(values),
+        inserted=0 if dry_run else len(to_insert),
+        skipped=len(skip_rows),
+        created_teachers=created_teachers,
+        created_rooms=created_rooms,
+        created_students=created_students,
+        conflicts=conflicts
+    )
+
+def regular_series_filter(f: schemas.ScheduleBulkUpdateFilter):
+    # 정규 수업 묶음 조건 (ix_schedules_regular_series). 시각은 분으로 비교한다 ("9:00" 과 "09:00" 은 같은 시각)
+    return [
+        models.Schedule.is_regular == 1,
+        models.Schedule.teacher_id == f.teacher_id,
+        models.Schedule.student_id == f.student_id,
+        models.Schedule.room_id == f.room_id,
+        models.Schedule.day_of_week == f.day_of_week,
+        models.Schedule.start_min == models.time_to_minutes(f.start_time),
+        models.Schedule.end_min == models.time_to_minutes(f.end_time),
+        models.Schedule.type == f.type,
+    ]
+
+def update_values(changes: dict) -> dict:
+    # UPDATE 문에 쓸 값. 파생 컬럼(day_index, start_min, end_min)도 함께 채운다.
+    values = dict(changes)
+    if "day_of_week" in values:
+        values["day_index"] = models.day_to_index(values["day_of_week"])
+    if "start_time" in values:
+        values["start_min"] = models.time_to_minutes(values["start_time"])
+    if "end_time" in values:
+        values["end_min"] = models.time_to_minutes(values["end_time"])
+    for key, enum in (("type", models.ScheduleType), ("change_type", models.ChangeType)):
+        if values.get(key) is not None:
+            values[key] = enum(values[key])
+    return values
+
+def bulk_update_regular(db: Session, items: List[schemas.ScheduleBulkUpdateItem]) -> List[int]:
+    # (조건, 변경) 쌍마다 대상 id 를 한 번 읽고, 옮겨질 위치 전체를 한 번에 겹침 검사한 뒤
+    # 쌍마다 UPDATE ... WHERE id IN (...) 한 문장으로 반영한다. 모두 하나의 트랜잭션.
+    cols = (
+        models.Schedule.id,
+        models.Schedule.teacher_id,
+        models.Schedule.room_id,
+        models.Schedule.day_of_week,
+        models.Schedule.start_min,
+        models.Schedule.end_min,
+        models.Schedule.type,
+        models.Schedule.student_id
+    )
+    targets: Dict[int, dict] = {}
+    touched = set()
+    plan = []
+    for item in items:
+        changes = update_values({k: v for k, v in item.update.dict(exclude_unset=True).items() if v is not None})
+        ids = []
+        for row in db.query(*cols).filter(*regular_series_filter(item.filter)):
+            ids.append(row.id)
+            touched.add((row.teacher_id, row.room_id, row.student_id))
+            current = targets.setdefault(row.id, dict(row._mapping))
+            current.update((k, v) for k, v in changes.items() if k in current)
+        plan.append((ids, changes))
+
+    # 시각을 한쪽만 바꾸면 기존 값과 합친 결과를 본다. 아무 행도 바꾸기 전에 막는다
+    for v in targets.values():
+        if v["end_min"] <= v["start_min"]:
+            db.rollback()
+            raise InvalidScheduleError(f"end_time must be after start_time (schedule {v['id']})")
+    values = list(targets.values())
+    conflicts = find_batch_conflicts(db, values, exclude_ids=set(targets))
+    if conflicts:
+        db.rollback()
+        raise ScheduleConflictError(conflicts=[
+            {
+                "schedule_id": values[c.row]["id"],
+                "kind": c.kind,
+                "conflicts_with": c.schedule_id if c.schedule_id is not None else values[c.other_row]["id"]
+            }
+            for c in conflicts
+        ])
+    for ids, changes in plan:
+        if ids and changes:
+            db.execute(
+                update(models.Schedule).where(models.Schedule.id.in_(ids)).values(**changes),
+                execution_options={"synchronize_session": False}
+            )
+    version = log_change(db, "update", targets)
+    db.commit()
+    for v in values:
+        touched.add((v["teacher_id"], v["room_id"], v["student_id"]))
+    for ids in touched:
+        revisions.touch(*ids)
+    if targets:
+        publish_change("bulk_update", touched, targets)
+
+    if not schedule_index.is_stale():
+        group_teachers = group_class_teacher_ids(db)
+        for v in values:
+            schedule_index.add(
+                v["id"],
+                teacher_id=v["teacher_id"],
+                room_id=v["room_id"],
+                day_of_week=v["day_of_week"],
+                start_min=v["start_min"],
+                end_min=v["end_min"],
+                exempt=v["type"] == models.ScheduleType.CLASS and v["teacher_id"] in group_teachers
+            )
+    schedule_version.wrote(version)
+    return sorted(targets)
+
+def insert_placements(db: Session, values: List[dict]):
+    # 자동 배치 결과를 한 트랜잭션으로 입력. 계산하는 사이에 다른 쓰기로 겹침이 생겼으면 아무것도 넣지 않는다.
+    conflicts = find_batch_conflicts(db, values)
+    if conflicts:
+        db.rollback()
+        raise ScheduleConflictError(conflicts=[c.dict(exclude_none=True) for c in conflicts])
+    insert_values(db, values)
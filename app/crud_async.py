@@ -0,0 +1,272 @@
+import asyncio
+import functools
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import availability, cache_versions, crud, dimension_cache, grid, models, placement, revision_log, schemas, serialize
+from .dimension_cache import dimensions
+from .interval_index import schedule_index
+from .timetable_cache import revisions
+from typing import Dict, List, Optional
+
+# AsyncSession 용 crud. 조회는 비동기 select 로 직접 수행하고,
+# 겹침 검사와 인덱스 갱신이 얽힌 쓰기 경로는 run_sync 로 crud 의 동기 구현을 그대로 재사용한다.
+
+async def get_dimension(db: AsyncSession, kind: str, entity_id: Optional[int] = None, name: Optional[str] = None):
+    # 선생님/공간/학생 (읽기 전용 행). 차원 캐시에서 답할 수 있으면 SQL 없이 끝난다
+    row = dimensions.peek(kind, entity_id, name)
+    if row is None:
+        row = await db.run_sync(dimensions.lookup, kind, entity_id, name)
+    return row
+
+async def delete_dimension(db: AsyncSession, kind: str, entity) -> list:
+    # 선생님/공간/학생 삭제 (entity 는 이 세션의 ORM 객체). 시간표의 *_id 가 NULL 이 되므로 변경 기록을 남긴다.
+    # 영향받은 시간표의 삭제 전 (id, teacher_id, room_id, student_id) 목록을 돌려주고 변경 알림도 낸다
+    affected, version = await log_entity_schedules(db, kind, entity.id)
+    await db.delete(entity)
+    await db.run_sync(dimension_cache.bump)
+    await db.commit()
+    dimensions.invalidate()
+    # 그 시간표가 들어 있던 다른 선생님/공간/학생의 주간 시간표에서도 지운 것이 빠져야 한다
+    revisions.touch(**{f"{kind}_id": entity.id})
+    for row in affected:
+        revisions.touch(row.teacher_id, row.room_id, row.student_id)
+    # 인덱스의 공간/선생님 구간과 단체수업 예외(선생님 이름)가 바뀌므로 다시 읽게 한다
+    schedule_index.invalidate()
+    crud.schedule_version.wrote(version)
+    # 지운 것만이 아니라 영향받은 시간표와 그 선생님/공간/학생 구독자에게도 알린다
+    deleted = tuple(entity.id if k == kind else None for k in ("teacher", "room", "student"))
+    crud.publish_change(f"delete_{kind}", [deleted, *((r.teacher_id, r.room_id, r.student_id) for r in affected)],
+                        [r.id for r in affected])
+    return affected
+
+async def get_teacher(db: AsyncSession, teacher_id: int):
+    return await get_dimension(db, "teacher", teacher_id)
+
+async def get_teacher_by_name(db: AsyncSession, name: str):
+    return await get_dimension(db, "teacher", name=name)
+
+async def get_teachers(db: AsyncSession):
+    return (await db.scalars(select(models.Teacher))).all()
+
+async def create_teacher(db: AsyncSession, teacher: schemas.TeacherCreate):
+    db_teacher = models.Teacher(**teacher.dict())
+    db.add(db_teacher)
+    await db.run_sync(dimension_cache.bump)
+    await db.commit()
+    dimensions.invalidate()
+    await db.refresh(db_teacher)
+    return db_teacher
+
+async def get_room(db: AsyncSession, room_id: int):
+    return await get_dimension(db, "room", room_id)
+
+async def get_room_by_name(db: AsyncSession, name: str):
+    return await get_dimension(db, "room", name=name)
+
+async def get_rooms(db: AsyncSession):
+    return (await db.scalars(select(models.Room))).all()
+
+async def create_room(db: AsyncSession, room: schemas.RoomCreate):
+    db_room = models.Room(**room.dict())
+    db.add(db_room)
+    await db.run_sync(dimension_cache.bump)
+    await db.commit()
+    dimensions.invalidate()
+    await db.refresh(db_room)
+    return db_room
+
+async def get_student(db: AsyncSession, student_id: int):
+    return await get_dimension(db, "student", student_id)
+
+async def get_student_by_name(db: AsyncSession, name: str):
+    return await get_dimension(db, "student", name=name)
+
+async def get_students(db: AsyncSession):
+    return (await db.scalars(select(models.Student))).all()
+
+async def create_student(db: AsyncSession, student: schemas.StudentCreate):
+    db_student = models.Student(**student.dict())
+    db.add(db_student)
+    await db.run_sync(dimension_cache.bump)
+    await db.commit()
+    dimensions.invalidate()
+    await db.refresh(db_student)
+    return db_student
+
+async def schedule_select(db: AsyncSession, strategy: Optional[str] = None):
+    # crud.schedule_query 와 같은 관계 로딩 전략을 적용한 select
+    strategy = strategy or crud.SCHEDULE_LOAD_STRATEGY
+    if strategy == "identity":
+        await db.run_sync(crud.preload_dimensions)
+    return select(models.Schedule).options(*crud.schedule_options(strategy))
+
+async def get_schedule(db: AsyncSession, schedule_id: int):
+    stmt = await schedule_select(db, "joined")
+    return await db.scalar(stmt.where(models.Schedule.id == schedule_id))
+
+async def get_schedules(db: AsyncSession, skip: int = 0, limit: int = 100, **filters):
+    stmt = await schedule_select(db)
+    stmt = stmt.where(*crud.schedule_filters(**filters)).order_by(*crud.SCHEDULE_ORDER)
+    return (await db.scalars(stmt.offset(skip).limit(limit))).all()
+
+async def create_schedule(db: AsyncSession, schedule: schemas.ScheduleCreate):
+    return await db.run_sync(crud.create_schedule, schedule)
+
+async def update_schedule(db: AsyncSession, schedule_id: int, schedule_update: dict):
+    return await db.run_sync(crud.update_schedule, schedule_id, schedule_update)
+
+async def delete_schedule(db: AsyncSession, schedule_id: int):
+    return await db.run_sync(crud.delete_schedule, schedule_id)
+
+async def get_schedules_by_teacher_week(db: AsyncSession, teacher_id: int) -> List[models.Schedule]:
+    stmt = await schedule_select(db)
+    return (await db.scalars(stmt.where(models.Schedule.teacher_id == teacher_id))).all()
+
+async def get_schedules_by_room_week(db: AsyncSession, room_id: int) -> List[models.Schedule]:
+    stmt = await schedule_select(db)
+    return (await db.scalars(stmt.where(models.Schedule.room_id == room_id))).all()
+
+async def get_schedules_by_student_week(db: AsyncSession, student_id: int) -> List[models.Schedule]:
+    stmt = await schedule_select(db)
+    return (await db.scalars(stmt.where(models.Schedule.student_id == student_id))).all()
+
+async def get_schedule_rows(db: AsyncSession, fields: List[str], *, compact: bool = False, where=(),
+                            skip: int = 0, limit: Optional[int] = None):
+    # 목록 빠른 경로: ORM 객체 없이 필요한 컬럼만 (serialize.rows_query)
+    stmt = serialize.rows_query(fields, compact).where(*where).order_by(*crud.SCHEDULE_ORDER)
+    if skip:
+        stmt = stmt.offset(skip)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return (await db.execute(stmt)).all()
+
+async def schedules_body(db: AsyncSession, rows, fields: List[str], compact: bool = False) -> bytes:
+    if not compact:
+        return serialize.dumps(serialize.row_dicts(rows, fields))
+    tables = {}
+    for kind, ids in serialize.lookup_tables(rows, fields).items():
+        tables[kind] = (await db.execute(serialize.lookup_query(kind, ids))).all() if ids else []
+    return serialize.dumps(serialize.compact_body(rows, fields, tables))
+
+async def get_schedules_grouped(db: AsyncSession, kind: str, ids: List[int]) -> Dict[int, List[dict]]:
+    column = crud.SCHEDULE_GROUP_COLUMNS[kind]
+    rows = await get_schedule_rows(db, serialize.FIELDS, where=[column.in_(ids)])
+    return crud.group_schedules(serialize.row_dicts(rows, serialize.FIELDS), kind, ids)
+
+async def get_schedule_changes(db: AsyncSession, since: Optional[int], limit: int = revision_log.CHANGES_LIMIT) -> dict:
+    return await db.run_sync(revision_log.changes, since, limit)
+
+async def compact_schedule_log(db: AsyncSession) -> dict:
+    return await db.run_sync(revision_log.compact)
+
+async def log_schedule_revisions(db: AsyncSession, op: str, schedule_ids) -> int:
+    # 커밋 전에 부른다 (crud.log_change 의 비동기판). "schedules" 버전을 돌려준다
+    values = revision_log.entries(op, schedule_ids)
+    if values:
+        await db.execute(revision_log.log_table.insert(), values)
+    return await db.run_sync(cache_versions.bump, cache_versions.SCHEDULES)
+
+async def log_entity_schedules(db: AsyncSession, kind: str, entity_id: int):
+    # 선생님/공간/학생을 지우면 그 시간표들의 *_id 가 NULL 이 되므로 "update" 로 남긴다. (시간표 행들, 버전)
+    s = models.Schedule
+    column = crud.SCHEDULE_GROUP_COLUMNS[kind]
+    rows = (await db.execute(select(s.id, s.teacher_id, s.room_id, s.student_id).where(column == entity_id))).all()
+    return rows, await log_schedule_revisions(db, "update", [row.id for row in rows])
+
+async def check_schedule_version(db: AsyncSession):
+    # 조회 경로: SCHEDULE_VERSION_CHECK_SECONDS 에 한 번 "schedules" 버전을 읽어 다른 워커의 쓰기를 캐시에 반영
+    if crud.schedule_version.due():
+        await db.run_sync(crud.schedule_version.check)
+
+async def rebuild_interval_index(db: AsyncSession):
+    return await db.run_sync(crud.rebuild_interval_index)
+
+async def bulk_update_regular(db: AsyncSession, items: List[schemas.ScheduleBulkUpdateItem]) -> List[int]:
+    return await db.run_sync(crud.bulk_update_regular, items)
+
+async def import_schedules(db: AsyncSession, rows: List[schemas.ScheduleImportRow], *, dry_run: bool = False, on_conflict: str = "abort"):
+    return await db.run_sync(lambda session: crud.import_schedules(session, rows, dry_run=dry_run, on_conflict=on_conflict))
+
+async def get_week_grid(db: AsyncSession, *, days: List[str], start_min: int, end_min: int, slot_minutes: int,
+                        subject: Optional[str] = None, teacher_id: Optional[int] = None) -> dict:
+    stmt = grid.week_grid_query(days=days, start_min=start_min, end_min=end_min, subject=subject, teacher_id=teacher_id)
+    rows = (await db.execute(stmt)).all()
+    return grid.build_week_grid(rows, days=days, start_min=start_min, end_min=end_min, slot_minutes=slot_minutes)
+
+async def find_free_slots(db: AsyncSession, *, days: List[str], duration: int, step: int, window_start: int, window_end: int,
+                          teacher_id: Optional[int] = None, student_id: Optional[int] = None,
+                          room_ids: Optional[List[int]] = None) -> List[dict]:
+    room_stmt = select(models.Room.id, models.Room.name)
+    if room_ids:
+        room_stmt = room_stmt.where(models.Room.id.in_(room_ids))
+    rooms = dict((await db.execute(room_stmt)).all())
+    stmt = availability.availability_query(days=days, room_ids=rooms, teacher_id=teacher_id, student_id=student_id)
+    rows = (await db.execute(stmt)).all()
+    # 일주일 전체 sweep 은 CPU 를 수십~수백 ms 쓰므로 이벤트 루프를 막지 않게 기본 스레드 풀에서 돌린다
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(
+        availability.find_free_slots,
+        rows, days=days, rooms=rooms, teacher_id=teacher_id, student_id=student_id,
+        window_start=window_start, window_end=window_end, duration=duration, step=step
+    ))
+
+async def auto_place(db: AsyncSession, request: schemas.AutoPlaceRequest) -> schemas.AutoPlaceResult:
+    window_start, window_end = models.time_to_minutes(request.start_time), models.time_to_minutes(request.end_time)
+    teacher_ids = {l.teacher_id for l in request.lessons}
+    student_ids = {l.student_id for l in request.lessons if l.student_id is not None}
+    rooms = (await db.scalars(select(models.Room.id).order_by(models.Room.id))).all()
+    teachers = dict((await db.execute(
+        select(models.Teacher.id, models.Teacher.name).where(models.Teacher.id.in_(teacher_ids))
+    )).all())
+    students = set((await db.scalars(select(models.Student.id).where(models.Student.id.in_(student_ids)))).all())
+    for kind, wanted, found in (("teacher", teacher_ids, teachers), ("student", student_ids, students),
+                                ("room", {r for l in request.lessons for r in l.room_ids or ()}, set(rooms))):
+        missing = sorted(set(wanted) - set(found))
+        if missing:
+            raise ValueError(f"unknown {kind} id: {missing}")
+
+    lessons = [
+        placement.Lesson(
+            teacher_id=l.teacher_id,
+            student_id=l.student_id,
+            duration=l.duration,
+            days=tuple(l.days or models.DAYS_OF_WEEK),
+            room_ids=tuple(l.room_ids or rooms),
+            exempt=l.type == schemas.ScheduleType.CLASS and teachers[l.teacher_id] in crud.GROUP_CLASS_TEACHERS,
+        )
+        for l in request.lessons
+    ]
+    days = sorted({day for l in lessons for day in l.days}, key=models.day_to_index)
+    stmt = placement.occupancy_query(days, room_ids={r for l in lessons for r in l.room_ids},
+                                     teacher_ids=teacher_ids, student_ids=student_ids)
+    existing = (await db.execute(stmt)).all()
+    placed, unplaced = await placement.run_solve(
+        lessons, existing, window_start=window_start, window_end=window_end,
+        step=request.step, max_backtracks=request.max_backtracks
+    )
+
+    result = [
+        schemas.LessonPlacement(
+            lesson=i,
+            teacher_id=lessons[i].teacher_id,
+            student_id=lessons[i].student_id,
+            room_id=slot.room_id,
+            day_of_week=slot.day,
+            start_time=models.minutes_to_time(slot.start),
+            end_time=models.minutes_to_time(slot.start + lessons[i].duration),
+            type=request.lessons[i].type,
+        )
+        for i, slot in placed.items()
+    ]
+    if request.commit and result:
+        # 배치한 순서대로 넣어야 단체수업 예외 판정이 계산할 때와 같다
+        await db.run_sync(crud.insert_placements, [
+            crud.update_values(p.dict(exclude={"lesson"})) | {"is_regular": 1, "change_type": None}
+            for p in result
+        ])
+    result.sort(key=lambda p: p.lesson)
+    return schemas.AutoPlaceResult(
+        placed=result,
+        unplaced=[schemas.UnplacedLesson(lesson=i, reason=reason) for i, reason in unplaced],
+        committed=request.commit and bool(result),
+    )
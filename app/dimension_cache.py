@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from . import cache_versions, models
+from .database import PerDatabase
+
+# 선생님/공간/학생(차원 테이블) 프로세스 캐시: id -> 행, 이름 -> id.
+# 주간 시간표의 존재 확인, 이름으로 조회, 단체수업 예외(선생님 이름), import 의 이름 해석이 SQL 없이 끝난다.
+# 세 테이블을 한 번에 통째로 읽고, 선생님/공간/학생을 만들거나 지우는 트랜잭션은 cache_versions 의 "dimensions"
+# 버전을 올린다. 워커마다 DIMENSION_CACHE_CHECK_SECONDS 에 한 번 버전을 읽어(PK 조회 1번) 바뀌었으면 다시 읽는다.
+#   - 캐시에 없는 id/이름은 DB 에서 확인한다 (다른 워커가 방금 만든 것이면 찾고, 다음 조회 때 다시 읽는다)
+#   - 다른 워커가 지운 것은 다음 버전 확인까지(최대 DIMENSION_CACHE_CHECK_SECONDS) 캐시에 남아 있을 수 있다
+# 캐시의 행은 ORM 객체가 아니라 읽기 전용 Row 다 (삭제 등 세션이 필요한 곳은 db.get 을 쓴다).
+# DIMENSION_CACHE=0 이면 끄고 매번 DB 에서 읽는다.
+
+DIMENSION_CACHE = os.getenv("DIMENSION_CACHE", "1") == "1"
+DIMENSION_CACHE_CHECK_SECONDS = float(os.getenv("DIMENSION_CACHE_CHECK_SECONDS", "1"))
+
+MODELS = {"teacher": models.Teacher, "room": models.Room, "student": models.Student}
+KINDS = {model: kind for kind, model in MODELS.items()}
+VERSION_NAME = "dimensions"
+V = models.CacheVersion
+
+def version_query():
+    return select(V.version).where(V.name == VERSION_NAME)
+
+def bump(db: Session):
+    # 선생님/공간/학생을 바꾸는 트랜잭션에서 커밋 전에 부른다 (커밋 후에는 invalidate)
+    return cache_versions.bump(db, VERSION_NAME)
+
+class DimensionCache:
+    def __init__(self, enabled: bool = DIMENSION_CACHE, check_interval: float = DIMENSION_CACHE_CHECK_SECONDS):
+        self.enabled = enabled
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._by_id: Dict[str, dict] = {kind: {} for kind in MODELS}
+        self._by_name: Dict[str, dict] = {kind: {} for kind in MODELS}
+        self.version: Optional[int] = None  # None: 읽은 적 없음 또는 무효화됨
+        self.generation = 0
+        self.checked = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.checks = 0
+        self.loads = 0
+
+    def due(self) -> bool:
+        # 버전을 다시 확인할 때인지 (이때는 SQL 이 필요하다)
+        return self.version is None or time.monotonic() - self.checked >= self.check_interval
+
+    def peek(self, kind: str, entity_id: Optional[int] = None, name: Optional[str] = None):
+        # SQL 없이 답할 수 있으면 행, 아니면 None (lookup 으로 DB 확인)
+        if not self.enabled or self.due():
+            return None
+        with self._lock:
+            if name is not None:
+                entity_id = self._by_name[kind].get(name)
+            row = self._by_id[kind].get(entity_id)
+            if row is not None:
+                self.hits += 1
+            return row
+
+    def refresh(self, db: Session):
+        # 버전을 읽고 바뀌었으면 세 테이블을 다시 읽는다. 버전을 먼저 읽어야 읽는 사이의 변경이 다음 확인에 걸린다.
+        with self._lock:
+            generation = self.generation
+            self.checks += 1
+        version = db.scalar(version_query()) or 0
+        if version == self.version:
+            with self._lock:
+                if generation == self.generation:
+                    self.checked = time.monotonic()
+            return
+        tables = {kind: db.execute(select(model.__table__)).all() for kind, model in MODELS.items()}
+        with self._lock:
+            if generation != self.generation:
+                return  # 읽는 사이에 이 워커가 바꿨다
+            for kind, rows in tables.items():
+                self._by_id[kind] = {row.id: row for row in rows}
+                self._by_name[kind] = {row.name: row.id for row in rows}
+            self.version = version
+            self.checked = time.monotonic()
+            self.loads += 1
+
+    def lookup(self, db: Session, kind: str, entity_id: Optional[int] = None, name: Optional[str] = None):
+        # id 또는 이름으로 행 (없으면 None). 동기 Session 용 (AsyncSession 은 peek 후 run_sync)
+        if not self.enabled:
+            return self.fetch(db, kind, entity_id, name)
+        if self.due():
+            self.refresh(db)
+        row = self.peek(kind, entity_id, name)
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            row = self.fetch(db, kind, entity_id, name)
+            if row is not None:
+                self.invalidate()  # 다른 워커가 만든 것: 다음 조회 때 다시 읽는다
+        return row
+
+    def fetch(self, db: Session, kind: str, entity_id: Optional[int] = None, name: Optional[str] = None):
+        table = MODELS[kind].__table__
+        where = table.c.name == name if name is not None else table.c.id == entity_id
+        return db.execute(select(table).where(where)).first()
+
+    def ids_by_name(self, db: Session, kind: str, names: Iterable[str]) -> Dict[str, int]:
+        # 캐시에 있는 이름만 (없는 이름은 호출한 쪽에서 DB 로 확인)
+        if not self.enabled:
+            return {}
+        if self.due():
+            self.refresh(db)
+        names = list(names)
+        with self._lock:
+            by_name = self._by_name[kind]
+            found = {name: by_name[name] for name in names if name in by_name}
+            self.hits += len(found)
+            self.misses += len(names) - len(found)
+        return found
+
+    def invalidate(self):
+        # 이 워커가 바꾼 뒤 (커밋 후). 다음 조회 때 버전 확인 없이 다시 읽는다
+        with self._lock:
+            self.version = None
+            self.generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "version": self.version,
+                "teachers": len(self._by_id["teacher"]),
+                "rooms": len(self._by_id["room"]),
+                "students": len(self._by_id["student"]),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "checks": self.checks,
+                "loads": self.loads,
+            }
+
+dimensions = PerDatabase(DimensionCache)  # DB(지점)마다 하나
@@ -0,0 +1,166 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import select
+from . import crud, database, models
+
+# 시간표 전체 내보내기 (CSV / NDJSON / iCalendar).
+# 이름은 SQL JOIN 으로 가져오고 ORM 객체 없이 Core 행을 EXPORT_CHUNK 행씩 서버 측 커서로 읽어
+# 바로 써 내보내므로 행 수와 상관없이 메모리 사용량이 일정하다.
+
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "1000"))
+
+FIELDS = ["id", "teacher_id", "teacher", "room_id", "room", "student_id", "student",
+          "day_of_week", "start_time", "end_time", "type", "is_regular", "change_type",
+          "effective_from", "effective_to"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "ics": "text/calendar; charset=utf-8",
+}
+
+ICS_DAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+def export_query(*, group: Optional[str] = None, **filters):
+    # filters: crud.schedule_filters 와 같은 조건. group("teacher" | "room") 이 있으면 그 순서로 묶어 정렬
+    order = list(crud.SCHEDULE_ORDER)
+    if group == "teacher":
+        order = [models.Teacher.name, models.Schedule.teacher_id] + order
+    elif group == "room":
+        order = [models.Room.name, models.Schedule.room_id] + order
+    return (
+        select(
+            models.Schedule.id,
+            models.Schedule.teacher_id,
+            models.Teacher.name,
+            models.Schedule.room_id,
+            models.Room.name,
+            models.Schedule.student_id,
+            models.Student.name,
+            models.Schedule.day_of_week,
+            models.Schedule.start_time,
+            models.Schedule.end_time,
+            models.Schedule.type,
+            models.Schedule.is_regular,
+            models.Schedule.change_type,
+            models.Schedule.effective_from,
+            models.Schedule.effective_to,
+            models.Schedule.day_index,
+        )
+        .outerjoin(models.Teacher, models.Teacher.id == models.Schedule.teacher_id)
+        .outerjoin(models.Room, models.Room.id == models.Schedule.room_id)
+        .outerjoin(models.Student, models.Student.id == models.Schedule.student_id)
+        .where(*crud.schedule_filters(**filters))
+        .order_by(*order)
+    )
+
+def record(row) -> list:
+    # FIELDS 순서의 값 (enum 은 한글 값, 날짜는 ISO 문자열로)
+    values = list(row[:15])
+    for i in (10, 12):
+        values[i] = values[i].value if values[i] is not None else None
+    for i in (13, 14):
+        values[i] = values[i].isoformat() if values[i] is not None else None
+    return values
+
+def csv_chunk(rows, header: bool = False) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if header:
+        writer.writerow(FIELDS)
+    writer.writerows(record(row) for row in rows)
+    return out.getvalue()
+
+def ndjson_chunk(rows) -> str:
+    return "".join(json.dumps(dict(zip(FIELDS, record(row))), ensure_ascii=False) + "\n" for row in rows)
+
+def ics_text(value: Optional[str]) -> str:
+    return (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def ics_line(line: str) -> str:
+    # 75 옥텟마다 접는다 (RFC 5545 3.1)
+    if len(line.encode()) <= 75:
+        return line + "\r\n"
+    out, current = [], b""
+    for ch in line:
+        encoded = ch.encode()
+        if len(current) + len(encoded) > 75:
+            out.append(current.decode())
+            current = b" "
+        current += encoded
+    out.append(current.decode())
+    return "\r\n".join(out) + "\r\n"
+
+def ics_header(name: str) -> str:
+    return "".join(ics_line(l) for l in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//academy-schedule//export//KO",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{ics_text(name)}",
+    ])
+
+def ics_footer() -> str:
+    return ics_line("END:VCALENDAR")
+
+def ics_chunk(rows, *, week_start: date, group: str, stamp: str) -> str:
+    # 정규 수업(is_regular=1)은 주간 반복(RRULE) 일정, 특별 일정은 한 번짜리 일정.
+    # 날짜(effective_from/to)가 없으면 week_start 주를 기준으로 한다.
+    # group 이 teacher 면 제목에 학생/공간을, room 이면 선생님/학생을 쓴다.
+    lines: List[str] = []
+    for row in rows:
+        (sid, _, teacher, _, room, _, student, _, start_time, end_time, typ, is_regular, _,
+         effective_from, effective_to, day_index) = row
+        if day_index is None or day_index >= len(ICS_DAYS):
+            continue
+        day = week_start + timedelta(days=day_index)
+        if effective_from is not None:
+            # 특별일정은 그 날짜, 정규 수업은 적용 시작일 이후 첫 해당 요일부터
+            day = effective_from if not is_regular else effective_from + timedelta(days=(day_index - effective_from.weekday()) % 7)
+        start = models.time_to_minutes(start_time)
+        end = models.time_to_minutes(end_time)
+        what = student or (typ.value if typ is not None else "")
+        summary = f"{what} ({room})" if group == "teacher" else f"{teacher} - {what}"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:schedule-{sid}@academy-schedule",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{day:%Y%m%d}T{start // 60:02d}{start % 60:02d}00",
+            f"DTEND:{day:%Y%m%d}T{end // 60:02d}{end % 60:02d}00",
+            f"SUMMARY:{ics_text(summary)}",
+            f"LOCATION:{ics_text(room)}",
+            f"CATEGORIES:{ics_text(teacher if group == 'teacher' else room)}",
+        ]
+        if is_regular:
+            until = f";UNTIL={effective_to:%Y%m%d}T235959" if effective_to is not None else ""
+            lines.append(f"RRULE:FREQ=WEEKLY;BYDAY={ICS_DAYS[day_index]}{until}")
+        lines.append("END:VEVENT")
+    return "".join(ics_line(l) for l in lines)
+
+async def stream(format: str, *, group: str = "teacher", week_start: Optional[date] = None,
+                 calendar_name: str = "시간표", **filters) -> AsyncIterator[bytes]:
+    # StreamingResponse 가 다 보낼 때까지 쓰는 자체 세션을 연다
+    stmt = export_query(group=group if format == "ics" else None, **filters).execution_options(yield_per=EXPORT_CHUNK)
+    week_start = week_start or date.today()
+    week_start -= timedelta(days=week_start.weekday())  # 그 주 월요일
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    async with database.ReadSessionLocal() as db:
+        result = await db.stream(stmt)
+        if format == "csv":
+            yield csv_chunk([], header=True).encode()
+        elif format == "ics":
+            yield ics_header(calendar_name).encode()
+        async for rows in result.partitions():
+            if format == "csv":
+                chunk = csv_chunk(rows)
+            elif format == "ndjson":
+                chunk = ndjson_chunk(rows)
+            else:
+                chunk = ics_chunk(rows, week_start=week_start, group=group, stamp=stamp)
+            yield chunk.encode()
+        if format == "ics":
+            yield ics_footer().encode()
@@ -0,0 +1,98 @@
+from sqlalchemy import and_, select
+from typing import List, Optional
+from . import models
+
+# 전체 공간 점유 격자 (공간 × 요일 × 시간 칸).
+# 공간 LEFT JOIN 시간표(+선생님/학생 이름) 한 번의 쿼리로 읽고, 행을 한 번 훑으며 격자를 채운다.
+
+def week_grid_query(*, days: List[str], start_min: int, end_min: int,
+                    subject: Optional[str] = None, teacher_id: Optional[int] = None):
+    # 필터는 JOIN 조건에 넣어 시간표가 없는 공간도 빈 행으로 남게 한다
+    on = [
+        models.Schedule.room_id == models.Room.id,
+        models.Schedule.day_of_week.in_(days),
+        models.Schedule.start_min < end_min,
+        models.Schedule.end_min > start_min,
+    ]
+    if teacher_id is not None:
+        on.append(models.Schedule.teacher_id == teacher_id)
+    if subject is not None:
+        on.append(models.Schedule.teacher_id.in_(
+            select(models.Teacher.id).where(models.Teacher.subject == subject)
+        ))
+    return (
+        select(
+            models.Room.id,
+            models.Room.name,
+            models.Schedule.id,
+            models.Schedule.day_of_week,
+            models.Schedule.start_min,
+            models.Schedule.end_min,
+            models.Schedule.type,
+            models.Schedule.teacher_id,
+            models.Teacher.name,
+            models.Schedule.student_id,
+            models.Student.name,
+        )
+        .select_from(models.Room)
+        .outerjoin(models.Schedule, and_(*on))
+        .outerjoin(models.Teacher, models.Teacher.id == models.Schedule.teacher_id)
+        .outerjoin(models.Student, models.Student.id == models.Schedule.student_id)
+        .order_by(models.Room.name, models.Room.id)
+    )
+
+def build_week_grid(rows, *, days: List[str], start_min: int, end_min: int, slot_minutes: int) -> dict:
+    slot_count = max(0, -(-(end_min - start_min) // slot_minutes))
+    day_pos = {day: i for i, day in enumerate(days)}
+    rooms = {"id": [], "name": []}
+    teachers = {"id": [], "name": []}
+    students = {"id": [], "name": []}
+    schedules = {"id": [], "room": [], "day": [], "start_time": [], "end_time": [], "type": [], "teacher": [], "student": []}
+    room_pos, teacher_pos, student_pos = {}, {}, {}
+    grid = []
+
+    def lookup(table, positions, entity_id, name):
+        if entity_id is None:
+            return None
+        if entity_id not in positions:
+            positions[entity_id] = len(table["id"])
+            table["id"].append(entity_id)
+            table["name"].append(name)
+        return positions[entity_id]
+
+    for room_id, room_name, sid, day, start, end, typ, teacher_id, teacher_name, student_id, student_name in rows:
+        if room_id not in room_pos:
+            room_pos[room_id] = len(rooms["id"])
+            rooms["id"].append(room_id)
+            rooms["name"].append(room_name)
+            grid.append([[[] for _ in range(slot_count)] for _ in days])
+        if sid is None:
+            continue
+        r = room_pos[room_id]
+        d = day_pos[day]
+        schedules["id"].append(sid)
+        schedules["room"].append(r)
+        schedules["day"].append(d)
+        schedules["start_time"].append(models.minutes_to_time(start))
+        schedules["end_time"].append(models.minutes_to_time(end))
+        schedules["type"].append(typ.value if typ is not None else None)
+        schedules["teacher"].append(lookup(teachers, teacher_pos, teacher_id, teacher_name))
+        schedules["student"].append(lookup(students, student_pos, student_id, student_name))
+        first = max(0, (start - start_min) // slot_minutes)
+        last = min(slot_count, -(-(end - start_min) // slot_minutes))
+        cells = grid[r][d]
+        for slot in range(first, last):
+            cells[slot].append(sid)
+
+    return {
+        "slot_minutes": slot_minutes,
+        "start_time": models.minutes_to_time(start_min),
+        "end_time": models.minutes_to_time(end_min),
+        "slots": [models.minutes_to_time(start_min + i * slot_minutes) for i in range(slot_count)],
+        "days": days,
+        "rooms": rooms,
+        "teachers": teachers,
+        "students": students,
+        "schedules": schedules,
+        "grid": grid,
+    }
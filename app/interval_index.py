@@ -0,0 +1,140 @@
+import bisect
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from .database import PerDatabase
+
+# 인덱스 최대 유지 시간(초). 0 이면 만료 없음. 여러 워커가 같은 DB에 쓰는 경우 다른 워커의 쓰기는 TTL 과 상관없이
+# cache_versions 의 "schedules" 버전으로 알아채서 DB에서 다시 읽는다 (crud.schedule_version)
+INDEX_TTL = float(os.getenv("INTERVAL_INDEX_TTL", "0"))
+
+Key = Tuple[str, int, str]
+Entry = Tuple[int, int, int]  # (start, end, schedule_id)
+
+class IntervalIndex:
+    # (room_id, 요일), (teacher_id, 요일) 별로 시작 시각 순으로 정렬된 구간 목록을 메모리에 유지한다.
+    # 단체수업 예외 대상(exempt)은 겹침 판정에 쓰이지 않으므로 버킷에 넣지 않는다.
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._buckets: Dict[Key, List[Entry]] = {}
+        self._max_len: Dict[Key, int] = {}
+        self._lengths: Dict[Key, Dict[int, int]] = {}  # 버킷별 구간 길이 -> 개수 (지울 때 _max_len 을 다시 구한다)
+        self._entries: Dict[int, Tuple[Tuple[Key, ...], int, int]] = {}
+        self.ready = False
+        self.loaded_at = 0.0
+
+    def is_stale(self) -> bool:
+        if not self.ready:
+            return True
+        return INDEX_TTL > 0 and time.monotonic() - self.loaded_at > INDEX_TTL
+
+    def invalidate(self):
+        with self._lock:
+            self.ready = False
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._max_len.clear()
+            self._lengths.clear()
+            self._entries.clear()
+
+    def load(self, rows: Iterable[dict]):
+        # DB 에서 읽은 전체 시간표로 인덱스를 새로 만든다
+        with self._lock:
+            self.clear()
+            for row in rows:
+                self._add(**row)
+            for bucket in self._buckets.values():
+                bucket.sort()
+            self.ready = True
+            self.loaded_at = time.monotonic()
+
+    def add(self, schedule_id: int, *, teacher_id: int, room_id: int, day_of_week: str,
+            start_min: int, end_min: int, exempt: bool = False):
+        with self._lock:
+            self._remove(schedule_id)
+            self._add(schedule_id, teacher_id=teacher_id, room_id=room_id, day_of_week=day_of_week,
+                      start_min=start_min, end_min=end_min, exempt=exempt, sort=True)
+
+    def remove(self, schedule_id: int):
+        with self._lock:
+            self._remove(schedule_id)
+
+    def conflicts(self, *, teacher_id: int, room_id: int, day_of_week: str, start_min: int,
+                  end_min: int, exclude_schedule_id: Optional[int] = None) -> bool:
+        with self._lock:
+            for key in (("room", room_id, day_of_week), ("teacher", teacher_id, day_of_week)):
+                if key[1] is not None and self._first_overlap(key, start_min, end_min, exclude_schedule_id) is not None:
+                    return True
+        return False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _first_overlap(self, key: Key, start: int, end: int, exclude: Optional[int]) -> Optional[int]:
+        bucket = self._buckets.get(key)
+        if not bucket:
+            return None
+        # 시작 시각이 end 보다 앞선 구간만 후보. 가장 긴 구간 길이 이상 떨어진 곳에서 탐색을 멈춘다.
+        pos = bisect.bisect_left(bucket, (end,))
+        limit = start - self._max_len.get(key, 0)
+        for i in range(pos - 1, -1, -1):
+            s, e, sid = bucket[i]
+            if s < limit:
+                break
+            if e > start and sid != exclude:
+                return sid
+        return None
+
+    def _add(self, schedule_id: int, *, teacher_id: int, room_id: int, day_of_week: str,
+             start_min: int, end_min: int, exempt: bool = False, sort: bool = False):
+        keys: Tuple[Key, ...] = ()
+        if not exempt:
+            # 공간/선생님이 비어 있는(NULL) 수업은 그 버킷에 넣지 않는다
+            keys = tuple(key for key in (("room", room_id, day_of_week), ("teacher", teacher_id, day_of_week))
+                         if key[1] is not None)
+        for key in keys:
+            bucket = self._buckets.setdefault(key, [])
+            if sort:
+                bisect.insort(bucket, (start_min, end_min, schedule_id))
+            else:
+                bucket.append((start_min, end_min, schedule_id))
+            length = end_min - start_min
+            lengths = self._lengths.setdefault(key, {})
+            lengths[length] = lengths.get(length, 0) + 1
+            if length > self._max_len.get(key, 0):
+                self._max_len[key] = length
+        self._entries[schedule_id] = (keys, start_min, end_min)
+
+    def _remove(self, schedule_id: int):
+        entry = self._entries.pop(schedule_id, None)
+        if entry is None:
+            return
+        keys, start, end = entry
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            pos = bisect.bisect_left(bucket, (start, end, schedule_id))
+            if pos < len(bucket) and bucket[pos] == (start, end, schedule_id):
+                del bucket[pos]
+            self._forget_length(key, end - start)
+
+    def _forget_length(self, key: Key, length: int):
+        # 가장 긴 구간이 빠지면 탐색 범위(_max_len)를 남은 구간 중 가장 긴 것으로 줄인다 (길이 종류는 몇 개 안 된다)
+        lengths = self._lengths.get(key)
+        if not lengths or length not in lengths:
+            return
+        lengths[length] -= 1
+        if lengths[length]:
+            return
+        del lengths[length]
+        if not lengths:
+            del self._lengths[key]
+            self._max_len.pop(key, None)
+        elif length >= self._max_len.get(key, 0):
+            self._max_len[key] = max(lengths)
+
+schedule_index = PerDatabase(IntervalIndex)  # DB(지점)마다 하나
@@ -1,14 +1,68 @@
-from fastapi import FastAPI, Depends, HTTPException, Path, Body
-from sqlalchemy.orm import Session
-from . import models, schemas, crud, database
-from .database import SessionLocal, create_tables
-from typing import List
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Path, Query, Body, Header, Request, Response, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import audit, changefeed, export, metrics, models, occurrences, placement, revision_log, schemas, crud, crud_async, database, seed_data, serialize, tenancy
+from .database import get_db, get_read_db
+from .dimension_cache import dimensions
+from .interval_index import schedule_index
+from .timetable_cache import etag_response, revisions, timetable_cache
+from datetime import date
+from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import status
 
-models.Base.metadata.create_all(bind=database.engine_sync)
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# 엔진은 처음 쓸 때 만들고(database), 새 엔진마다 요청별 SQL 계측을 건다
+database.engine_hooks.append(metrics.instrument)
+
+async def compact_schedule_log(db: database.Database) -> dict:
+    async with db.async_sessionmaker()() as session:
+        return await crud_async.compact_schedule_log(session)
+
+async def compact_schedule_log_periodically(interval: float):
+    # 변경 기록 정리 (기본 DB 를 썼으면 기본 DB, 그리고 열려 있는 지점 DB). 워커마다 돌아도 결과는 같다
+    # (실패하면 다음 주기에 다시)
+    while True:
+        await asyncio.sleep(interval)
+        if database.default.engines_created():
+            try:
+                await compact_schedule_log(database.default)
+            except Exception:
+                logger.exception("schedule log compaction failed")
+        branches = [db.name for db in tenancy.registry.open_databases()]
+        for result in await tenancy.for_each(branches, compact_schedule_log):
+            if "error" in result:
+                logger.warning("schedule log compaction failed for branch %s: %s", result["branch"], result["error"])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # import 는 DB 에 손대지 않는다. 시작할 때 엔진을 만들고, 스키마는 DB_CREATE_SCHEMA=1 일 때만 만든다
+    # (평소에는 alembic upgrade head). 종료할 때 배치 계산 프로세스와 커넥션 풀을 닫는다.
+    database.get_engine_async()
+    database.get_engine_read_async()
+    if database.CREATE_SCHEMA:
+        await database.create_tables_async()
+    compactor = None
+    if revision_log.SCHEDULE_LOG_COMPACT_INTERVAL > 0:
+        compactor = asyncio.ensure_future(compact_schedule_log_periodically(revision_log.SCHEDULE_LOG_COMPACT_INTERVAL))
+    yield
+    if compactor is not None:
+        compactor.cancel()
+    await asyncio.to_thread(placement.shutdown)
+    await tenancy.registry.close()
+    await database.dispose_engines()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.exception_handler(crud.ScheduleConflictError)
+async def schedule_conflict_handler(request: Request, exc: crud.ScheduleConflictError):
+    return JSONResponse(status_code=409, content={"detail": str(exc), "conflicts": exc.conflicts})
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,201 +72,520 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
-
-# Dependency
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# 요청별 지연시간/SQL 계측 (GET /metrics)
+app.add_middleware(metrics.MetricsMiddleware)
+# 지점(테넌트) DB 라우팅: X-Branch 헤더 또는 /branches/<지점>/... (TENANT_DATABASE_URL 을 지정했을 때). 가장 바깥에 둔다
+app.add_middleware(tenancy.TenantMiddleware)
 
 # Teacher endpoints
 @app.post("/teachers/", response_model=schemas.Teacher)
-def create_teacher(teacher: schemas.TeacherCreate, db: Session = Depends(get_db)):
-    db_teacher = crud.get_teacher_by_name(db, name=teacher.name)
+async def create_teacher(teacher: schemas.TeacherCreate, db: AsyncSession = Depends(get_db)):
+    db_teacher = await crud_async.get_teacher_by_name(db, name=teacher.name)
     if db_teacher:
         raise HTTPException(status_code=400, detail="Teacher already registered")
-    return crud.create_teacher(db, teacher)
+    return await crud_async.create_teacher(db, teacher)
 
 @app.get("/teachers/", response_model=List[schemas.Teacher])
-def read_teachers(db: Session = Depends(get_db)):
-    return crud.get_teachers(db)
+async def read_teachers(db: AsyncSession = Depends(get_read_db)):
+    return await crud_async.get_teachers(db)
 
 @app.get("/teachers/{teacher_id}", response_model=schemas.Teacher)
-def read_teacher(teacher_id: int, db: Session = Depends(get_db)):
-    teacher = crud.get_teacher(db, teacher_id)
+async def read_teacher(teacher_id: int, db: AsyncSession = Depends(get_read_db)):
+    teacher = await crud_async.get_teacher(db, teacher_id)
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
     return teacher
 
 @app.delete("/teachers/{teacher_id}", status_code=204)
-def delete_teacher(teacher_id: int, db: Session = Depends(get_db)):
-    teacher = crud.get_teacher(db, teacher_id)
+async def delete_teacher(teacher_id: int, db: AsyncSession = Depends(get_db)):
+    teacher = await db.get(models.Teacher, teacher_id)
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
-    db.delete(teacher)
-    db.commit()
+    await crud_async.delete_dimension(db, "teacher", teacher)
     return None
 
 # Room endpoints
 @app.post("/rooms/", response_model=schemas.Room)
-def create_room(room: schemas.RoomCreate, db: Session = Depends(get_db)):
-    db_room = crud.get_room_by_name(db, name=room.name)
+async def create_room(room: schemas.RoomCreate, db: AsyncSession = Depends(get_db)):
+    db_room = await crud_async.get_room_by_name(db, name=room.name)
     if db_room:
         raise HTTPException(status_code=400, detail="Room already registered")
-    return crud.create_room(db, room)
+    return await crud_async.create_room(db, room)
 
 @app.get("/rooms/", response_model=List[schemas.Room])
-def read_rooms(db: Session = Depends(get_db)):
-    return crud.get_rooms(db)
+async def read_rooms(db: AsyncSession = Depends(get_read_db)):
+    return await crud_async.get_rooms(db)
 
 @app.get("/rooms/{room_id}", response_model=schemas.Room)
-def read_room(room_id: int, db: Session = Depends(get_db)):
-    room = crud.get_room(db, room_id)
+async def read_room(room_id: int, db: AsyncSession = Depends(get_read_db)):
+    room = await crud_async.get_room(db, room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     return room
 
 @app.delete("/rooms/{room_id}", status_code=204)
-def delete_room(room_id: int, db: Session = Depends(get_db)):
-    room = crud.get_room(db, room_id)
+async def delete_room(room_id: int, db: AsyncSession = Depends(get_db)):
+    room = await db.get(models.Room, room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
-    db.delete(room)
-    db.commit()
+    await crud_async.delete_dimension(db, "room", room)
     return None
 
 # Student endpoints
 @app.post("/students/", response_model=schemas.Student)
-def create_student(student: schemas.StudentCreate, db: Session = Depends(get_db)):
-    db_student = crud.get_student_by_name(db, name=student.name)
+async def create_student(student: schemas.StudentCreate, db: AsyncSession = Depends(get_db)):
+    db_student = await crud_async.get_student_by_name(db, name=student.name)
     if db_student:
         raise HTTPException(status_code=400, detail="Student already registered")
-    return crud.create_student(db, student)
+    return await crud_async.create_student(db, student)
 
 @app.get("/students/", response_model=List[schemas.Student])
-def read_students(db: Session = Depends(get_db)):
-    return crud.get_students(db)
+async def read_students(db: AsyncSession = Depends(get_read_db)):
+    return await crud_async.get_students(db)
 
 @app.get("/students/{student_id}", response_model=schemas.Student)
-def read_student(student_id: int, db: Session = Depends(get_db)):
-    student = crud.get_student(db, student_id)
+async def read_student(student_id: int, db: AsyncSession = Depends(get_read_db)):
+    student = await crud_async.get_student(db, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     return student
 
 @app.delete("/students/{student_id}", status_code=204)
-def delete_student(student_id: int, db: Session = Depends(get_db)):
-    student = crud.get_student(db, student_id)
+async def delete_student(student_id: int, db: AsyncSession = Depends(get_db)):
+    student = await db.get(models.Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-    db.delete(student)
-    db.commit()
+    await crud_async.delete_dimension(db, "student", student)
     return None
 
 # Schedule endpoints
 @app.post("/schedules/", response_model=schemas.Schedule)
-def create_schedule(schedule: schemas.ScheduleCreate, db: Session = Depends(get_db)):
-    return crud.create_schedule(db, schedule)
+async def create_schedule(schedule: schemas.ScheduleCreate, db: AsyncSession = Depends(get_db)):
+    return await crud_async.create_schedule(db, schedule)
 
 @app.get("/schedules/", response_model=List[schemas.Schedule])
-def read_schedules(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_schedules(db, skip=skip, limit=limit)
+async def read_schedules(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    teacher_id: Optional[int] = None,
+    room_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    day_of_week: Optional[str] = None,
+    is_regular: Optional[int] = None,
+    change_type: Optional[schemas.ChangeType] = None,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # (요일, 시작 시각, id) 순 정렬. 다음 페이지가 있으면 X-Next-Cursor 헤더로 커서를 내려준다.
+    # fields: 필요한 필드만 (쉼표 구분), compact: 관계 대신 *_id + 조회표
+    selected = parse_fields(fields)
+    try:
+        where = crud.schedule_filters(
+            cursor=cursor, teacher_id=teacher_id, room_id=room_id, student_id=student_id,
+            day_of_week=day_of_week, is_regular=is_regular, change_type=change_type
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = await crud_async.get_schedule_rows(db, selected, compact=compact, where=where, skip=skip, limit=limit + 1)
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = crud.encode_cursor(rows[-1])
+    body = await crud_async.schedules_body(db, rows, selected, compact)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# 시간표 전체 내보내기 (목록과 같은 필터). ics 는 정규 수업을 주간 반복 일정으로, group 별(선생님/공간)로 묶는다.
+# week_start: ics 일정이 시작하는 주 (기본값: 이번 주)
+@app.get("/schedules/export")
+async def export_schedules(
+    format: str = "csv",
+    group: str = "teacher",
+    week_start: Optional[date] = None,
+    teacher_id: Optional[int] = None,
+    room_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    day_of_week: Optional[str] = None,
+    is_regular: Optional[int] = None,
+    change_type: Optional[schemas.ChangeType] = None
+):
+    if format not in export.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be one of csv, ndjson, ics")
+    if group not in ("teacher", "room"):
+        raise HTTPException(status_code=400, detail="group must be teacher or room")
+    body = export.stream(
+        format, group=group, week_start=week_start,
+        teacher_id=teacher_id, room_id=room_id, student_id=student_id,
+        day_of_week=day_of_week, is_regular=is_regular, change_type=change_type
+    )
+    headers = {"Content-Disposition": f'attachment; filename="schedules.{format}"'}
+    return StreamingResponse(body, media_type=export.MEDIA_TYPES[format], headers=headers)
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    try:
+        return serialize.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def parse_ids(value: Optional[str], name: str) -> List[int]:
+    # "1,2,3" -> [1, 2, 3]
+    if not value:
+        return []
+    try:
+        return list(dict.fromkeys(int(v) for v in value.split(",") if v.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be comma separated integers")
+
+# 여러 선생님/공간/학생의 시간표를 종류마다 IN 쿼리 한 번으로 (id 별로 묶어서)
+@app.get("/schedules/by", response_model=schemas.SchedulesByEntity)
+async def read_schedules_by(
+    teacher_ids: Optional[str] = None,
+    room_ids: Optional[str] = None,
+    student_ids: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    requested = {
+        "teacher": parse_ids(teacher_ids, "teacher_ids"),
+        "room": parse_ids(room_ids, "room_ids"),
+        "student": parse_ids(student_ids, "student_ids"),
+    }
+    if not any(requested.values()):
+        raise HTTPException(status_code=400, detail="teacher_ids, room_ids or student_ids is required")
+    result = {}
+    for kind, ids in requested.items():
+        if ids:
+            result[kind + "s"] = await crud_async.get_schedules_grouped(db, kind, ids)
+    return Response(content=serialize.dumps(result), media_type="application/json")
+
+# 증분 동기화: since(마지막으로 받은 rev) 이후 바뀐 시간표와 지워진 id. since 가 없거나 정리된 기록보다 오래됐으면
+# resync=true (GET /schedules/ 로 전체를 다시 받고 응답의 rev 부터). more=true 면 rev 로 이어서 다시 부른다.
+@app.get("/schedules/changes", response_model=schemas.ScheduleChanges)
+async def read_schedule_changes(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(revision_log.CHANGES_LIMIT, ge=1, le=10000),
+    db: AsyncSession = Depends(get_read_db)
+):
+    body = await crud_async.get_schedule_changes(db, since, limit)
+    return Response(content=serialize.dumps(body), media_type="application/json")
+
+# 시간표 변경 알림 (SSE). 선생님/공간/학생 id 로 거를 수 있고(여러 개 가능, 없으면 전체),
+# 다시 연결할 때 Last-Event-ID 헤더나 since 로 놓친 이벤트를 이어 받는다. 놓친 것을 다 줄 수 없으면 "resync" 이벤트.
+@app.get("/schedules/stream")
+async def stream_schedule_changes(
+    teacher_id: Optional[List[int]] = Query(None),
+    room_id: Optional[List[int]] = Query(None),
+    student_id: Optional[List[int]] = Query(None),
+    since: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None)
+):
+    subscriber = changefeed.subscribe(
+        since=last_event_id if last_event_id is not None else since,
+        teacher_ids=teacher_id, room_ids=room_id, student_ids=student_id
+    )
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(changefeed.sse(subscriber), media_type="text/event-stream", headers=headers)
+
+# 같은 알림을 WebSocket 으로 (이벤트마다 JSON 텍스트 메시지)
+@app.websocket("/schedules/ws")
+async def schedule_changes_ws(
+    websocket: WebSocket,
+    teacher_id: Optional[List[int]] = Query(None),
+    room_id: Optional[List[int]] = Query(None),
+    student_id: Optional[List[int]] = Query(None),
+    since: Optional[int] = None
+):
+    await websocket.accept()
+    subscriber = changefeed.subscribe(since=since, teacher_ids=teacher_id, room_ids=room_id, student_ids=student_id)
+    await changefeed.pump_websocket(websocket, subscriber)
 
 @app.patch("/schedules/{schedule_id}", response_model=schemas.Schedule)
-def update_schedule(schedule_id: int, schedule_update: dict, db: Session = Depends(get_db)):
-    updated = crud.update_schedule(db, schedule_id, schedule_update)
+async def update_schedule(schedule_id: int, schedule_update: schemas.ScheduleUpdate, db: AsyncSession = Depends(get_db)):
+    # 보낸 필드만 바꾼다 (null 을 보내면 비운다)
+    try:
+        updated = await crud_async.update_schedule(db, schedule_id, schedule_update.dict(exclude_unset=True))
+    except crud.InvalidScheduleError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Schedule not found")
     return updated
 
 @app.delete("/schedules/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_schedule(schedule_id: int, db: Session = Depends(get_db)):
-    deleted = crud.delete_schedule(db, schedule_id)
+async def delete_schedule(schedule_id: int, db: AsyncSession = Depends(get_db)):
+    deleted = await crud_async.delete_schedule(db, schedule_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Schedule not found")
     return None
 
-@app.put("/schedules/bulk_update_regular/")
-def bulk_update_regular_schedules(
-    filter: schemas.ScheduleBulkUpdateFilter = Body(...),
-    update: schemas.ScheduleUpdate = Body(...),
-    db: Session = Depends(get_db)
-):
-    q = db.query(models.Schedule).filter(
-        models.Schedule.is_regular == 1,
-        models.Schedule.teacher_id == filter.teacher_id,
-        models.Schedule.student_id == filter.student_id,
-        models.Schedule.room_id == filter.room_id,
-        models.Schedule.day_of_week == filter.day_of_week,
-        models.Schedule.start_time == filter.start_time,
-        models.Schedule.end_time == filter.end_time,
-        models.Schedule.type == filter.type,
-    )
-    count = 0
-    for sch in q:
-        for key, value in update.dict(exclude_unset=True).items():
-            if value is not None:
-                setattr(sch, key, value)
-        count += 1
-    db.commit()
-    return {"updated": count}
-
-@app.post("/schedules/bulk_update_regular/")
-def bulk_update_regular_schedules_post(
-    filter: schemas.ScheduleBulkUpdateFilter = Body(...),
-    update: schemas.ScheduleUpdate = Body(...),
-    db: Session = Depends(get_db)
+@app.put("/schedules/bulk_update_regular/", response_model=schemas.ScheduleBulkUpdateResult)
+@app.post("/schedules/bulk_update_regular/", response_model=schemas.ScheduleBulkUpdateResult)
+async def bulk_update_regular_schedules(
+    filter: Optional[schemas.ScheduleBulkUpdateFilter] = Body(None),
+    update: Optional[schemas.ScheduleUpdate] = Body(None),
+    items: List[schemas.ScheduleBulkUpdateItem] = Body([]),
+    db: AsyncSession = Depends(get_db)
 ):
-    q = db.query(models.Schedule).filter(
-        models.Schedule.is_regular == 1,
-        models.Schedule.teacher_id == filter.teacher_id,
-        models.Schedule.student_id == filter.student_id,
-        models.Schedule.room_id == filter.room_id,
-        models.Schedule.day_of_week == filter.day_of_week,
-        models.Schedule.start_time == filter.start_time,
-        models.Schedule.end_time == filter.end_time,
-        models.Schedule.type == filter.type,
-    )
-    count = 0
-    for sch in q:
-        for key, value in update.dict(exclude_unset=True).items():
-            if value is not None:
-                setattr(sch, key, value)
-        count += 1
-    db.commit()
-    return {"updated": count}
+    # 단일 {filter, update} 또는 여러 쌍 {items: [...]} (예: 여러 학생의 정규 수업을 한 번에 이동)
+    items = list(items)
+    if filter is not None and update is not None:
+        items.insert(0, schemas.ScheduleBulkUpdateItem(filter=filter, update=update))
+    if not items:
+        raise HTTPException(status_code=422, detail="filter and update, or items, are required")
+    try:
+        ids = await crud_async.bulk_update_regular(db, items)
+    except crud.InvalidScheduleError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"updated": len(ids), "ids": ids}
+
+@app.post("/schedules/import", response_model=schemas.ScheduleImportResult)
+async def import_schedules(payload: schemas.ScheduleImport, db: AsyncSession = Depends(get_db)):
+    if payload.on_conflict not in ("abort", "skip", "allow"):
+        raise HTTPException(status_code=400, detail="on_conflict must be one of abort, skip, allow")
+    try:
+        rows = list(payload.rows)
+        if payload.text:
+            rows += seed_data.parse_import_rows(payload.text)
+        result = await crud_async.import_schedules(db, rows, dry_run=payload.dry_run, on_conflict=payload.on_conflict)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result.conflicts and not payload.dry_run and payload.on_conflict == "abort":
+        raise HTTPException(status_code=409, detail=result.dict())
+    return result
+
+# 수업 요청(선생님, 학생, 길이, 가능 요일, 선호 공간)을 빈 자리에 자동 배치. commit=true 면 결과를 한 번에 입력
+@app.post("/schedules/auto_place", response_model=schemas.AutoPlaceResult)
+async def auto_place_schedules(payload: schemas.AutoPlaceRequest, db: AsyncSession = Depends(get_db)):
+    try:
+        window_start, window_end = models.time_to_minutes(payload.start_time), models.time_to_minutes(payload.end_time)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_time/end_time must be HH:MM")
+    if window_end <= window_start or payload.step <= 0 or any(l.duration <= 0 for l in payload.lessons):
+        raise HTTPException(status_code=400, detail="invalid time window, step or duration")
+    try:
+        return await crud_async.auto_place(db, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # Admin endpoints
 @app.delete("/admin/schedules/delete_all", status_code=status.HTTP_204_NO_CONTENT)
-def admin_delete_all_schedules(db: Session = Depends(get_db)):
-    db.query(models.Schedule).delete()
-    db.commit()
+async def admin_delete_all_schedules(db: AsyncSession = Depends(get_db)):
+    await db.execute(delete(models.Schedule))
+    version = await crud_async.log_schedule_revisions(db, "delete_all", [None])
+    await db.commit()
+    schedule_index.clear()
+    revisions.bump_all()
+    crud.schedule_version.wrote(version)
+    changefeed.publish("delete_all", all=True)
     return None
 
-# 선생님별 주간 시간표
+# 변경 기록 정리 (SCHEDULE_LOG_RETENTION_DAYS, SCHEDULE_LOG_MAX_ROWS). SCHEDULE_LOG_COMPACT_INTERVAL 마다 자동으로도 한다
+@app.post("/admin/schedule_log/compact")
+async def admin_compact_schedule_log(db: AsyncSession = Depends(get_db)):
+    return await crud_async.compact_schedule_log(db)
+
+@app.post("/admin/interval_index/rebuild")
+async def admin_rebuild_interval_index(db: AsyncSession = Depends(get_db)):
+    return {"indexed": await crud_async.rebuild_interval_index(db)}
+
+async def weekly_body(db: AsyncSession, kind: str, entity_id: int, fields: List[str], compact: bool) -> bytes:
+    # 선생님/공간/학생 주간 시간표 본문 (목록 빠른 경로)
+    column = crud.SCHEDULE_GROUP_COLUMNS[kind]
+    rows = await crud_async.get_schedule_rows(db, fields, compact=compact, where=[column == entity_id])
+    return await crud_async.schedules_body(db, rows, fields, compact)
+
+# 전체 시간표 겹침 점검 (NDJSON 스트림, 마지막 줄은 summary). CLI: python -m app.audit
+@app.get("/admin/conflicts")
+async def admin_conflicts():
+    return StreamingResponse(audit.ndjson_stream(), media_type="application/x-ndjson")
+
+# 지점 전체 점검: 지점마다 겹침 수와 공간 점유율([start_time, end_time), day)을 동시에 계산한다.
+# branch 를 주지 않으면 TENANTS 또는 TENANT_DATABASE_URL 틀에 맞는 SQLite 파일의 지점 전체
+@app.get("/admin/branches/report")
+async def admin_branches_report(
+    branch: Optional[List[str]] = Query(None),
+    start_time: str = "09:00",
+    end_time: str = "22:00",
+    day: Optional[List[str]] = Query(None)
+):
+    if not tenancy.registry.enabled:
+        raise HTTPException(status_code=400, detail="branch routing is not configured (TENANT_DATABASE_URL)")
+    try:
+        start_min, end_min = models.time_to_minutes(start_time), models.time_to_minutes(end_time)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_time/end_time must be HH:MM")
+    if end_min <= start_min:
+        raise HTTPException(status_code=400, detail="end_time must be after start_time")
+    days = day or models.DAYS_OF_WEEK
+
+    async def summarize(db: database.Database) -> dict:
+        async with db.read_sessionmaker()() as session:
+            return await audit.summarize(session, days=days, start_min=start_min, end_min=end_min)
+
+    started = time.perf_counter()
+    results = await tenancy.for_each(branch or tenancy.registry.known(), summarize)
+    return {
+        "branches": results,
+        "conflicts": sum(r.get("conflicts", 0) for r in results),
+        "errors": sum("error" in r for r in results),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "pool": tenancy.registry.stats(),
+    }
+
+# 새 지점 만들기 (DB 와 스키마). 요청으로는 이미 있는 지점만 열리므로 지점은 여기나 alembic 으로 만든다
+@app.post("/admin/branches/{name}", status_code=status.HTTP_201_CREATED)
+async def admin_create_branch(name: str):
+    if not tenancy.registry.enabled:
+        raise HTTPException(status_code=400, detail="branch routing is not configured (TENANT_DATABASE_URL)")
+    try:
+        await tenancy.registry.acquire(name, create=True)
+    except tenancy.UnknownTenant:
+        raise HTTPException(status_code=404, detail=f"Unknown branch: {name}")
+    await tenancy.registry.release(name)
+    return {"branch": name}
+
+@app.get("/metrics")
+async def read_metrics():
+    cache = timetable_cache.stats()
+    extra = {f"academy_timetable_cache_{k}": cache[k] for k in ("size", "hits", "misses", "evictions")}
+    extra["academy_interval_index_entries"] = len(schedule_index)
+    branches = tenancy.registry.stats()
+    extra.update({f"academy_branches_{k}": branches[k] for k in ("open", "in_use", "opened", "evicted")})
+    dims = dimensions.stats()
+    extra.update({f"academy_dimension_cache_{k}": dims[k] for k in ("hits", "misses", "hit_ratio", "loads")})
+    feed = changefeed.stats()
+    extra.update({f"academy_changefeed_{k}": feed[k] for k in ("subscribers", "lagging", "published", "dropped")})
+    return Response(content=metrics.registry.render(extra), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/admin/cache/stats")
+async def admin_cache_stats():
+    return {**timetable_cache.stats(), "calendar": occurrences.week_cache.stats(), "dimensions": dimensions.stats(),
+            "schedule_version": crud.schedule_version.stats()}
+
+# 선생님별 주간 시간표 (fields, compact 는 GET /schedules/ 와 같음)
 @app.get("/teachers/{teacher_id}/schedules", response_model=List[schemas.Schedule])
-def get_teacher_weekly_schedule(teacher_id: int, db: Session = Depends(get_db)):
-    teacher = crud.get_teacher(db, teacher_id)
-    if not teacher:
-        raise HTTPException(status_code=404, detail="Teacher not found")
-    return crud.get_schedules_by_teacher_week(db, teacher_id)
+async def get_teacher_weekly_schedule(teacher_id: int, request: Request, fields: Optional[str] = None,
+                                      compact: bool = False, db: AsyncSession = Depends(get_read_db)):
+    selected = parse_fields(fields)
+    entity = ("teacher", teacher_id)
+    key = entity + (tuple(selected), compact)
+    await crud_async.check_schedule_version(db)
+    entry = timetable_cache.get(key)
+    if entry is None:
+        revision = revisions.get(*entity)
+        teacher = await crud_async.get_teacher(db, teacher_id)
+        if not teacher:
+            raise HTTPException(status_code=404, detail="Teacher not found")
+        entry = timetable_cache.put(key, entity, revision, await weekly_body(db, "teacher", teacher_id, selected, compact))
+    return etag_response(request, entry)
 
 # 공간별 주간 시간표
 @app.get("/rooms/{room_id}/schedules", response_model=List[schemas.Schedule])
-def get_room_weekly_schedule(room_id: int, db: Session = Depends(get_db)):
-    room = crud.get_room(db, room_id)
-    if not room:
-        raise HTTPException(status_code=404, detail="Room not found")
-    return crud.get_schedules_by_room_week(db, room_id)
+async def get_room_weekly_schedule(room_id: int, request: Request, fields: Optional[str] = None,
+                                   compact: bool = False, db: AsyncSession = Depends(get_read_db)):
+    selected = parse_fields(fields)
+    entity = ("room", room_id)
+    key = entity + (tuple(selected), compact)
+    await crud_async.check_schedule_version(db)
+    entry = timetable_cache.get(key)
+    if entry is None:
+        revision = revisions.get(*entity)
+        room = await crud_async.get_room(db, room_id)
+        if not room:
+            raise HTTPException(status_code=404, detail="Room not found")
+        entry = timetable_cache.put(key, entity, revision, await weekly_body(db, "room", room_id, selected, compact))
+    return etag_response(request, entry)
+
+# 학생별 주간 시간표
+@app.get("/students/{student_id}/schedules", response_model=List[schemas.Schedule])
+async def get_student_weekly_schedule(student_id: int, request: Request, fields: Optional[str] = None,
+                                      compact: bool = False, db: AsyncSession = Depends(get_read_db)):
+    selected = parse_fields(fields)
+    entity = ("student", student_id)
+    key = entity + (tuple(selected), compact)
+    await crud_async.check_schedule_version(db)
+    entry = timetable_cache.get(key)
+    if entry is None:
+        revision = revisions.get(*entity)
+        student = await crud_async.get_student(db, student_id)
+        if not student:
+            raise HTTPException(status_code=404, detail="Student not found")
+        entry = timetable_cache.put(key, entity, revision, await weekly_body(db, "student", student_id, selected, compact))
+    return etag_response(request, entry)
 
 # 공간 이름으로 주간 시간표 조회
 @app.get("/rooms/by_name/{room_name}/schedules", response_model=List[schemas.Schedule])
-def get_room_weekly_schedule_by_name(room_name: str, db: Session = Depends(get_db)):
-    room = crud.get_room_by_name(db, name=room_name)
-    if not room:
-        raise HTTPException(status_code=404, detail="Room not found")
-    return crud.get_schedules_by_room_week(db, room.id)
+async def get_room_weekly_schedule_by_name(room_name: str, request: Request, fields: Optional[str] = None,
+                                           compact: bool = False, db: AsyncSession = Depends(get_read_db)):
+    selected = parse_fields(fields)
+    key = ("room_name", room_name, tuple(selected), compact)
+    await crud_async.check_schedule_version(db)
+    entry = timetable_cache.get(key)
+    if entry is None:
+        room = await crud_async.get_room_by_name(db, name=room_name)
+        if not room:
+            raise HTTPException(status_code=404, detail="Room not found")
+        revision = revisions.get("room", room.id)
+        entry = timetable_cache.put(key, ("room", room.id), revision, await weekly_body(db, "room", room.id, selected, compact))
+    return etag_response(request, entry)
+
+# 날짜별 수업: 정규 수업을 [from, to] 날짜로 펼치고 날짜가 있는 특별일정(변경/보강)을 반영
+@app.get("/calendar")
+async def get_calendar(
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    teacher_id: Optional[int] = None,
+    room_id: Optional[int] = None
+):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="to must not be before from")
+    if (date_to - date_from).days >= occurrences.CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"date range must be at most {occurrences.CALENDAR_MAX_DAYS} days")
+    body = occurrences.stream_json(date_from, date_to, teacher_id=teacher_id, room_id=room_id)
+    return StreamingResponse(body, media_type="application/json")
+
+# 전체 공간 점유 격자 (공간 × 요일 × 시간 칸, 칸마다 schedule id 목록)
+@app.get("/timetable/grid")
+async def get_timetable_grid(
+    slot: int = Query(30, ge=5, le=240),
+    start_time: str = "09:00",
+    end_time: str = "22:00",
+    day: Optional[List[str]] = Query(None),
+    subject: Optional[str] = None,
+    teacher_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        start_min, end_min = models.time_to_minutes(start_time), models.time_to_minutes(end_time)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_time/end_time must be HH:MM")
+    if end_min <= start_min:
+        raise HTTPException(status_code=400, detail="end_time must be after start_time")
+    return await crud_async.get_week_grid(
+        db, days=day or models.DAYS_OF_WEEK, start_min=start_min, end_min=end_min,
+        slot_minutes=slot, subject=subject, teacher_id=teacher_id
+    )
+
+# 공간/선생님/학생이 모두 비어 있는 시간 (보강 수업 배정용)
+@app.get("/availability", response_model=List[schemas.AvailableSlot])
+async def get_availability(
+    duration: int = Query(..., ge=5, le=720),
+    day: Optional[List[str]] = Query(None),
+    teacher_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    room_id: Optional[List[int]] = Query(None),
+    start_time: str = "09:00",
+    end_time: str = "22:00",
+    step: int = Query(30, ge=5, le=240),
+    db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        window_start, window_end = models.time_to_minutes(start_time), models.time_to_minutes(end_time)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_time/end_time must be HH:MM")
+    return await crud_async.find_free_slots(
+        db, days=day or models.DAYS_OF_WEEK, duration=duration, step=step,
+        window_start=window_start, window_end=window_end,
+        teacher_id=teacher_id, student_id=student_id, room_ids=room_id
+    )
@@ -0,0 +1,231 @@
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 요청별 계측 (ASGI 미들웨어 + SQLAlchemy 커서 이벤트).
+# 경로(route 템플릿)마다 지연시간 히스토그램, SQL 문 수, SQL 시간을 모으고 /metrics 에서 Prometheus 텍스트로 낸다.
+# 느린 요청(SLOW_REQUEST_MS)과 N+1(한 요청에서 같은 SQL 이 N_PLUS_ONE_THRESHOLD 번 이상)은 로그와 카운터로 남긴다.
+# PROFILE_SLOW_REQUESTS=1 이면 요청을 처리하는 스레드의 스택을 PROFILE_INTERVAL_MS 간격으로 샘플링해 두었다가
+# 느린 요청이면 PROFILE_DIR 에 접힌 스택(flamegraph 입력 형식)으로 쓴다. 비동기 요청은 이벤트 루프 스레드를
+# 공유하므로 동시에 처리 중인 다른 요청의 스택이 섞일 수 있다.
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+PROFILE_SLOW_REQUESTS = os.getenv("PROFILE_SLOW_REQUESTS", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("app.metrics")
+
+class RequestStats:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements: Counter = Counter()
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+class RouteMetrics:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.statuses: Counter = Counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.slow = 0
+        self.n_plus_one = 0
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats, slow: bool, n_plus_one: bool):
+        with self._lock:
+            m = self.routes.get((method, route))
+            if m is None:
+                m = self.routes[(method, route)] = RouteMetrics()
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    m.buckets[i] += 1
+            m.count += 1
+            m.seconds += seconds
+            m.statuses[status] += 1
+            m.sql_count += stats.sql_count
+            m.sql_seconds += stats.sql_seconds
+            m.slow += slow
+            m.n_plus_one += n_plus_one
+
+    def clear(self):
+        with self._lock:
+            self.routes.clear()
+
+    def render(self, extra: Optional[Dict[str, float]] = None) -> str:
+        # Prometheus 텍스트 형식 (0.0.4)
+        def label(method, route, **more):
+            pairs = [("method", method), ("route", route)] + list(more.items())
+            return "{" + ",".join(f'{k}="{escape(str(v))}"' for k, v in pairs) + "}"
+
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                "# HELP academy_http_requests_total HTTP requests by route and status.",
+                "# TYPE academy_http_requests_total counter",
+            ]
+            for (method, route), m in routes:
+                for status, n in sorted(m.statuses.items()):
+                    lines.append(f"academy_http_requests_total{label(method, route, status=status)} {n}")
+            lines += [
+                "# HELP academy_http_request_duration_seconds Request latency by route.",
+                "# TYPE academy_http_request_duration_seconds histogram",
+            ]
+            for (method, route), m in routes:
+                for bound, n in zip(BUCKETS, m.buckets):
+                    lines.append(f"academy_http_request_duration_seconds_bucket{label(method, route, le=bound)} {n}")
+                lines.append(f"academy_http_request_duration_seconds_bucket{label(method, route, le='+Inf')} {m.count}")
+                lines.append(f"academy_http_request_duration_seconds_sum{label(method, route)} {m.seconds}")
+                lines.append(f"academy_http_request_duration_seconds_count{label(method, route)} {m.count}")
+            for name, help_text, attr in (
+                ("academy_sql_statements_total", "SQL statements executed while serving the route.", "sql_count"),
+                ("academy_sql_duration_seconds_total", "Time spent in SQL while serving the route.", "sql_seconds"),
+                ("academy_slow_requests_total", f"Requests slower than {SLOW_REQUEST_MS:g} ms.", "slow"),
+                ("academy_n_plus_one_requests_total",
+                 f"Requests that ran one SQL statement {N_PLUS_ONE_THRESHOLD} or more times.", "n_plus_one"),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (method, route), m in routes:
+                    lines.append(f"{name}{label(method, route)} {getattr(m, attr)}")
+        for name, value in (extra or {}).items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+registry = Registry()
+
+def instrument(engine: Engine):
+    # 커서 실행 시간/횟수를 지금 처리 중인 요청(current_request)에 더한다. 요청 밖의 실행은 세지 않는다.
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        stats = current_request.get()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_seconds += time.perf_counter() - started
+            stats.statements[statement] += 1
+
+class Sampler:
+    # 진행 중인 요청을 처리하는 스레드의 스택을 주기적으로 모은다 (PROFILE_SLOW_REQUESTS=1 일 때만 시작)
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active: Dict[int, Tuple[int, Counter]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, token: int, thread_id: int):
+        with self._lock:
+            self._active[token] = (thread_id, Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+                self._thread.start()
+
+    def stop(self, token: int) -> Counter:
+        with self._lock:
+            return self._active.pop(token)[1]
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.values())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in active:
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == me:
+                    continue
+                stack = ";".join(f"{f.name} ({os.path.basename(f.filename)}:{f.lineno})"
+                                 for f in traceback.extract_stack(frame))
+                stacks[stack] += 1
+
+sampler = Sampler(PROFILE_INTERVAL_MS / 1000)
+_dump_numbers = itertools.count(1)
+
+def dump_profile(method: str, route: str, seconds: float, stacks: Counter) -> Optional[str]:
+    if not stacks:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_dump_numbers)}-{method}-{route.strip('/').replace('/', '_') or 'root'}-{int(seconds * 1000)}ms.folded"
+    path = os.path.join(PROFILE_DIR, name.replace("{", "").replace("}", ""))
+    with open(path, "w") as f:
+        for stack, n in stacks.most_common():
+            f.write(f"{stack} {n}\n")
+    return path
+
+class MetricsMiddleware:
+    # 응답 본문(스트리밍 포함)을 다 보낼 때까지를 요청 시간으로 잰다
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        event_stream = False
+
+        async def send_wrapper(message):
+            nonlocal status, event_stream
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                event_stream = any(k == b"content-type" and v.startswith(b"text/event-stream")
+                                   for k, v in message.get("headers", ()))
+            await send(message)
+
+        profile_token = id(stats)
+        if PROFILE_SLOW_REQUESTS:
+            sampler.start(profile_token, threading.get_ident())
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - started
+            current_request.reset(token)
+            stacks = sampler.stop(profile_token) if PROFILE_SLOW_REQUESTS else None
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.record(scope["method"], route, status, seconds, stats, stacks, event_stream)
+
+    def record(self, method: str, route: str, status: int, seconds: float, stats: RequestStats, stacks: Optional[Counter],
+               event_stream: bool = False):
+        # SSE 는 연결이 열려 있는 동안이 요청 시간이므로 느린 요청으로 보지 않는다
+        slow = not event_stream and seconds * 1000 >= SLOW_REQUEST_MS
+        repeated = [(n, sql) for sql, n in stats.statements.items() if n >= N_PLUS_ONE_THRESHOLD]
+        registry.observe(method, route, status, seconds, stats, slow, bool(repeated))
+        if repeated:
+            n, sql = max(repeated)
+            logger.warning("possible N+1 on %s %s: %d executions of %s", method, route, n, " ".join(sql.split())[:200])
+        if slow:
+            path = dump_profile(method, route, seconds, stacks) if stacks else None
+            logger.warning("slow request %s %s: %.1f ms, %d SQL statements (%.1f ms)%s", method, route,
+                           seconds * 1000, stats.sql_count, stats.sql_seconds * 1000,
+                           f", profile: {path}" if path else "")
@@ -1,9 +1,27 @@
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Time
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import Column, Date, DateTime, Integer, String, Enum, ForeignKey, Time, Index, func
+from sqlalchemy.orm import relationship, declarative_base, validates
+import datetime
 import enum
 
 Base = declarative_base()
 
+DAYS_OF_WEEK = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
+
+def day_to_index(day_of_week: str) -> int:
+    # "월요일" -> 0 ... "일요일" -> 6, 알 수 없는 요일은 맨 뒤(7)로 정렬
+    try:
+        return DAYS_OF_WEEK.index(day_of_week)
+    except ValueError:
+        return len(DAYS_OF_WEEK)
+
+def time_to_minutes(value: str) -> int:
+    # "9:00", "13:00" -> 하루 중 분 단위 정수
+    hour, minute = value.strip().split(":")
+    return int(hour) * 60 + int(minute)
+
+def minutes_to_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
 class ScheduleType(str, enum.Enum):
     CLASS = "수업"
     COUNSEL = "상담"
@@ -44,7 +62,66 @@ class Schedule(Base):
     type = Column(Enum(ScheduleType), nullable=False)
     is_regular = Column(Integer, default=1)  # 1: 기본시간표, 0: 특별일정
     change_type = Column(Enum(ChangeType), nullable=True)  # 변경/보강/일반
+    # 정렬/범위 검색용 정수 컬럼. day_of_week/start_time/end_time 이 바뀔 때 함께 채워진다.
+    day_index = Column(Integer, nullable=True)  # 0: 월요일 ... 6: 일요일, 7: 기타
+    start_min = Column(Integer, nullable=True)  # 하루 중 분 (13:00 -> 780)
+    end_min = Column(Integer, nullable=True)
+    # 적용 날짜 (선택). 정규 수업은 [effective_from, effective_to] 기간에만 매주 반복되고(비어 있으면 제한 없음),
+    # 특별일정(is_regular=0)은 effective_from 날짜 하루에만 열린다. 날짜가 없는 특별일정은 달력에 나오지 않는다.
+    effective_from = Column(Date, nullable=True)
+    effective_to = Column(Date, nullable=True)
 
     teacher = relationship("Teacher", back_populates="schedules")
     room = relationship("Room", back_populates="schedules")
     student = relationship("Student", back_populates="schedules")
+
+    __table_args__ = (
+        # 겹침 검사/주간 시간표: (공간|선생님, 요일) 로 찾고 시간 범위 조건까지 인덱스만으로 처리
+        Index("ix_schedules_room_day", "room_id", "day_of_week", "start_min", "end_min"),
+        Index("ix_schedules_teacher_day", "teacher_id", "day_of_week", "start_min", "end_min"),
+        Index("ix_schedules_student", "student_id", "day_index", "start_min"),
+        # GET /schedules/ 커서 페이지네이션 정렬 순서
+        Index("ix_schedules_order", "day_index", "start_min", "id"),
+        # bulk_update_regular 의 정규 수업 묶음 조건
+        Index("ix_schedules_regular_series", "teacher_id", "student_id", "room_id", "day_of_week",
+              "start_min", "end_min", "type", "is_regular"),
+        # 달력: 특정 주의 특별일정
+        Index("ix_schedules_effective", "is_regular", "effective_from"),
+    )
+
+    @validates("day_of_week")
+    def _set_day_index(self, key, value):
+        self.day_index = day_to_index(value)
+        return value
+
+    @validates("start_time", "end_time")
+    def _set_minutes(self, key, value):
+        if key == "start_time":
+            self.start_min = time_to_minutes(value)
+        else:
+            self.end_min = time_to_minutes(value)
+        return value
+
+    @validates("effective_from", "effective_to")
+    def _parse_date(self, key, value):
+        # PATCH 로 들어온 "2026-11-03" 문자열도 받는다
+        if isinstance(value, str):
+            return datetime.date.fromisoformat(value)
+        return value
+
+class ScheduleRevision(Base):
+    # 시간표 변경 기록 (추가만 한다, GET /schedules/changes). 시간표 쓰기와 같은 트랜잭션에서 남긴다.
+    # AUTOINCREMENT 라 정리(app.revision_log.compact)로 지운 rev 를 다시 쓰지 않는다.
+    __tablename__ = "schedule_revisions"
+    rev = Column(Integer, primary_key=True, autoincrement=True)
+    schedule_id = Column(Integer, nullable=True, index=True)  # delete_all 은 NULL
+    op = Column(String, nullable=False)  # insert | update | delete | delete_all
+    created_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    __table_args__ = {"sqlite_autoincrement": True}
+
+class CacheVersion(Base):
+    # 프로세스 캐시의 버전 표시 (워커 여러 개일 때). 데이터를 바꾸는 트랜잭션에서 version 을 올리면
+    # 다른 워커가 다음 확인 때 다시 읽는다 (app.dimension_cache).
+    __tablename__ = "cache_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, Hashable, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud_async, database, export, models
+from .timetable_cache import Entity, Revisions, revisions
+from .database import PerDatabase
+
+# 날짜별 수업 (달력).
+# 정규 수업을 한 주씩 날짜로 펼치고, 그 주의 날짜가 있는 특별일정을 더한다. 특별일정 "변경" 하나는 같은 주의
+# 같은 선생님·학생 정규 수업 하나를 대신한다 (같은 날짜, 그다음 가까운 날짜, 가까운 시작 시각 순으로 고른다).
+# 한 주씩 그 주에 걸리는 시간표를 읽어 펼치고 바로 내보내므로, 긴 기간을 조회해도 메모리에는 한 주 분량만 있다.
+# 펼친 주는 WeekCache 에 두되 주 수가 아니라 전체 수업(occurrence) 수 CALENDAR_CACHE_OCCURRENCES 로 제한한다.
+# 한 번에 조회할 수 있는 기간은 CALENDAR_MAX_DAYS 일까지.
+
+CALENDAR_CACHE_OCCURRENCES = int(os.getenv("CALENDAR_CACHE_OCCURRENCES", "100000"))
+CALENDAR_MAX_DAYS = int(os.getenv("CALENDAR_MAX_DAYS", "366"))
+
+def monday_of(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+def last_day_of_week(monday: date) -> date:
+    # 9999-12-31 이 든 주는 일요일까지 가지 않는다
+    return monday + timedelta(days=6) if monday <= date.max - timedelta(days=6) else date.max
+
+def week_query(monday: date, *, teacher_id: Optional[int] = None, room_id: Optional[int] = None):
+    # 그 주에 걸리는 정규 수업 + 그 주 날짜의 특별일정.
+    # 공간 필터가 있어도 다른 공간으로 옮긴 "변경" 은 읽는다.
+    sunday = last_day_of_week(monday)
+    s = models.Schedule
+    regular = and_(
+        or_(s.is_regular.is_(None), s.is_regular != 0),
+        s.day_index < len(models.DAYS_OF_WEEK),
+        or_(s.effective_from.is_(None), s.effective_from <= sunday),
+        or_(s.effective_to.is_(None), s.effective_to >= monday),
+    )
+    special = and_(s.is_regular == 0, s.effective_from.between(monday, sunday))
+    if room_id is not None:
+        regular = and_(regular, s.room_id == room_id)
+        special = and_(special, or_(s.room_id == room_id, s.change_type == models.ChangeType.CHANGED))
+    return export.export_query(teacher_id=teacher_id).where(or_(regular, special))
+
+def occurrence(row, day: date) -> dict:
+    item = dict(zip(export.FIELDS, export.record(row)))
+    item["schedule_id"] = item.pop("id")
+    item["date"] = day.isoformat()
+    item["day_of_week"] = models.DAYS_OF_WEEK[day.weekday()]
+    return item
+
+def expand_week(rows, monday: date, *, room_id: Optional[int] = None) -> List[dict]:
+    # rows: 그 주의 week_query 행 (export.FIELDS + day_index). 날짜·시작 시각 순 목록
+    regular, special = [], []
+    for row in rows:
+        (special if row.is_regular == 0 else regular).append(row)
+
+    days = (last_day_of_week(monday) - monday).days + 1
+    lessons: Dict[Tuple[Optional[int], Optional[int]], List[Tuple[date, int, object]]] = {}
+    for row in regular:
+        if row.day_index >= days:
+            continue
+        day = monday + timedelta(days=row.day_index)
+        if (row.effective_from is not None and day < row.effective_from) or \
+                (row.effective_to is not None and day > row.effective_to):
+            continue
+        lessons.setdefault((row.teacher_id, row.student_id), []).append((day, models.time_to_minutes(row.start_time), row))
+
+    replaced = set()
+    for row in special:
+        if row.change_type != models.ChangeType.CHANGED:
+            continue
+        start = models.time_to_minutes(row.start_time)
+        candidates = [l for l in lessons.get((row.teacher_id, row.student_id), ()) if l[2].id not in replaced]
+        if candidates:
+            day, _, lesson = min(candidates, key=lambda l: (
+                l[0] != row.effective_from, abs((l[0] - row.effective_from).days), abs(l[1] - start), l[2].id))
+            replaced.add(lesson.id)
+
+    found: List[Tuple[date, int, int, dict]] = []
+    for pair in lessons.values():
+        for day, start, row in pair:
+            if row.id not in replaced:
+                found.append((day, start, row.id, occurrence(row, day)))
+    for row in special:
+        if room_id is not None and row.room_id != room_id:
+            continue
+        found.append((row.effective_from, models.time_to_minutes(row.start_time), row.id, occurrence(row, row.effective_from)))
+    found.sort(key=lambda f: f[:3])
+    return [item for *_, item in found]
+
+class WeekCache:
+    # 펼친 주 LRU. 키: (월요일, teacher_id, room_id). 선생님 필터면 그 선생님 revision,
+    # 아니면(공간 필터의 "변경" 대체가 다른 공간 쓰기에 달려 있으므로) 전체 revision 으로 검사한다.
+    # 담은 주들의 수업 수 합이 max_occurrences 를 넘으면 오래된 주부터 뺀다 (그보다 큰 주는 담지 않는다)
+    def __init__(self, revisions: Revisions, max_occurrences: int = CALENDAR_CACHE_OCCURRENCES):
+        self.revisions = revisions
+        self.max_occurrences = max_occurrences
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Entity, Tuple[int, int], List[dict]]]" = OrderedDict()
+        self._occurrences = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] != self.revisions.get(*entry[0]):
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, entity: Entity, revision: Tuple[int, int], items: List[dict]):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if len(items) > self.max_occurrences:
+                return
+            self._entries[key] = (entity, revision, items)
+            self._occurrences += len(items)
+            while self._occurrences > self.max_occurrences:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: Hashable):
+        self._occurrences -= len(self._entries.pop(key)[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._occurrences = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "occurrences": self._occurrences,
+            "max_occurrences": self.max_occurrences,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+week_cache = PerDatabase(lambda: WeekCache(revisions))  # DB(지점)마다 하나
+
+async def expanded_week(db: AsyncSession, monday: date, *, teacher_id: Optional[int] = None,
+                        room_id: Optional[int] = None) -> List[dict]:
+    # 한 주를 펼친 목록. 캐시에 없으면 그 주에 걸리는 시간표만 읽는다
+    key = (monday, teacher_id, room_id)
+    items = week_cache.get(key)
+    if items is not None:
+        return items
+    entity = ("teacher", teacher_id) if teacher_id is not None else ("all", 0)
+    revision = revisions.get(*entity)
+    rows = (await db.execute(week_query(monday, teacher_id=teacher_id, room_id=room_id))).all()
+    items = expand_week(rows, monday, room_id=room_id)
+    week_cache.put(key, entity, revision, items)
+    return items
+
+def mondays_between(start: date, end: date) -> List[date]:
+    first = monday_of(start)
+    return [first + timedelta(days=7 * i) for i in range((monday_of(end) - first).days // 7 + 1)]
+
+async def occurrences(db: AsyncSession, start: date, end: date, *, teacher_id: Optional[int] = None,
+                      room_id: Optional[int] = None) -> AsyncIterator[dict]:
+    # [start, end] 날짜의 수업을 날짜·시작 시각 순으로 (범위는 호출한 쪽에서 CALENDAR_MAX_DAYS 로 제한)
+    # 한 주를 읽고 펼쳐 다 내보낸 뒤에 다음 주를 읽는다
+    first, last = start.isoformat(), end.isoformat()
+    for monday in mondays_between(start, end):
+        for item in await expanded_week(db, monday, teacher_id=teacher_id, room_id=room_id):
+            if first <= item["date"] <= last:
+                yield item
+
+async def stream_json(start: date, end: date, **filters) -> AsyncIterator[bytes]:
+    # JSON 배열을 EXPORT_CHUNK 개씩 나눠 보낸다. StreamingResponse 가 끝날 때까지 쓰는 자체 세션을 연다.
+    yield b"["
+    sep = ""
+    async with database.ReadSessionLocal() as db:
+        await crud_async.check_schedule_version(db)
+        chunk: List[str] = []
+        async for item in occurrences(db, start, end, **filters):
+            chunk.append(json.dumps(item, ensure_ascii=False))
+            if len(chunk) >= export.EXPORT_CHUNK:
+                yield (sep + ",".join(chunk)).encode()
+                sep, chunk = ",", []
+        if chunk:
+            yield (sep + ",".join(chunk)).encode()
+    yield b"]"
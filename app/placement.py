@@ -0,0 +1,196 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import or_, select
+from . import crud, models
+
+# 수업 자동 배치.
+# 요일마다 공간/선생님/학생의 점유를 분 단위 비트맵(int 하나)으로 두고, 들어갈 수 있는 자리가
+# 가장 적은 수업부터 첫 번째 빈 자리에 넣는다. 빈 자리가 없으면 그 자리를 막고 있는
+# (이번에 배치한) 수업 하나를 다른 자리로 옮겨 보는 되돌리기를 max_backtracks 번까지 시도한다.
+# 계산은 API 이벤트 루프를 막지 않도록 별도 프로세스에서 돈다.
+
+# 배치 계산용 프로세스 수. 0 이면 프로세스 대신 스레드에서 계산한다.
+PLACEMENT_WORKERS = int(os.getenv("PLACEMENT_WORKERS", "1"))
+
+class Lesson(NamedTuple):
+    teacher_id: int
+    student_id: Optional[int]
+    duration: int
+    days: Tuple[str, ...]
+    room_ids: Tuple[int, ...]
+    exempt: bool  # 단체수업 예외: 배치해도 공간/선생님 점유를 남기지 않는다 (is_overlap 과 같음)
+
+class Slot(NamedTuple):
+    day: str
+    start: int
+    room_id: int
+
+def span(start: int, end: int) -> int:
+    # [start, end) 분 구간 비트마스크
+    return ((1 << (end - start)) - 1) << start
+
+class Occupancy:
+    def __init__(self):
+        self.busy: Dict[tuple, int] = {}  # ("room" | "teacher" | "student", id, 요일) -> 비트맵
+
+    def add(self, keys: Iterable[tuple], mask: int):
+        for key in keys:
+            self.busy[key] = self.busy.get(key, 0) | mask
+
+    def remove(self, keys: Iterable[tuple], mask: int):
+        # 빈 자리에만 넣으므로 자기 비트만 지워진다
+        for key in keys:
+            self.busy[key] &= ~mask
+
+def occupancy_query(days: List[str], *, room_ids: Iterable[int], teacher_ids: Iterable[int], student_ids: Iterable[int]):
+    return (
+        select(
+            models.Schedule.day_of_week,
+            models.Schedule.start_min,
+            models.Schedule.end_min,
+            models.Schedule.room_id,
+            models.Schedule.teacher_id,
+            models.Schedule.student_id,
+            crud.group_class_exempt().label("exempt"),
+        )
+        .where(
+            models.Schedule.day_of_week.in_(days),
+            or_(
+                models.Schedule.room_id.in_(list(room_ids)),
+                models.Schedule.teacher_id.in_(list(teacher_ids)),
+                models.Schedule.student_id.in_(list(student_ids)),
+            ),
+        )
+    )
+
+def lesson_keys(lesson: Lesson, slot: Slot) -> Tuple[List[tuple], List[tuple]]:
+    # (확인할 점유, 남길 점유)
+    check = [("room", slot.room_id, slot.day), ("teacher", lesson.teacher_id, slot.day)]
+    student = [("student", lesson.student_id, slot.day)] if lesson.student_id is not None else []
+    return check + student, student if lesson.exempt else check + student
+
+def candidates(lesson: Lesson, *, window_start: int, window_end: int, step: int) -> List[Slot]:
+    # 요일 순, 시작 시각 순, 선호 공간 순
+    return [
+        Slot(day, start, room_id)
+        for day in lesson.days
+        for start in range(window_start, window_end - lesson.duration + 1, step)
+        for room_id in lesson.room_ids
+    ]
+
+def solve(lessons: List[Lesson], existing, *, window_start: int, window_end: int, step: int,
+          max_backtracks: int) -> Tuple[Dict[int, Slot], List[Tuple[int, str]]]:
+    # existing: occupancy_query 행. ({lesson 번호: 자리}, [(lesson 번호, 사유)])
+    occ = Occupancy()
+    for day, start, end, room_id, teacher_id, student_id, exempt in existing:
+        keys = [] if exempt else [("room", room_id, day), ("teacher", teacher_id, day)]
+        if student_id is not None:
+            keys.append(("student", student_id, day))
+        occ.add(keys, span(start, end))
+
+    domains = [candidates(l, window_start=window_start, window_end=window_end, step=step) for l in lessons]
+    placed: Dict[int, Slot] = {}
+    by_day: Dict[str, set] = {}
+
+    busy = occ.busy
+
+    def fits(i: int, slot: Slot) -> bool:
+        # 가장 많이 불리므로 lesson_keys 를 거치지 않고 직접 비교
+        lesson = lessons[i]
+        day = slot.day
+        mask = span(slot.start, slot.start + lesson.duration)
+        return not (busy.get(("room", slot.room_id, day), 0) & mask
+                    or busy.get(("teacher", lesson.teacher_id, day), 0) & mask
+                    or busy.get(("student", lesson.student_id, day), 0) & mask)
+
+    def place(i: int, slot: Slot):
+        occ.add(lesson_keys(lessons[i], slot)[1], span(slot.start, slot.start + lessons[i].duration))
+        placed[i] = slot
+        by_day.setdefault(slot.day, set()).add(i)
+
+    def unplace(i: int) -> Slot:
+        slot = placed.pop(i)
+        occ.remove(lesson_keys(lessons[i], slot)[1], span(slot.start, slot.start + lessons[i].duration))
+        by_day[slot.day].discard(i)
+        return slot
+
+    def first_fit(i: int, skip: Optional[Slot] = None) -> Optional[Slot]:
+        return next((slot for slot in domains[i] if slot != skip and fits(i, slot)), None)
+
+    def blockers(i: int, slot: Slot) -> List[int]:
+        # slot 에서 i 와 겹치는, 이번에 배치한 수업들
+        check = set(lesson_keys(lessons[i], slot)[0])
+        end = slot.start + lessons[i].duration
+        found = []
+        for j in by_day.get(slot.day, ()):
+            other = placed[j]
+            if other.start < end and other.start + lessons[j].duration > slot.start \
+                    and check.intersection(lesson_keys(lessons[j], other)[1]):
+                found.append(j)
+        return found
+
+    budget = max_backtracks
+
+    def repair(i: int) -> Optional[Slot]:
+        # 막고 있는 수업이 하나뿐인 자리에서 그 수업을 빼고 i 를 넣은 뒤, 뺀 수업을 다른 자리에 다시 넣어 본다
+        nonlocal budget
+        for slot in domains[i]:
+            if budget <= 0:
+                return None
+            blocking = blockers(i, slot)
+            if len(blocking) != 1:
+                continue
+            budget -= 1
+            j = blocking[0]
+            old = unplace(j)
+            if fits(i, slot):
+                place(i, slot)
+                moved = first_fit(j, skip=old)
+                if moved is not None:
+                    place(j, moved)
+                    return slot
+                unplace(i)
+            place(j, old)
+        return None
+
+    # 가장 제약이 큰(지금 들어갈 수 있는 자리가 적은) 수업부터, 같으면 긴 수업부터
+    order = sorted(range(len(lessons)), key=lambda i: (sum(1 for s in domains[i] if fits(i, s)), -lessons[i].duration, i))
+    unplaced = []
+    for i in order:
+        if not domains[i]:
+            unplaced.append((i, "no_candidate"))
+            continue
+        slot = first_fit(i)
+        if slot is None and budget > 0:
+            slot = repair(i)
+            if slot is not None:
+                continue
+        if slot is None:
+            unplaced.append((i, "no_free_slot"))
+        else:
+            place(i, slot)
+    unplaced.sort()
+    return placed, unplaced
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def executor() -> Optional[ProcessPoolExecutor]:
+    global _executor
+    if _executor is None and PLACEMENT_WORKERS > 0:
+        _executor = ProcessPoolExecutor(max_workers=PLACEMENT_WORKERS)
+    return _executor
+
+def shutdown():
+    # 앱 종료(lifespan) 때. 작업 프로세스를 기다려 닫는다 (리로드/테스트 때 프로세스가 남지 않게)
+    global _executor
+    pool, _executor = _executor, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+async def run_solve(lessons: List[Lesson], existing, **options):
+    # 이벤트 루프를 막지 않도록 작업 프로세스(PLACEMENT_WORKERS=0 이면 기본 스레드 풀)에서 실행
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor(), functools.partial(solve, lessons, [tuple(row) for row in existing], **options))
@@ -0,0 +1,84 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from . import models, serialize
+
+# 시간표 변경 기록과 증분 동기화 (GET /schedules/changes?since=<rev>).
+# 시간표를 바꾸는 모든 쓰기(생성/수정/삭제/일괄 수정/입력/전체 삭제, 선생님·공간·학생 삭제로 *_id 가 비는 경우)는
+# 같은 트랜잭션에서 schedule_revisions 에 (rev, schedule_id, op) 를 남긴다. 클라이언트는
+#   1) since 없이 호출해 resync + 현재 rev 를 받고, 그 다음에 전체 시간표를 받는다 (GET /schedules/)
+#   2) 이후에는 since=<마지막 rev> 로 바뀐 행(changed)과 지워진 id(deleted)만 받는다
+# 정리(compact): 같은 시간표의 이전 기록은 마지막 것만 남기고(결과가 같으므로 클라이언트에 영향 없음),
+# SCHEDULE_LOG_RETENTION_DAYS 보다 오래됐거나 SCHEDULE_LOG_MAX_ROWS 를 넘는 앞부분은 지운다. 지운 범위보다
+# 오래된 since 는 resync. rev 는 커밋 순서가 아니라 발급 순서라, 쓰기가 동시에 커밋되는 DB(PostgreSQL)에서는
+# 먼저 받은 rev 가 나중에 보일 수 있다 (SQLite 는 쓰기가 하나씩이라 같다).
+
+SCHEDULE_LOG_RETENTION_DAYS = float(os.getenv("SCHEDULE_LOG_RETENTION_DAYS", "30"))
+SCHEDULE_LOG_MAX_ROWS = int(os.getenv("SCHEDULE_LOG_MAX_ROWS", "100000"))
+SCHEDULE_LOG_COMPACT_INTERVAL = float(os.getenv("SCHEDULE_LOG_COMPACT_INTERVAL", "3600"))  # 초, 0 이면 자동 정리 안 함
+CHANGES_LIMIT = 1000
+
+log_table = models.ScheduleRevision.__table__
+R = models.ScheduleRevision
+
+def entries(op: str, schedule_ids: Iterable[Optional[int]]) -> List[dict]:
+    # log_table.insert() 의 executemany 값 (Session / AsyncSession 어느 쪽이든 db.execute 로 넣는다)
+    return [{"schedule_id": schedule_id, "op": op} for schedule_id in dict.fromkeys(schedule_ids)]
+
+def append(db: Session, op: str, schedule_ids: Iterable[Optional[int]]):
+    # 커밋 전에 부른다
+    values = entries(op, schedule_ids)
+    if values:
+        db.execute(log_table.insert(), values)
+
+def bounds(db: Session):
+    # (floor, current): since 가 [floor, current] 안이면 그 뒤 기록이 모두 남아 있다
+    first, last = db.execute(select(func.min(R.rev), func.max(R.rev))).one()
+    if last is None:
+        return 0, 0
+    return first - 1, last
+
+def changes(db: Session, since: Optional[int], limit: int = CHANGES_LIMIT) -> dict:
+    floor, current = bounds(db)
+    body = {"rev": current, "resync": False, "more": False, "changed": [], "deleted": []}
+    if since is None or not floor <= since <= current:
+        body["resync"] = True
+        return body
+    log = db.execute(select(R.rev, R.schedule_id, R.op).where(R.rev > since).order_by(R.rev).limit(limit)).all()
+    if not log:
+        return body
+    if any(row.op == "delete_all" for row in log):
+        body["resync"] = True
+        return body
+    last_op = {}
+    for row in log:
+        last_op[row.schedule_id] = row.op
+    wanted = [i for i, op in last_op.items() if op != "delete"]
+    rows = db.execute(serialize.rows_query(serialize.FIELDS).where(models.Schedule.id.in_(wanted))).all() if wanted else []
+    present = {row.id for row in rows}
+    body["rev"] = log[-1].rev
+    body["more"] = log[-1].rev < current
+    body["changed"] = serialize.row_dicts(rows, serialize.FIELDS)
+    body["deleted"] = sorted(i for i in last_op if i not in present)
+    return body
+
+def compact(db: Session, retention_days: float = SCHEDULE_LOG_RETENTION_DAYS, max_rows: int = SCHEDULE_LOG_MAX_ROWS) -> dict:
+    # 마지막 기록은 항상 남긴다 (비어 있으면 현재 rev 를 알 수 없다). 맨 앞 기록도 겹침 정리에서는 남겨 floor 를 지킨다.
+    floor, current = bounds(db)
+    if current == 0:
+        return {"collapsed": 0, "expired": 0, "floor": 0, "rev": 0}
+    latest = select(func.max(R.rev)).group_by(R.schedule_id)
+    collapsed = db.execute(
+        delete(R).where(R.rev.not_in(latest), R.rev > floor + 1), execution_options={"synchronize_session": False}
+    ).rowcount
+    cutoff = current - max_rows
+    # created_at 은 DB 의 CURRENT_TIMESTAMP (시간대 없는 UTC) 라 같은 형식으로 비교한다
+    expired_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=retention_days)
+    expired_rev = db.scalar(select(func.max(R.rev)).where(R.created_at < expired_before))
+    cutoff = min(max(cutoff, expired_rev or 0), current - 1)
+    expired = db.execute(delete(R).where(R.rev <= cutoff), execution_options={"synchronize_session": False}).rowcount
+    db.commit()
+    floor, current = bounds(db)
+    return {"collapsed": collapsed, "expired": expired, "floor": floor, "rev": current}
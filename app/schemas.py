@@ -1,6 +1,30 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, validator
+from datetime import date
+from typing import Dict, List, Optional
 import enum
+import re
+from . import models
+
+def from_orm(model, obj):
+    # pydantic v1 / v2 모두에서 ORM 객체 -> 스키마 객체
+    if hasattr(model, "model_validate"):
+        return model.model_validate(obj, from_attributes=True)
+    return model.from_orm(obj)
+
+# 시각 "9:00", "13:30" (models.time_to_minutes 가 읽는 형식). 잘못된 값은 DB 에 닿기 전에 422 로 막는다
+TIME_FORMAT = re.compile(r"([01]?[0-9]|2[0-3]):[0-5][0-9]|24:00")
+
+def check_time(value: Optional[str]) -> Optional[str]:
+    if value is not None and not TIME_FORMAT.fullmatch(value.strip()):
+        raise ValueError("must be HH:MM")
+    return value
+
+def check_time_range(end_time: Optional[str], values: dict) -> Optional[str]:
+    # start_time 이 앞 검사에서 걸렸으면 values 에 없다
+    start_time = values.get("start_time")
+    if end_time is not None and start_time is not None and models.time_to_minutes(end_time) <= models.time_to_minutes(start_time):
+        raise ValueError("end_time must be after start_time")
+    return end_time
 
 class ScheduleType(str, enum.Enum):
     CLASS = "수업"
@@ -55,18 +79,39 @@ class ScheduleBase(BaseModel):
     type: ScheduleType
     is_regular: Optional[int] = 1
     change_type: Optional[ChangeType] = None
+    effective_from: Optional[date] = None  # 정규 수업: 적용 시작일, 특별일정: 그 날짜
+    effective_to: Optional[date] = None    # 정규 수업: 적용 종료일
+
+    _check_time = validator("start_time", "end_time", allow_reuse=True)(check_time)
+    _check_time_range = validator("end_time", allow_reuse=True)(check_time_range)
 
 class ScheduleCreate(ScheduleBase):
     pass
 
 class Schedule(ScheduleBase):
     id: int
+    teacher_id: Optional[int]  # 선생님/공간을 지우면 NULL
+    room_id: Optional[int]
     teacher: Optional[Teacher]
     room: Optional[Room]
     student: Optional[Student]
     class Config:
         orm_mode = True
 
+class SchedulesByEntity(BaseModel):
+    # GET /schedules/by: 요청한 종류만 채워진다 (id -> 시간표 목록)
+    teachers: Optional[Dict[int, List[Schedule]]] = None
+    rooms: Optional[Dict[int, List[Schedule]]] = None
+    students: Optional[Dict[int, List[Schedule]]] = None
+
+class ScheduleChanges(BaseModel):
+    # GET /schedules/changes: since 이후 바뀐 시간표. resync 면 전체를 다시 받고 rev 부터 이어 간다
+    rev: int
+    resync: bool
+    more: bool
+    changed: List[Schedule]
+    deleted: List[int]
+
 class ScheduleBulkUpdateFilter(BaseModel):
     teacher_id: int
     student_id: int
@@ -76,6 +121,8 @@ class ScheduleBulkUpdateFilter(BaseModel):
     end_time: str
     type: ScheduleType
 
+    _check_time = validator("start_time", "end_time", allow_reuse=True)(check_time)
+
 class ScheduleUpdate(BaseModel):
     day_of_week: Optional[str] = None
     start_time: Optional[str] = None
@@ -86,3 +133,99 @@ class ScheduleUpdate(BaseModel):
     type: Optional[ScheduleType] = None
     is_regular: Optional[int] = None
     change_type: Optional[ChangeType] = None
+    effective_from: Optional[date] = None
+    effective_to: Optional[date] = None
+
+    # 한쪽만 바꾸는 경우의 선후 관계는 기존 값과 합쳐서 crud.update_schedule 이 검사한다
+    _check_time = validator("start_time", "end_time", allow_reuse=True)(check_time)
+    _check_time_range = validator("end_time", allow_reuse=True)(check_time_range)
+
+class ScheduleImportRow(BaseModel):
+    teacher: str
+    subject: Optional[str] = None
+    room: str
+    student: Optional[str] = None
+    day_of_week: str
+    start_time: str
+    end_time: str
+    type: ScheduleType
+    is_regular: Optional[int] = 1
+    change_type: Optional[ChangeType] = None
+    effective_from: Optional[date] = None
+    effective_to: Optional[date] = None
+
+    _check_time = validator("start_time", "end_time", allow_reuse=True)(check_time)
+    _check_time_range = validator("end_time", allow_reuse=True)(check_time_range)
+
+class ScheduleImport(BaseModel):
+    # text: seed_data.schedule_text 와 같은 형식의 시간표 텍스트, rows: JSON 행. 둘 다 주면 합친다.
+    text: Optional[str] = None
+    rows: List[ScheduleImportRow] = []
+    dry_run: bool = False
+    on_conflict: str = "abort"  # abort: 겹침이 있으면 아무것도 넣지 않음, skip: 겹치는 행만 제외, allow: 모두 입력
+
+class ScheduleImportConflict(BaseModel):
+    row: int
+    kind: str  # "room" | "teacher"
+    schedule_id: Optional[int] = None  # 기존 시간표와 겹침
+    other_row: Optional[int] = None    # 같은 배치의 다른 행과 겹침
+
+class ScheduleImportResult(BaseModel):
+    dry_run: bool
+    rows: int
+    inserted: int
+    skipped: int
+    created_teachers: int  # 입력한 이름 중 새로 만든 수 (되돌렸으면 0, dry run 이면 만들 수)
+    created_rooms: int
+    created_students: int
+    conflicts: List[ScheduleImportConflict]
+
+class ScheduleBulkUpdateItem(BaseModel):
+    filter: ScheduleBulkUpdateFilter
+    update: ScheduleUpdate
+
+class ScheduleBulkUpdateResult(BaseModel):
+    updated: int
+    ids: List[int]
+
+class AvailableSlot(BaseModel):
+    day_of_week: str
+    start_time: str
+    end_time: str
+    room_id: int
+    room_name: str
+
+class LessonRequest(BaseModel):
+    teacher_id: int
+    student_id: Optional[int] = None
+    duration: int  # 분
+    days: Optional[List[str]] = None      # 없으면 모든 요일
+    room_ids: Optional[List[int]] = None  # 선호 공간 (앞쪽 우선), 없으면 모든 공간
+    type: ScheduleType = ScheduleType.CLASS
+
+class AutoPlaceRequest(BaseModel):
+    lessons: List[LessonRequest]
+    start_time: str = "09:00"
+    end_time: str = "22:00"
+    step: int = 30  # 시작 시각 간격 (분)
+    max_backtracks: int = 1000
+    commit: bool = False  # true 면 배치 결과 전체를 한 트랜잭션으로 입력 (하나라도 겹치면 409)
+
+class LessonPlacement(BaseModel):
+    lesson: int  # lessons 안의 번호
+    teacher_id: int
+    student_id: Optional[int] = None
+    room_id: int
+    day_of_week: str
+    start_time: str
+    end_time: str
+    type: ScheduleType
+
+class UnplacedLesson(BaseModel):
+    lesson: int
+    reason: str  # "no_candidate": 요일/공간/시간 범위에 들어갈 자리 자체가 없음, "no_free_slot": 모두 차 있음
+
+class AutoPlaceResult(BaseModel):
+    placed: List[LessonPlacement]
+    unplaced: List[UnplacedLesson]
+    committed: bool
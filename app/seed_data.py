@@ -1,5 +1,5 @@
 import re
-from app import models, database
+from app import crud, database, schemas
 from sqlalchemy.orm import Session
 
 def parse_schedule_text(text):
@@ -65,6 +65,23 @@ def parse_schedule_text(text):
                 })
     return teachers, rooms, students, schedules
 
+def parse_import_rows(text):
+    # parse_schedule_text 결과를 POST /schedules/import 의 행 형식으로 변환
+    teachers, _, _, schedules = parse_schedule_text(text)
+    return [
+        schemas.ScheduleImportRow(
+            teacher=sch['teacher'],
+            subject=teachers.get(sch['teacher']),
+            room=sch['room'],
+            student=sch['student'],
+            day_of_week=sch['day'],
+            start_time=sch['start'],
+            end_time=sch['end'],
+            type=sch['type']
+        )
+        for sch in schedules
+    ]
+
 # 실제 시간표 텍스트를 여기에 복사/붙여넣기
 schedule_text = '''
 ──────────────────────────── 김윤아 선생님 (국어)
@@ -156,38 +173,10 @@ schedule_text = '''
 def main():
     database.create_tables()
     db = Session(bind=database.engine_sync)
-    teachers, rooms, students, schedules = parse_schedule_text(schedule_text)
-    # Insert teachers
-    teacher_objs = {}
-    for t, subj in teachers.items():
-        obj = models.Teacher(name=t, subject=subj)
-        db.add(obj)
-        teacher_objs[t] = obj
-    # Insert rooms
-    room_objs = {}
-    for r in rooms:
-        obj = models.Room(name=r)
-        db.add(obj)
-        room_objs[r] = obj
-    # Insert students
-    student_objs = {}
-    for s in students:
-        obj = models.Student(name=s)
-        db.add(obj)
-        student_objs[s] = obj
-    db.commit()
-    # Insert schedules
-    for sch in schedules:
-        db.add(models.Schedule(
-            teacher_id=teacher_objs[sch['teacher']].id,
-            room_id=room_objs[sch['room']].id,
-            student_id=student_objs[sch['student']].id,
-            day_of_week=sch['day'],
-            start_time=sch['start'],
-            end_time=sch['end'],
-            type=sch['type']
-        ))
-    db.commit()
+    # 원래 시드 동작대로 겹침이 있어도 모두 입력하되, 겹침은 보고한다
+    result = crud.import_schedules(db, parse_import_rows(schedule_text), on_conflict="allow")
+    for conflict in result.conflicts:
+        print(f"⚠️  겹침: {conflict}")
     print("✅ 시간표 데이터가 성공적으로 입력되었습니다!")
 
 if __name__ == '__main__':
@@ -0,0 +1,122 @@
+import json
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select
+from . import models
+
+# 목록 응답 빠른 경로.
+# ORM 객체 -> schemas.Schedule 검증 -> jsonable_encoder 대신, 필요한 컬럼만 Core select 로 읽고
+# (이름은 JOIN) 행을 바로 dict 로 만들어 JSON 으로 쓴다. 기본 응답 모양은 schemas.Schedule 목록과 같다.
+#   fields=teacher_id,day_of_week,...  : 필요한 필드만
+#   compact=true                       : teacher/room/student 대신 *_id 만 두고 중복 없는 조회표를 따로 붙인다
+
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:  # orjson 이 없으면 표준 json
+    def _default(value):
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+# schemas.Schedule 필드 순서
+SCALAR_FIELDS = ["teacher_id", "room_id", "student_id", "day_of_week", "start_time", "end_time", "type",
+                 "is_regular", "change_type", "effective_from", "effective_to", "id"]
+# 관계 필드: (모델, schemas 의 필드 순서)
+NESTED_FIELDS = {
+    "teacher": (models.Teacher, ["name", "subject"]),
+    "room": (models.Room, ["name"]),
+    "student": (models.Student, ["name"]),
+}
+FIELDS = SCALAR_FIELDS + list(NESTED_FIELDS)
+
+def parse_fields(value: Optional[str]) -> List[str]:
+    # "id,teacher,start_time" -> FIELDS 순서의 목록. 알 수 없는 필드는 ValueError
+    if not value:
+        return list(FIELDS)
+    wanted = {f.strip() for f in value.split(",") if f.strip()}
+    unknown = wanted - set(FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    return [f for f in FIELDS if f in wanted]
+
+def rows_query(fields: Iterable[str], compact: bool = False):
+    # 커서용 day_index/start_min/id 는 항상 읽는다. 관계 필드는 compact 면 *_id 로, 아니면 이름을 JOIN 한다.
+    fields = list(fields)
+    columns = {"id", "day_index", "start_min"}
+    joins = []
+    for f in fields:
+        if f in NESTED_FIELDS:
+            columns.add(f + "_id")
+            if not compact:
+                joins.append(f)
+        else:
+            columns.add(f)
+    selected = [getattr(models.Schedule, c).label(c) for c in sorted(columns)]
+    stmt = select(*selected)
+    for f in joins:
+        model, names = NESTED_FIELDS[f]
+        stmt = stmt.add_columns(*(getattr(model, n).label(f"{f}__{n}") for n in names))
+        stmt = stmt.outerjoin(model, model.id == getattr(models.Schedule, f + "_id"))
+    return stmt
+
+def positions(rows) -> Dict[str, int]:
+    # 라벨 -> 행 안의 위치. 행마다 _mapping 을 만들지 않고 튜플 인덱스로 읽는다
+    return {name: i for i, name in enumerate(rows[0]._fields)} if rows else {}
+
+def row_dicts(rows, fields: Iterable[str]) -> List[dict]:
+    # 행 -> schemas.Schedule 모양의 dict (fields 만)
+    pos = positions(rows)
+    if not pos:
+        return []
+    plan = []
+    for f in fields:
+        if f in NESTED_FIELDS:
+            plan.append((f, pos[f + "_id"], [(n, pos[f"{f}__{n}"]) for n in NESTED_FIELDS[f][1]]))
+        else:
+            plan.append((f, pos[f], None))
+    items = []
+    for row in rows:
+        item = {}
+        for f, i, names in plan:
+            if names is None:
+                item[f] = row[i]
+            elif row[i] is None:
+                item[f] = None
+            else:
+                nested = {n: row[j] for n, j in names}
+                nested["id"] = row[i]
+                item[f] = nested
+        items.append(item)
+    return items
+
+def lookup_tables(rows, fields: Iterable[str]) -> Dict[str, list]:
+    # compact 응답의 조회표용 (종류, id 목록). 이름은 lookup_query 로 따로 한 번에 읽는다.
+    pos = positions(rows)
+    tables = {}
+    for f in fields:
+        if f in NESTED_FIELDS:
+            i = pos.get(f + "_id")
+            ids = {row[i] for row in rows} if i is not None else set()
+            ids.discard(None)
+            tables[f] = sorted(ids)
+    return tables
+
+def lookup_query(kind: str, ids: List[int]):
+    model, names = NESTED_FIELDS[kind]
+    return select(model.id, *(getattr(model, n) for n in names)).where(model.id.in_(ids)).order_by(model.id)
+
+def compact_body(rows, fields: List[str], tables: Dict[str, list]) -> dict:
+    # {"schedules": [...*_id...], "teachers": [{id, name, subject}], "rooms": [...], "students": [...]}
+    pos = positions(rows)
+    scalar = list(dict.fromkeys(f + "_id" if f in NESTED_FIELDS else f for f in fields))
+    plan = [(f, pos[f]) for f in scalar] if pos else []
+    body = {"schedules": [{f: row[i] for f, i in plan} for row in rows]}
+    for kind, table in tables.items():
+        names = ["id"] + NESTED_FIELDS[kind][1]
+        body[kind + "s"] = [dict(zip(names, r)) for r in table]
+    return body
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+from fastapi import Request, Response
+from .database import PerDatabase
+
+# 주간 시간표 응답 캐시. 최대 항목 수(LRU)와 선택적 만료 시간(초, 0 이면 만료 없음).
+# 다른 워커의 시간표 쓰기는 "schedules" 버전(crud.schedule_version)을 SCHEDULE_VERSION_CHECK_SECONDS 에 한 번 읽어
+# 바뀌었으면 bump_all 로 버린다.
+CACHE_SIZE = int(os.getenv("TIMETABLE_CACHE_SIZE", "512"))
+CACHE_TTL = float(os.getenv("TIMETABLE_CACHE_TTL", "0"))
+
+Entity = Tuple[str, int]  # ("teacher" | "room" | "student", id) 또는 ("all", 0)
+
+class Revisions:
+    # 엔티티별 변경 카운터. 시간표 쓰기가 있을 때마다 관련 선생님/공간/학생의 카운터를 올린다.
+    # generation 은 전체 무효화(전체 삭제, 대량 입력 등)용.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Entity, int] = {}
+        self.generation = 0
+
+    def get(self, kind: str, entity_id: int) -> Tuple[int, int]:
+        return self.generation, self._counters.get((kind, entity_id), 0)
+
+    def bump(self, kind: str, entity_id: Optional[int]):
+        if entity_id is None:
+            return
+        with self._lock:
+            self._counters[(kind, entity_id)] = self._counters.get((kind, entity_id), 0) + 1
+
+    def touch(self, teacher_id: Optional[int] = None, room_id: Optional[int] = None, student_id: Optional[int] = None):
+        self.bump("all", 0)  # 필터 없는 조회(전체 달력 등)용
+        self.bump("teacher", teacher_id)
+        self.bump("room", room_id)
+        self.bump("student", student_id)
+
+    def bump_all(self):
+        with self._lock:
+            self.generation += 1
+            self._counters.clear()
+
+class CachedResponse(NamedTuple):
+    entity: Entity
+    revision: Tuple[int, int]
+    etag: str
+    body: bytes
+    created: float
+
+class TimetableCache:
+    def __init__(self, revisions: Revisions, max_size: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.revisions = revisions
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expired = self.ttl > 0 and time.monotonic() - entry.created > self.ttl
+                if expired or entry.revision != self.revisions.get(*entry.entity):
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entity: Entity, revision: Tuple[int, int], body: bytes) -> CachedResponse:
+        # revision 은 DB 를 읽기 전에 잡아 둔 값. 읽는 사이에 쓰기가 있었다면 다음 조회에서 버려진다.
+        entry = CachedResponse(entity, revision, '"' + hashlib.sha256(body).hexdigest()[:32] + '"', body, time.monotonic())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+def etag_response(request: Request, entry: CachedResponse) -> Response:
+    # If-None-Match 가 같으면 본문 없이 304
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if entry.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+# DB(지점)마다 하나
+revisions = PerDatabase(Revisions)
+timetable_cache = PerDatabase(lambda: TimetableCache(revisions))
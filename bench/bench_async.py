@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# 동기(스레드풀) 엔드포인트와 비동기 엔드포인트의 처리량 비교.
+# 사용법: python -m bench.bench_async --clients 50 200 1000 --requests 2000
+# DATABASE_URL 을 지정하지 않으면 임시 SQLite(aiosqlite) 파일에 가상 데이터를 만들어 사용한다.
+
+def build_sync_app():
+    # 비교 대상: 같은 조회 경로를 동기 Session + crud 로 처리하는 앱
+    # 세션은 엔드포인트 안에서 열고 닫는다. 제너레이터 의존성은 종료 처리도 스레드풀을 쓰므로
+    # 동시 접속이 스레드 수를 넘으면 커넥션 반환이 막혀 풀 타임아웃이 난다.
+    from typing import List
+    from fastapi import FastAPI
+    from app import crud, schemas
+    from app.database import SessionLocal
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/schedules/", response_model=List[schemas.Schedule])
+    def read_schedules(skip: int = 0, limit: int = 100):
+        with SessionLocal() as db:
+            return crud.get_schedules(db, skip=skip, limit=limit)
+
+    @sync_app.get("/teachers/{teacher_id}/schedules", response_model=List[schemas.Schedule])
+    def get_teacher_weekly_schedule(teacher_id: int):
+        with SessionLocal() as db:
+            return crud.get_schedules_by_teacher_week(db, teacher_id)
+
+    @sync_app.get("/rooms/{room_id}/schedules", response_model=List[schemas.Schedule])
+    def get_room_weekly_schedule(room_id: int):
+        with SessionLocal() as db:
+            return crud.get_schedules_by_room_week(db, room_id)
+
+    return sync_app
+
+def request_paths(count: int, teachers: int, rooms: int, seed: int = 0):
+    rnd = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        kind = rnd.randrange(3)
+        if kind == 0:
+            paths.append(f"/teachers/{rnd.randint(1, teachers)}/schedules")
+        elif kind == 1:
+            paths.append(f"/rooms/{rnd.randint(1, rooms)}/schedules")
+        else:
+            paths.append(f"/schedules/?skip={rnd.randrange(0, 1000, 100)}&limit=100")
+    return paths
+
+async def run_load(app, paths, clients: int):
+    import httpx
+
+    latencies = []
+    queue = list(reversed(paths))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            while queue:
+                path = queue.pop()
+                t0 = time.perf_counter()
+                r = await client.get(path)
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--teachers", type=int, default=40)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--schedules", type=int, default=20000)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+
+    from sqlalchemy.orm import Session
+    from app import database, models
+    from bench import synthetic
+    from app.main import app as async_app
+
+    database.create_tables()
+    with Session(database.engine_sync) as db:
+        if not db.query(models.Schedule.id).first():
+            synthetic.generate(db, teachers=args.teachers, rooms=args.rooms, schedules=args.schedules)
+
+    sync_app = build_sync_app()
+    paths = request_paths(args.requests, args.teachers, args.rooms)
+
+    async def run_all():
+        # 비동기 엔진의 커넥션 풀은 이벤트 루프에 묶이므로 모든 측정을 한 루프에서 돌린다
+        print(f"{'clients':>8} {'mode':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for clients in args.clients:
+            for mode, app in (("sync", sync_app), ("async", async_app)):
+                result = await run_load(app, paths, clients)
+                print(f"{clients:>8} {mode:>6} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f}")
+
+    asyncio.run(run_all())
+
+if __name__ == '__main__':
+    main()
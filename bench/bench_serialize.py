@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# 목록 응답 직렬화 비교: 기존 경로(ORM 객체 + response_model 검증) vs 빠른 경로(Core 행 -> JSON),
+# 그리고 fields= 선택, compact=true. 행 수별 응답 크기와 지연시간(중앙값)을 출력한다.
+# 사용법: python -m bench.bench_serialize --rows 1000 10000 50000 --repeat 5
+# DATABASE_URL 을 지정하지 않으면 임시 SQLite 파일에 가상 데이터를 만들어 사용한다.
+
+PROJECTION = "id,day_of_week,start_time,end_time,teacher,room"
+
+def build_orm_app():
+    # 비교 대상: 빠른 경로 이전의 GET /schedules/ (ORM 객체를 response_model 로 검증·직렬화)
+    from typing import List
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app import crud_async, schemas
+    from app.database import get_db
+
+    orm_app = FastAPI()
+
+    @orm_app.get("/schedules/", response_model=List[schemas.Schedule])
+    async def read_schedules(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+        return await crud_async.get_schedules(db, skip=skip, limit=limit)
+
+    return orm_app
+
+async def measure(client, path: str, repeat: int):
+    latencies = []
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        r = await client.get(path)
+        r.raise_for_status()
+        latencies.append(time.perf_counter() - t0)
+        size = len(r.content)
+    return size, statistics.median(latencies) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+
+    import httpx
+    from sqlalchemy.orm import Session
+    from app import database, models
+    from bench import synthetic
+    from app.main import app
+
+    database.create_tables()
+    with Session(database.engine_sync) as db:
+        if not db.query(models.Schedule.id).first():
+            synthetic.generate(db, schedules=max(args.rows))
+        elif db.query(models.Schedule.id).count() < max(args.rows):
+            parser.error(f"database has fewer than {max(args.rows)} schedules")
+
+    modes = [
+        ("orm", build_orm_app(), ""),
+        ("fast", app, ""),
+        ("fields", app, f"&fields={PROJECTION}"),
+        ("compact", app, "&compact=true"),
+    ]
+
+    async def run_all():
+        # 비동기 엔진의 커넥션 풀은 이벤트 루프에 묶이므로 모든 측정을 한 루프에서 돌린다
+        print(f"{'rows':>7} {'mode':>8} {'bytes':>11} {'ms':>9} {'vs orm':>7}")
+        for rows in args.rows:
+            baseline = None
+            for mode, target, query in modes:
+                transport = httpx.ASGITransport(app=target)
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                    size, ms = await measure(client, f"/schedules/?limit={rows}{query}", args.repeat)
+                baseline = baseline or ms
+                print(f"{rows:>7} {mode:>8} {size:>11,} {ms:>9.1f} {baseline / ms:>6.1f}x")
+
+    asyncio.run(run_all())
+
+if __name__ == '__main__':
+    main()
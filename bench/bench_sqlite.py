@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+# SQLite 엔진 프로파일 비교 (DB_PROFILE): 동시 읽기/쓰기.
+# 프로파일마다 새 DB 파일에 가상 데이터를 만들고, --seconds 동안 읽기 클라이언트(선생님 주간 시간표 조회,
+# 프로파일의 조회 전용 엔진)와 쓰기 클라이언트(쓰기 엔진)를 같이 돌린다. 쓰기는 앱의 수업 입력/시간 변경처럼
+# 한 트랜잭션에서 "schedules" 버전과 겹치는 수업을 먼저 읽고 나서 쓰고 버전을 올린다 (읽은 뒤 쓰는 트랜잭션이
+# 다른 커넥션의 커밋 때문에 바로 실패하는 SQLITE_BUSY_SNAPSHOT 경로).
+# 읽기 지연시간 분포, 처리량, "database is locked" 오류 수를 출력한다.
+# 사용법: python -m bench.bench_sqlite --readers 8 --writers 4 --seconds 10 --schedules 20000
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * p), len(sorted_values) - 1)]
+
+async def run_profile(profile: str, args) -> dict:
+    from sqlalchemy import insert, or_, select, update
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+    from app import cache_versions, database, models
+    from bench import synthetic
+
+    path = os.path.join(tempfile.mkdtemp(), f"{profile}.db")
+    url = f"sqlite+aiosqlite:///{path}"
+    engine_sync = database.make_sync_engine(database.sync_url(url), profile)
+    models.Base.metadata.create_all(engine_sync)
+    with Session(engine_sync) as db:
+        synthetic.generate(db, teachers=args.teachers, rooms=args.rooms, schedules=args.schedules, seed=args.seed)
+    engine_sync.dispose()
+
+    # 앱과 같은 구성 (database.Database): tuned 는 조회 전용 엔진을 따로, basic 은 하나를 같이 쓰고,
+    # 쓰기는 get_db 처럼 write_gate 안에서 한다
+    target = database.Database(url, profile=profile)
+    write_engine, read_engine = target.engine_async(), target.engine_read_async()
+    s = models.Schedule
+    deadline = time.perf_counter() + args.seconds
+    reads: List[float] = []
+    writes: List[float] = []
+    errors = {"read_locked": 0, "write_locked": 0}
+
+    async def reader(n: int):
+        rnd = random.Random(n)
+        while time.perf_counter() < deadline:
+            stmt = select(s.id, s.room_id, s.day_index, s.start_min, s.end_min) \
+                .where(s.teacher_id == rnd.randint(1, args.teachers)).order_by(s.day_index, s.start_min)
+            t0 = time.perf_counter()
+            try:
+                async with read_engine.connect() as conn:
+                    (await conn.execute(stmt)).all()
+                reads.append(time.perf_counter() - t0)
+            except OperationalError:
+                errors["read_locked"] += 1
+
+    def write(db: Session, rnd: random.Random):
+        # 앱과 같은 순서: 버전 확인, 겹침 조회, 쓰기, 버전 올리기. 겹침 여부와 상관없이 쓴다 (잠금 경로만 본다)
+        day_index = rnd.randrange(6)
+        start = rnd.randrange(14 * 60, 21 * 60, 30)
+        teacher_id, room_id = rnd.randint(1, args.teachers), rnd.randint(1, args.rooms)
+        cache_versions.read(db, cache_versions.SCHEDULES)
+        db.execute(select(s.id).where(
+            s.day_index == day_index, s.start_min < start + 60, s.end_min > start,
+            or_(s.teacher_id == teacher_id, s.room_id == room_id)).limit(1)).first()
+        if rnd.random() < 0.5:
+            db.execute(insert(s).values(
+                teacher_id=teacher_id, room_id=room_id,
+                day_of_week=models.DAYS_OF_WEEK[day_index], day_index=day_index,
+                start_time=models.minutes_to_time(start), end_time=models.minutes_to_time(start + 60),
+                start_min=start, end_min=start + 60, type=models.ScheduleType.CLASS, is_regular=1,
+            ))
+        else:
+            db.execute(update(s).where(s.id == rnd.randint(1, args.schedules)).values(
+                end_time=models.minutes_to_time(start + 90), end_min=start + 90))
+        cache_versions.bump(db, cache_versions.SCHEDULES)
+        db.commit()
+
+    async def writer(n: int):
+        rnd = random.Random(1000 + n)
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                async with target.write_gate(), AsyncSession(write_engine) as db:
+                    await db.run_sync(write, rnd)
+                writes.append(time.perf_counter() - t0)
+            except OperationalError:
+                errors["write_locked"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(reader(i) for i in range(args.readers)), *(writer(i) for i in range(args.writers)))
+    elapsed = time.perf_counter() - started
+    await target.dispose()
+    reads.sort()
+    writes.sort()
+    return {
+        "reads": len(reads),
+        "read_rps": len(reads) / elapsed,
+        "read_p50_ms": percentile(reads, 0.50) * 1000,
+        "read_p95_ms": percentile(reads, 0.95) * 1000,
+        "read_p99_ms": percentile(reads, 0.99) * 1000,
+        "writes": len(writes),
+        "write_rps": len(writes) / elapsed,
+        "write_p95_ms": percentile(writes, 0.95) * 1000,
+        **errors,
+    }
+
+def main():
+    from app.database import PROFILES
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(reversed(PROFILES)))
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--teachers", type=int, default=40)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--schedules", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'profile':>8} {'reads/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'writes/s':>9} "
+          f"{'w p95 ms':>9} {'locked r/w':>11}")
+    for profile in args.profiles:
+        r = asyncio.run(run_profile(profile, args))
+        print(f"{profile:>8} {r['read_rps']:>9.1f} {r['read_p50_ms']:>8.1f} {r['read_p95_ms']:>8.1f} "
+              f"{r['read_p99_ms']:>8.1f} {r['write_rps']:>9.1f} {r['write_p95_ms']:>9.1f} "
+              f"{r['read_locked']:>5}/{r['write_locked']:<5}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+# 시작 시간 측정과 회귀 검사.
+#   import   : python -X importtime -c "import app.main" 의 app.main 누적 시간 (중앙값)
+#   first    : 새 프로세스 시작부터 lifespan 시작 + 첫 요청(GET /teachers/) 응답까지 (ASGI, 중앙값)
+#   http     : --http 일 때 uvicorn 프로세스 시작부터 첫 HTTP 200 까지
+#   부작용   : app.main import 만으로 엔진이나 DB 커넥션을 만들거나 DB 파일을 만들거나 DB 드라이버
+#              (aiosqlite/asyncpg)를 읽지 않는지
+#   메모리   : app.main import 중 할당된 메모리 최대치 (tracemalloc)
+# --max-import-ms / --max-first-request-ms / --max-import-memory-mb 를 넘거나 부작용이 있으면 종료 코드 1.
+# CI 에서는 tests/test_startup.py 가 같은 검사를 pytest 로 돌린다.
+# 사용법: python -m bench.bench_startup --runs 5 --max-import-ms 1500 --max-first-request-ms 3000
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_CHECK = """
+import json, os, sqlite3, sys, tracemalloc
+connections = []
+connect = sqlite3.connect
+sqlite3.connect = lambda *args, **kwargs: connections.append(args) or connect(*args, **kwargs)
+tracemalloc.start()
+import app.main
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+from app import database
+print(json.dumps({
+    "engines": database.engines_created(),
+    "connections": len(connections),
+    "db_file": os.path.exists(sys.argv[1]),
+    "drivers": sorted(m for m in ("aiosqlite", "asyncpg") if m in sys.modules),
+    "memory_mb": round(peak / 2 ** 20, 1),
+}))
+"""
+
+FIRST_REQUEST = """
+import asyncio, httpx
+from app.main import app
+
+async def main():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            r = await client.get("/teachers/")
+            r.raise_for_status()
+    print("ok", flush=True)
+
+asyncio.run(main())
+"""
+
+def child_env(**extra) -> Dict[str, str]:
+    # extra 의 값이 None 이면 그 변수를 지운다 (상위 환경의 DB 설정이 섞이지 않게)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    for key, value in extra.items():
+        if value is None:
+            env.pop(key, None)
+        else:
+            env[key] = value
+    return env
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    # "import time: self [us] | cumulative | imported package" -> (모듈, self us, cumulative us)
+    found = []
+    for line in stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)", line)
+        if m:
+            found.append((m.group(4), int(m.group(1)), int(m.group(2))))
+    return found
+
+def import_time(runs: int, env: Dict[str, str]) -> Tuple[float, List[Tuple[str, int, int]]]:
+    totals, modules = [], []
+    for _ in range(runs):
+        p = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                           cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        modules = parse_importtime(p.stderr)
+        totals.append(next(cum for name, _, cum in modules if name == "app.main") / 1000)
+    return statistics.median(totals), modules
+
+def first_request(runs: int, env: Dict[str, str]) -> float:
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        p = subprocess.run([sys.executable, "-c", FIRST_REQUEST], cwd=ROOT, env=env, capture_output=True, text=True)
+        if p.returncode != 0 or "ok" not in p.stdout:
+            raise SystemExit(f"first request failed:\n{p.stderr}")
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+def first_http_request(runs: int, env: Dict[str, str]) -> float:
+    import httpx
+    from bench.bench_suite import free_port
+
+    times = []
+    for _ in range(runs):
+        port = free_port()
+        t0 = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"], cwd=ROOT, env=env)
+        try:
+            while True:
+                if server.poll() is not None:
+                    raise SystemExit(f"server exited with {server.returncode}")
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/teachers/", timeout=5).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            times.append((time.perf_counter() - t0) * 1000)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    return statistics.median(times)
+
+def import_check(url: str, absent: str) -> dict:
+    # 새 프로세스에서 app.main 만 import 한 결과 (IMPORT_CHECK). 실패하면 error
+    p = subprocess.run([sys.executable, "-c", IMPORT_CHECK, absent], cwd=ROOT, capture_output=True, text=True,
+                       env=child_env(DATABASE_URL=url, DATABASE_READ_URL=None, SQLALCHEMY_DATABASE_URL=None))
+    if p.returncode != 0:
+        return {"error": p.stderr.strip().splitlines()[-1]}
+    return json.loads(p.stdout.strip().splitlines()[-1])
+
+def side_effects(workdir: str) -> List[str]:
+    # import 만 했을 때의 부작용 (SQLite 파일 URL 과 PostgreSQL URL 각각)
+    problems = []
+    absent = os.path.join(workdir, "absent.db")
+    for url in (f"sqlite+aiosqlite:///{absent}", "postgresql+asyncpg://startup@127.0.0.1:1/none"):
+        result = import_check(url, absent)
+        if "error" in result:
+            problems.append(f"import app.main with {url.split(':')[0]} failed: {result['error']}")
+            continue
+        if result["engines"]:
+            problems.append(f"import created engines {result['engines']} ({url.split(':')[0]})")
+        if result["connections"]:
+            problems.append(f"import opened {result['connections']} database connections ({url.split(':')[0]})")
+        if result["db_file"]:
+            problems.append("import created the SQLite database file")
+        if result["drivers"]:
+            problems.append(f"import loaded DB drivers {result['drivers']} ({url.split(':')[0]})")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--http", action="store_true", help="also measure uvicorn start to first HTTP response")
+    parser.add_argument("--top", type=int, default=15, help="show the slowest modules by self time")
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-first-request-ms", type=float)
+    parser.add_argument("--max-import-memory-mb", type=float)
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_url = f"sqlite+aiosqlite:///{os.path.join(workdir, 'startup.db')}"
+    env = child_env(DATABASE_URL=db_url, DATABASE_READ_URL=None, SQLALCHEMY_DATABASE_URL=None, DB_CREATE_SCHEMA=None)
+
+    problems = side_effects(workdir)
+    # 스키마를 한 번 만들어 두고(DB_CREATE_SCHEMA=1) 측정은 이미 있는 DB 로 한다
+    first_request(1, {**env, "DB_CREATE_SCHEMA": "1"})
+    import_ms, modules = import_time(args.runs, env)
+    first_ms = first_request(args.runs, env)
+    memory_mb = import_check(db_url, os.path.join(workdir, "absent.db")).get("memory_mb")
+    result = {"import_ms": import_ms, "first_request_ms": first_ms, "import_memory_mb": memory_mb}
+    if args.http:
+        result["first_http_request_ms"] = first_http_request(args.runs, env)
+
+    print(f"import app.main          {import_ms:>8.1f} ms")
+    print(f"process -> first request {first_ms:>8.1f} ms")
+    if memory_mb is not None:
+        print(f"import memory (peak)     {memory_mb:>8.1f} MB")
+    if args.http:
+        print(f"uvicorn -> first HTTP    {result['first_http_request_ms']:>8.1f} ms")
+    print("\nslowest imports (self ms, cumulative ms):")
+    for name, self_us, cum_us in sorted(modules, key=lambda m: -m[1])[:args.top]:
+        print(f"  {self_us / 1000:>7.1f} {cum_us / 1000:>8.1f}  {name}")
+
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        problems.append(f"import took {import_ms:.1f} ms (max {args.max_import_ms:g})")
+    if args.max_first_request_ms is not None and first_ms > args.max_first_request_ms:
+        problems.append(f"first request took {first_ms:.1f} ms (max {args.max_first_request_ms:g})")
+    if args.max_import_memory_mb is not None and (memory_mb is None or memory_mb > args.max_import_memory_mb):
+        problems.append(f"import allocated {memory_mb} MB (max {args.max_import_memory_mb:g})")
+    result["problems"] = problems
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    for line in problems:
+        print(f"FAIL {line}")
+    sys.exit(1 if problems else 0)
+
+if __name__ == '__main__':
+    main()
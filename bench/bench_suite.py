@@ -0,0 +1,320 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# 엔드포인트 부하 테스트.
+# 가상 학원 데이터(bench.synthetic)를 만든 DB 로 app/main.py 의 엔드포인트를 시나리오마다 --requests 번씩,
+# --concurrency 개 클라이언트로 호출하고 p50/p95/p99 지연시간과 처리량(req/s)을 출력한다.
+#   --mode inprocess : httpx.ASGITransport 로 앱을 직접 호출 (네트워크/서버 비용 제외)
+#   --mode http      : 같은 DB 로 uvicorn 을 띄워 HTTP 로 호출
+# --save-baseline FILE 로 결과를 저장해 두고 --baseline FILE 로 비교하면, p95 가 --threshold 비율(그리고
+# --min-delta-ms) 넘게 느려진 시나리오나 예상하지 않은 상태 코드가 있을 때 종료 코드 1 로 끝난다.
+# 사용법: python -m bench.bench_suite --schedules 20000 --requests 200 --concurrency 10 --save-baseline base.json
+#         python -m bench.bench_suite --schedules 20000 --requests 200 --concurrency 10 --baseline base.json
+# DATABASE_URL 을 지정하지 않으면 임시 SQLite 파일을 만든다. 쓰기 시나리오(생성, 수정, 일괄 수정)가 있으므로
+# 운영 DB 를 가리키지 말 것. 지우는 엔드포인트(DELETE, delete_all, interval_index 재구성)는 돌리지 않는다.
+
+class Fixture(NamedTuple):
+    teachers: int
+    rooms: int
+    students: int
+    room_names: List[str]
+    regular: List[dict]  # 정규 수업 표본 (일괄 수정/수정 시나리오용)
+
+class Scenario(NamedTuple):
+    name: str
+    build: Callable[[random.Random, Fixture], Tuple[str, str, Optional[dict]]]  # -> (method, path, json)
+    ok: Tuple[int, ...] = (200,)
+    share: float = 1.0  # --requests 에 곱하는 비율 (무거운 시나리오는 적게)
+
+def time_of(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def new_lesson(rnd: random.Random, fx: Fixture) -> dict:
+    from app.models import DAYS_OF_WEEK
+    start = rnd.randrange(14 * 60, 21 * 60, 30)
+    return {
+        "teacher_id": rnd.randint(1, fx.teachers),
+        "room_id": rnd.randint(1, fx.rooms),
+        "student_id": rnd.randint(1, fx.students),
+        "day_of_week": rnd.choice(DAYS_OF_WEEK[:6]),
+        "start_time": time_of(start),
+        "end_time": time_of(start + 60),
+        "type": "수업",
+    }
+
+def bulk_update(rnd: random.Random, fx: Fixture):
+    # 있는 정규 수업을 골라 같은 시각으로 다시 저장 (겹침 검사와 갱신 경로를 타지만 데이터는 그대로)
+    row = rnd.choice(fx.regular)
+    keys = ("teacher_id", "student_id", "room_id", "day_of_week", "start_time", "end_time", "type")
+    return "PUT", "/schedules/bulk_update_regular/", {
+        "filter": {k: row[k] for k in keys},
+        "update": {"start_time": row["start_time"], "end_time": row["end_time"]},
+    }
+
+def calendar(rnd: random.Random, fx: Fixture):
+    monday = date(2026, 3, 2) + timedelta(weeks=rnd.randrange(12))
+    return "GET", f"/calendar?from={monday}&to={monday + timedelta(days=6)}&teacher_id={rnd.randint(1, fx.teachers)}", None
+
+def availability_day(rnd: random.Random, fx: Fixture):
+    # 응답 목표(수십 ms)는 하루 단위 조회 기준. 요일을 빼면 일주일 전체 (availability 시나리오)
+    from app.models import DAYS_OF_WEEK
+    day = rnd.choice(DAYS_OF_WEEK[:6])
+    return "GET", f"/availability?duration=60&day={day}&teacher_id={rnd.randint(1, fx.teachers)}&student_id={rnd.randint(1, fx.students)}", None
+
+def import_dry_run(rnd: random.Random, fx: Fixture):
+    lesson = new_lesson(rnd, fx)
+    row = {
+        "teacher": f"선생님{lesson['teacher_id'] - 1:04d}",
+        "room": rnd.choice(fx.room_names),
+        "student": f"학생{lesson['student_id'] - 1:05d}",
+        **{k: lesson[k] for k in ("day_of_week", "start_time", "end_time", "type")},
+    }
+    return "POST", "/schedules/import", {"rows": [row], "dry_run": True}
+
+def auto_place(rnd: random.Random, fx: Fixture):
+    lessons = [{"teacher_id": rnd.randint(1, fx.teachers), "student_id": rnd.randint(1, fx.students),
+                "duration": rnd.choice([60, 90])} for _ in range(3)]
+    return "POST", "/schedules/auto_place", {"lessons": lessons, "start_time": "14:00", "end_time": "22:00"}
+
+SCENARIOS = [
+    Scenario("create_schedule", lambda r, fx: ("POST", "/schedules/", new_lesson(r, fx)), ok=(200, 409)),
+    Scenario("patch_schedule", lambda r, fx: (
+        "PATCH", f"/schedules/{(row := r.choice(fx.regular))['id']}", {"start_time": row["start_time"]}), ok=(200, 409)),
+    Scenario("bulk_update_regular", bulk_update, ok=(200, 409)),
+    Scenario("create_student", lambda r, fx: ("POST", "/students/", {"name": f"부하{r.getrandbits(48):x}"})),
+    Scenario("teacher_week", lambda r, fx: ("GET", f"/teachers/{r.randint(1, fx.teachers)}/schedules", None)),
+    Scenario("room_week", lambda r, fx: ("GET", f"/rooms/{r.randint(1, fx.rooms)}/schedules", None)),
+    Scenario("room_week_by_name", lambda r, fx: ("GET", f"/rooms/by_name/{r.choice(fx.room_names)}/schedules", None)),
+    Scenario("student_week", lambda r, fx: ("GET", f"/students/{r.randint(1, fx.students)}/schedules", None)),
+    Scenario("list_skip", lambda r, fx: ("GET", f"/schedules/?skip={r.randrange(0, 5000, 100)}&limit=100", None)),
+    Scenario("list_filtered", lambda r, fx: ("GET", f"/schedules/?teacher_id={r.randint(1, fx.teachers)}&limit=100", None)),
+    Scenario("list_compact", lambda r, fx: ("GET", "/schedules/?limit=1000&compact=true", None), share=0.25),
+    Scenario("schedules_by", lambda r, fx: (
+        "GET", "/schedules/by?teacher_ids=" + ",".join(str(r.randint(1, fx.teachers)) for _ in range(5)), None)),
+    Scenario("changes", lambda r, fx: ("GET", "/schedules/changes?since=0&limit=100", None)),
+    Scenario("teachers", lambda r, fx: ("GET", "/teachers/?limit=100", None)),
+    Scenario("teacher", lambda r, fx: ("GET", f"/teachers/{r.randint(1, fx.teachers)}", None)),
+    Scenario("rooms", lambda r, fx: ("GET", "/rooms/?limit=100", None)),
+    Scenario("students", lambda r, fx: ("GET", f"/students/?skip={r.randrange(0, fx.students, 100)}&limit=100", None)),
+    Scenario("grid", lambda r, fx: ("GET", f"/timetable/grid?teacher_id={r.randint(1, fx.teachers)}", None)),
+    Scenario("availability", lambda r, fx: (
+        "GET", f"/availability?duration=60&teacher_id={r.randint(1, fx.teachers)}&student_id={r.randint(1, fx.students)}", None)),
+    Scenario("availability_day", availability_day),
+    Scenario("calendar", calendar),
+    Scenario("export_ndjson", lambda r, fx: ("GET", f"/schedules/export?format=ndjson&teacher_id={r.randint(1, fx.teachers)}", None)),
+    Scenario("export_ics", lambda r, fx: ("GET", f"/schedules/export?format=ics&room_id={r.randint(1, fx.rooms)}", None)),
+    Scenario("import_dry_run", import_dry_run, ok=(200, 400)),
+    Scenario("auto_place", auto_place, share=0.25),
+    Scenario("cache_stats", lambda r, fx: ("GET", "/admin/cache/stats", None), share=0.1),
+    Scenario("metrics", lambda r, fx: ("GET", "/metrics", None), share=0.1),
+    Scenario("admin_conflicts", lambda r, fx: ("GET", "/admin/conflicts", None), share=0.01),
+]
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    # nearest-rank
+    return sorted_values[max(int(math.ceil(p * len(sorted_values))) - 1, 0)]
+
+async def run_scenario(client, scenario: Scenario, fx: Fixture, requests: int, concurrency: int, seed: int) -> dict:
+    rnd = random.Random(f"{seed}:{scenario.name}")
+    calls = [scenario.build(rnd, fx) for _ in range(max(1, int(requests * scenario.share)))]
+    queue = list(reversed(calls))
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def worker():
+        while queue:
+            method, path, body = queue.pop()
+            t0 = time.perf_counter()
+            r = await client.request(method, path, json=body)
+            await r.aread()
+            latencies.append(time.perf_counter() - t0)
+            if r.status_code not in scenario.ok:
+                errors[str(r.status_code)] = errors.get(str(r.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(calls)))))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "n": len(latencies),
+        "errors": sum(errors.values()),
+        "statuses": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "rps": len(latencies) / elapsed,
+    }
+
+def prepare(args) -> Tuple[Fixture, dict]:
+    # 스키마를 만들고, 비어 있으면 가상 데이터를 넣은 뒤 시나리오에 쓸 표본을 읽는다
+    from sqlalchemy import func, select
+    from sqlalchemy.orm import Session
+    from app import database, models
+    from bench import synthetic
+
+    database.create_tables()
+    summary = {}
+    with Session(database.engine_sync) as db:
+        if not db.query(models.Schedule.id).first():
+            t0 = time.perf_counter()
+            summary = synthetic.generate(db, teachers=args.teachers, rooms=args.rooms, students=args.students,
+                                         schedules=args.schedules, seed=args.seed)
+            summary["generate_s"] = round(time.perf_counter() - t0, 2)
+        s = models.Schedule
+        rows = db.execute(
+            select(s.id, s.teacher_id, s.student_id, s.room_id, s.day_of_week, s.start_time, s.end_time, s.type)
+            .where(s.is_regular == 1, s.student_id.is_not(None)).order_by(s.id).limit(2000)
+        ).all()
+        fx = Fixture(
+            teachers=db.scalar(select(func.max(models.Teacher.id))) or 1,
+            rooms=db.scalar(select(func.max(models.Room.id))) or 1,
+            students=db.scalar(select(func.max(models.Student.id))) or 1,
+            room_names=list(db.scalars(select(models.Room.name).order_by(models.Room.id).limit(500))),
+            regular=[{**row._asdict(), "type": row.type.value} for row in rows],
+        )
+        summary["schedules_in_db"] = db.scalar(select(func.count(s.id)))
+    if not fx.regular:
+        raise SystemExit("database has no regular schedules with a student")
+    return fx, summary
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int) -> subprocess.Popen:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=root, env=dict(os.environ),
+    )
+
+async def wait_ready(client, server: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"server exited with {server.returncode}")
+        try:
+            if (await client.get("/metrics")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("server did not become ready")
+
+def compare(result: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    # p95 가 기준보다 threshold 비율 이상, 그리고 min_delta_ms 이상 느려진 시나리오
+    regressions = []
+    for name, now in result["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        limit = max(before["p95_ms"] * (1 + threshold), before["p95_ms"] + min_delta_ms)
+        if now["p95_ms"] > limit:
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms (limit {limit:.1f})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario (before share)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenario", action="append", help="run only these scenarios (repeatable)")
+    parser.add_argument("--teachers", type=int, default=300)
+    parser.add_argument("--rooms", type=int, default=250)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--schedules", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--save-baseline", help="write results JSON as a baseline file")
+    parser.add_argument("--baseline", help="compare against this baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95 slowdown ratio")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore p95 slowdowns smaller than this")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.scenario:
+        unknown = set(args.scenario) - {s.name for s in SCENARIOS}
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in SCENARIOS if s.name in args.scenario]
+
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+
+    import httpx
+
+    fx, data = prepare(args)
+    print(f"data: {data}")
+
+    async def run_all() -> dict:
+        # 비동기 엔진의 커넥션 풀은 이벤트 루프에 묶이므로 모든 측정을 한 루프에서 돌린다
+        server = None
+        if args.mode == "http":
+            port = free_port()
+            server = start_server(port)
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120)
+        else:
+            from app.main import app
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+        results = {}
+        try:
+            async with client:
+                if server is not None:
+                    await wait_ready(client, server)
+                print(f"{'scenario':<20} {'n':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+                for scenario in scenarios:
+                    r = results[scenario.name] = await run_scenario(
+                        client, scenario, fx, args.requests, args.concurrency, args.seed)
+                    print(f"{scenario.name:<20} {r['n']:>5} {r['errors']:>4} {r['p50_ms']:>9.1f} "
+                          f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['rps']:>9.1f}")
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+        return results
+
+    result = {
+        "meta": {
+            "mode": args.mode,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "data": data,
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": asyncio.run(run_all()),
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    failed = [f"{name}: unexpected statuses {r['statuses']}" for name, r in result["scenarios"].items() if r["errors"]]
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("mode") != args.mode:
+            print(f"warning: baseline mode is {baseline['meta'].get('mode')}, this run is {args.mode}")
+        failed += compare(result, baseline, args.threshold, args.min_delta_ms)
+    for line in failed:
+        print(f"FAIL {line}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import tempfile
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from app import crud, models, schemas
+from bench import synthetic
+
+# crud 함수들이 실제로 실행하는 SQL 을 가로채 EXPLAIN QUERY PLAN 을 출력한다.
+# 사용법: python -m bench.explain_queries --schedules 100000
+
+def crud_cases():
+    return [
+        ("get_schedules", lambda db: crud.get_schedules(db, limit=100)),
+        ("get_schedules_by_teacher_week", lambda db: crud.get_schedules_by_teacher_week(db, 3)),
+        ("get_schedules_by_room_week", lambda db: crud.get_schedules_by_room_week(db, 5)),
+        ("find_overlapping", lambda db: crud.find_overlapping(db,
+            teacher_id=3, room_id=5, day_of_week="화요일", start_time="15:00", end_time="16:00")),
+        ("student schedules", lambda db: db.query(models.Schedule).filter(models.Schedule.student_id == 7).all()),
+        ("bulk_update_regular filter", lambda db: db.query(models.Schedule.id).filter(
+            *crud.regular_series_filter(schemas.ScheduleBulkUpdateFilter(
+                teacher_id=3, student_id=7, room_id=5, day_of_week="화요일",
+                start_time="15:00", end_time="16:00", type=schemas.ScheduleType.CLASS))
+        ).all()),
+    ]
+
+def explain(db: Session, label: str, fn):
+    captured = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    print(f"== {label}")
+    full_scans = 0
+    for statement, parameters in captured:
+        print("   " + " ".join(statement.split())[:160])
+        for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, tuple(parameters)):
+            detail = row[-1]
+            # LIMIT 만 있는 목록 조회는 스캔이 정상이므로 WHERE 가 있는 쿼리만 센다
+            if detail.startswith("SCAN schedules") and " WHERE " in statement:
+                full_scans += 1
+            print("     -> " + detail)
+    return full_scans
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", help="사용할 SQLite 파일 (없으면 임시 파일에 생성)")
+    parser.add_argument("--teachers", type=int, default=40)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--schedules", type=int, default=100000)
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "explain.db")
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    crud.OVERLAP_CHECK = "sql"
+    with Session(engine) as db:
+        if not db.query(models.Schedule.id).first():
+            synthetic.generate(db, teachers=args.teachers, rooms=args.rooms,
+                               students=args.students, schedules=args.schedules)
+        db.connection().exec_driver_sql("ANALYZE")
+        full_scans = sum(explain(db, label, fn) for label, fn in crud_cases())
+    print(f"\n{path}: schedules 전체 스캔 {full_scans}건")
+    return 1 if full_scans else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
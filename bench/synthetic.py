@@ -0,0 +1,135 @@
+import argparse
+import random
+from typing import Dict, List
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app import crud, dimension_cache, models
+from app.crud import GROUP_CLASS_TEACHERS
+
+# 가상 학원 데이터.
+# 평일은 방과 후(14:00~22:00, 16~20시에 몰림), 토요일은 낮, 일요일은 드물게. 수업 길이는 50/60/90/120분,
+# 상담은 30분. 앞쪽 선생님들은 GROUP_CLASS_TEACHERS 이름으로 만들어 한 수업에 여러 학생이 있는 단체수업을 맡는다.
+# 공간/선생님이 비어 있는 자리에 넣고, 자리가 모자라면(요청한 수가 수용량보다 많으면) 겹치게 넣는다.
+# 앱과 같이 "dimensions"/"schedules" 버전을 올리고 넣은 시간표를 변경 기록에 남기므로, 돌고 있는 워커의
+# 캐시와 증분 동기화 클라이언트도 새 데이터를 본다. 이미 데이터가 있는 DB 에는 넣지 않는다.
+# CLI: python -m bench.synthetic --schedules 20000 (DATABASE_URL 의 DB 에 넣음)
+
+SUBJECTS = ["국어", "수학", "영어", "과학", "사회"]
+
+DAY_WEIGHTS = [18, 18, 18, 18, 16, 10, 2]  # 월 ~ 일
+DAY_WINDOWS = [(14 * 60, 22 * 60)] * 5 + [(10 * 60, 18 * 60), (10 * 60, 16 * 60)]
+PEAK = (16 * 60, 20 * 60)
+CLASS_DURATIONS = [50, 60, 90, 120]
+CLASS_DURATION_WEIGHTS = [2, 5, 3, 1]
+COUNSEL_SHARE = 0.1
+PLACEMENT_TRIES = 8
+
+def start_weights(day_index: int, step: int = 30) -> Dict[str, List[int]]:
+    start, end = DAY_WINDOWS[day_index]
+    starts = list(range(start, end, step))
+    weights = [4 if day_index < 5 and PEAK[0] <= s < PEAK[1] else 1 for s in starts]
+    return {"starts": starts, "weights": weights}
+
+def span(start: int, end: int) -> int:
+    return ((1 << (end - start)) - 1) << start
+
+def generate(db: Session, *, teachers: int = 40, rooms: int = 50, students: int = 2000, schedules: int = 100000,
+             seed: int = 0, group_share: float = 0.1, group_size: int = 8) -> dict:
+    # 빈 DB 에 executemany 로 채운다 (id 는 1부터 순서대로 가정). 만든 수와 겹치게 넣은 수를 돌려준다.
+    if any(db.scalar(select(m.id).limit(1)) is not None for m in (models.Teacher, models.Room, models.Student, models.Schedule)):
+        raise ValueError("database is not empty")
+    rnd = random.Random(seed)
+    group_teachers = min(len(GROUP_CLASS_TEACHERS), max(teachers - 1, 0)) if group_share > 0 else 0
+    db.execute(models.Teacher.__table__.insert(), [
+        {"name": GROUP_CLASS_TEACHERS[i] if i < group_teachers else f"선생님{i:04d}", "subject": rnd.choice(SUBJECTS)}
+        for i in range(teachers)
+    ])
+    db.execute(models.Room.__table__.insert(), [{"name": f"강의실{i:03d}"} for i in range(rooms)])
+    db.execute(models.Student.__table__.insert(), [{"name": f"학생{i:05d}"} for i in range(students)])
+
+    windows = [start_weights(d) for d in range(7)]
+    busy: Dict[tuple, int] = {}
+
+    def pick_slot(duration: int):
+        day_index = rnd.choices(range(7), DAY_WEIGHTS)[0]
+        w = windows[day_index]
+        start = rnd.choices(w["starts"], w["weights"])[0]
+        return day_index, start, min(start + duration, 24 * 60 - 1)
+
+    def place(teacher_id: int, duration: int):
+        # 공간과 선생님이 모두 빈 자리를 몇 번 찾아보고, 없으면 마지막 후보에 겹치게 둔다
+        overlapped = True
+        for _ in range(PLACEMENT_TRIES):
+            day_index, start, end = pick_slot(duration)
+            room_id = rnd.randint(1, rooms)
+            mask = span(start, end)
+            if not (busy.get(("room", room_id, day_index), 0) & mask or busy.get(("teacher", teacher_id, day_index), 0) & mask):
+                overlapped = False
+                break
+        for key in (("room", room_id, day_index), ("teacher", teacher_id, day_index)):
+            busy[key] = busy.get(key, 0) | mask
+        return day_index, start, end, room_id, overlapped
+
+    def row(teacher_id, room_id, student_id, day_index, start, end, typ):
+        return {
+            "teacher_id": teacher_id,
+            "room_id": room_id,
+            "student_id": student_id,
+            "day_of_week": models.DAYS_OF_WEEK[day_index],
+            "day_index": day_index,
+            "start_time": models.minutes_to_time(start),
+            "end_time": models.minutes_to_time(end),
+            "start_min": start,
+            "end_min": end,
+            "type": typ,
+            "is_regular": 1,
+        }
+
+    rows = []
+    overlapping = group_classes = 0
+    group_rows = int(schedules * group_share) if group_teachers else 0
+    while len(rows) < group_rows:
+        # 단체수업: 같은 선생님/공간/시간에 학생 여러 명
+        teacher_id = rnd.randint(1, group_teachers)
+        day_index, start, end, room_id, _ = place(teacher_id, rnd.choice([90, 120]))
+        size = min(rnd.randint(max(2, group_size // 2), group_size), group_rows - len(rows), students)
+        for student_id in rnd.sample(range(1, students + 1), max(size, 1)):
+            rows.append(row(teacher_id, room_id, student_id, day_index, start, end, models.ScheduleType.CLASS))
+        group_classes += 1
+    while len(rows) < schedules:
+        counsel = rnd.random() < COUNSEL_SHARE
+        duration = 30 if counsel else rnd.choices(CLASS_DURATIONS, CLASS_DURATION_WEIGHTS)[0]
+        teacher_id = rnd.randint(group_teachers + 1, teachers) if teachers > group_teachers else rnd.randint(1, teachers)
+        day_index, start, end, room_id, overlapped = place(teacher_id, duration)
+        overlapping += overlapped
+        typ = models.ScheduleType.COUNSEL if counsel else models.ScheduleType.CLASS
+        rows.append(row(teacher_id, room_id, rnd.randint(1, students), day_index, start, end, typ))
+
+    for i in range(0, len(rows), 10000):
+        db.execute(models.Schedule.__table__.insert(), rows[i:i + 10000])
+    dimension_cache.bump(db)
+    crud.log_change(db, "insert", db.scalars(select(models.Schedule.id).order_by(models.Schedule.id)))
+    db.commit()
+    return {"schedules": len(rows), "group_classes": group_classes, "overlapping": overlapping}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teachers", type=int, default=300)
+    parser.add_argument("--rooms", type=int, default=250)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--schedules", type=int, default=10000)
+    parser.add_argument("--group-share", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    from app import database
+    database.create_tables()
+    with Session(database.engine_sync) as db:
+        try:
+            summary = generate(db, teachers=args.teachers, rooms=args.rooms, students=args.students,
+                               schedules=args.schedules, seed=args.seed, group_share=args.group_share)
+        except ValueError as e:
+            parser.error(str(e))
+    print(summary)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def get_url():
+    # alembic -x tenant=<지점> upgrade head : 지점 DB (TENANT_DATABASE_URL 틀)
+    tenant = context.get_x_argument(as_dictionary=True).get("tenant")
+    if tenant:
+        from app.tenancy import registry
+        return registry.sync_url(tenant, create=True)  # 새 지점 DB 도 만든다 (운영자 작업)
+    return config.get_main_option("sqlalchemy.url") or SQLALCHEMY_DATABASE_URL
+
+def run_migrations_offline():
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connectable = create_engine(get_url())
+    with connectable.connect() as connection:
+        # SQLite 는 ALTER TABLE 이 제한적이라 batch 모드로 컬럼/인덱스를 변경한다
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,70 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 기존 academy_schedule.db 처럼 create_all 로 이미 만들어진 테이블은 건너뛴다
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if "teachers" not in existing:
+        op.create_table(
+            "teachers",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("subject", sa.String(), nullable=True),
+        )
+        op.create_index("ix_teachers_id", "teachers", ["id"])
+        op.create_index("ix_teachers_name", "teachers", ["name"], unique=True)
+    if "rooms" not in existing:
+        op.create_table(
+            "rooms",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+        )
+        op.create_index("ix_rooms_id", "rooms", ["id"])
+        op.create_index("ix_rooms_name", "rooms", ["name"], unique=True)
+    if "students" not in existing:
+        op.create_table(
+            "students",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+        )
+        op.create_index("ix_students_id", "students", ["id"])
+        op.create_index("ix_students_name", "students", ["name"], unique=True)
+    if "schedules" not in existing:
+        op.create_table(
+            "schedules",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("teacher_id", sa.Integer(), sa.ForeignKey("teachers.id"), nullable=True),
+            sa.Column("room_id", sa.Integer(), sa.ForeignKey("rooms.id"), nullable=True),
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id"), nullable=True),
+            sa.Column("day_of_week", sa.String(), nullable=False),
+            sa.Column("start_time", sa.String(), nullable=False),
+            sa.Column("end_time", sa.String(), nullable=False),
+            sa.Column("type", sa.Enum("CLASS", "COUNSEL", name="scheduletype"), nullable=False),
+            sa.Column("is_regular", sa.Integer(), nullable=True),
+            sa.Column("change_type", sa.Enum("NORMAL", "CHANGED", "SUPPLEMENT", name="changetype"), nullable=True),
+        )
+        op.create_index("ix_schedules_id", "schedules", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("schedules")
+    op.drop_table("students")
+    op.drop_table("rooms")
+    op.drop_table("teachers")
@@ -0,0 +1,79 @@
+"""schedule minute-of-day and day ordinal columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 마이그레이션은 당시 스키마 기준으로 고정되어야 하므로 app.models 의 헬퍼를 가져오지 않는다
+DAYS_OF_WEEK = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
+
+
+def _minutes(value):
+    hour, minute = value.strip().split(":")
+    return int(hour) * 60 + int(minute)
+
+
+def upgrade() -> None:
+    # create_all 로 새 모델 기준 테이블이 이미 만들어졌다면 컬럼 추가는 건너뛰고 값만 채운다
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("schedules")}
+    if "start_min" not in columns:
+        with op.batch_alter_table("schedules") as batch:
+            batch.add_column(sa.Column("day_index", sa.Integer(), nullable=True))
+            batch.add_column(sa.Column("start_min", sa.Integer(), nullable=True))
+            batch.add_column(sa.Column("end_min", sa.Integer(), nullable=True))
+
+    # 기존 "HH:MM" 문자열에서 정수 컬럼을 채운다
+    bind = op.get_bind()
+    schedules = sa.table(
+        "schedules",
+        sa.column("id", sa.Integer),
+        sa.column("day_of_week", sa.String),
+        sa.column("start_time", sa.String),
+        sa.column("end_time", sa.String),
+        sa.column("day_index", sa.Integer),
+        sa.column("start_min", sa.Integer),
+        sa.column("end_min", sa.Integer),
+    )
+    rows = bind.execute(
+        sa.select(schedules.c.id, schedules.c.day_of_week, schedules.c.start_time, schedules.c.end_time)
+    ).all()
+    params = [
+        {
+            "_id": sid,
+            "day_index": DAYS_OF_WEEK.index(day) if day in DAYS_OF_WEEK else None,
+            "start_min": _minutes(start),
+            "end_min": _minutes(end),
+        }
+        for sid, day, start, end in rows
+    ]
+    if params:
+        bind.execute(
+            schedules.update()
+            .where(schedules.c.id == sa.bindparam("_id"))
+            .values(
+                day_index=sa.bindparam("day_index"),
+                start_min=sa.bindparam("start_min"),
+                end_min=sa.bindparam("end_min"),
+            ),
+            params,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("schedules") as batch:
+        batch.drop_column("end_min")
+        batch.drop_column("start_min")
+        batch.drop_column("day_index")
@@ -0,0 +1,39 @@
+"""composite indexes for schedule access paths
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_schedules_room_day": ["room_id", "day_of_week", "start_min", "end_min"],
+    "ix_schedules_teacher_day": ["teacher_id", "day_of_week", "start_min", "end_min"],
+    "ix_schedules_student": ["student_id", "day_index", "start_min"],
+    "ix_schedules_regular_series": [
+        "teacher_id", "student_id", "room_id", "day_of_week", "start_time", "end_time", "type", "is_regular",
+    ],
+}
+
+
+def upgrade() -> None:
+    existing = {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("schedules")}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "schedules", columns)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, table_name="schedules")
@@ -0,0 +1,30 @@
+"""day ordinal for unknown days and list order index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 커서 비교에 NULL 이 섞이지 않도록 알 수 없는 요일은 7 로 채운다
+    op.execute("UPDATE schedules SET day_index = 7 WHERE day_index IS NULL")
+    existing = {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("schedules")}
+    if "ix_schedules_order" not in existing:
+        op.create_index("ix_schedules_order", "schedules", ["day_index", "start_min", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_schedules_order", table_name="schedules")
@@ -0,0 +1,38 @@
+"""optional effective dates on schedules
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 기존 행은 날짜 없음(NULL): 정규 수업은 기간 제한 없이 반복
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("schedules")}
+    if "effective_from" not in columns:
+        with op.batch_alter_table("schedules") as batch:
+            batch.add_column(sa.Column("effective_from", sa.Date(), nullable=True))
+            batch.add_column(sa.Column("effective_to", sa.Date(), nullable=True))
+    existing = {ix["name"] for ix in inspector.get_indexes("schedules")}
+    if "ix_schedules_effective" not in existing:
+        op.create_index("ix_schedules_effective", "schedules", ["is_regular", "effective_from"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_schedules_effective", table_name="schedules")
+    with op.batch_alter_table("schedules") as batch:
+        batch.drop_column("effective_to")
+        batch.drop_column("effective_from")
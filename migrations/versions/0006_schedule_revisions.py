@@ -0,0 +1,39 @@
+"""schedule revision log
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 기록은 이 시점부터 쌓인다. 그 전의 시간표는 클라이언트가 처음 한 번 전체를 받는다(resync).
+    inspector = sa.inspect(op.get_bind())
+    if "schedule_revisions" in inspector.get_table_names():
+        return
+    op.create_table(
+        "schedule_revisions",
+        sa.Column("rev", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("schedule_id", sa.Integer(), nullable=True),
+        sa.Column("op", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_schedule_revisions_schedule_id", "schedule_revisions", ["schedule_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_schedule_revisions_schedule_id", table_name="schedule_revisions")
+    op.drop_table("schedule_revisions")
@@ -0,0 +1,28 @@
+"""schedules cache version stamp
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "INSERT INTO cache_versions (name, version) "
+        "SELECT 'schedules', 0 WHERE NOT EXISTS (SELECT 1 FROM cache_versions WHERE name = 'schedules')"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM cache_versions WHERE name = 'schedules'")
@@ -0,0 +1,34 @@
+"""regular series index on start_min/end_min
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NAME = "ix_schedules_regular_series"
+LEADING = ["teacher_id", "student_id", "room_id", "day_of_week"]
+TRAILING = ["type", "is_regular"]
+
+
+def upgrade() -> None:
+    existing = {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("schedules")}
+    if NAME in existing:
+        op.drop_index(NAME, table_name="schedules")
+    op.create_index(NAME, "schedules", LEADING + ["start_min", "end_min"] + TRAILING)
+
+
+def downgrade() -> None:
+    op.drop_index(NAME, table_name="schedules")
+    op.create_index(NAME, "schedules", LEADING + ["start_time", "end_time"] + TRAILING)
@@ -0,0 +1,21 @@
+import os
+import tempfile
+import pytest
+
+# app 은 import 할 때 환경 변수를 읽으므로 그 전에 임시 SQLite DB 로 돌린다.
+# 캐시 버전 확인 주기를 길게 잡아 SQL 문장 수가 실행 시각에 따라 달라지지 않게 한다.
+_workdir = tempfile.mkdtemp(prefix="academy-test-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/test.db"
+os.environ["DB_CREATE_SCHEMA"] = "1"
+os.environ["DIMENSION_CACHE_CHECK_SECONDS"] = "3600"
+os.environ["SCHEDULE_VERSION_CHECK_SECONDS"] = "3600"
+os.environ["SCHEDULE_LOG_COMPACT_INTERVAL"] = "0"
+for key in ("DATABASE_READ_URL", "TENANT_DATABASE_URL", "CHANGEFEED_BACKEND"):
+    os.environ.pop(key, None)
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,82 @@
+from app import models
+
+# POST /schedules/bulk_update_regular: 시각 표기가 달라도 같은 묶음을 찾고, 여러 쌍을 한 트랜잭션으로 옮기며,
+# 잘못된 값이나 겹침이면 아무 행도 바꾸지 않는다.
+
+DAY = "금요일"
+
+def entity(client, kind: str, name: str) -> int:
+    body = {"name": name, "subject": "영어"} if kind == "teacher" else {"name": name}
+    return client.post(f"/{kind}s/", json=body).json()["id"]
+
+def setup(client, prefix: str, students: int = 2) -> dict:
+    ids = {"teacher": entity(client, "teacher", f"{prefix}-T"), "room": entity(client, "room", f"{prefix}-R"),
+           "students": [entity(client, "student", f"{prefix}-S{i}") for i in range(students)]}
+    return ids
+
+def create(client, ids: dict, student: int, start: str, end: str) -> int:
+    response = client.post("/schedules/", json={
+        "teacher_id": ids["teacher"], "room_id": ids["room"], "student_id": student, "day_of_week": DAY,
+        "start_time": start, "end_time": end, "type": "수업"})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def series(ids: dict, student: int, start: str, end: str) -> dict:
+    return {"teacher_id": ids["teacher"], "student_id": student, "room_id": ids["room"], "day_of_week": DAY,
+            "start_time": start, "end_time": end, "type": "수업"}
+
+def times(client, ids: dict) -> dict:
+    rows = client.get(f"/rooms/{ids['room']}/schedules").json()
+    return {r["student_id"]: (r["day_of_week"], models.time_to_minutes(r["start_time"]),
+                              models.time_to_minutes(r["end_time"])) for r in rows}
+
+def bulk(client, *items):
+    return client.post("/schedules/bulk_update_regular/",
+                       json={"items": [{"filter": f, "update": u} for f, u in items]})
+
+def test_filter_matches_single_digit_hours(client):
+    ids = setup(client, "BU-HOUR", students=1)
+    sid = create(client, ids, ids["students"][0], "9:00", "9:50")  # 시간표 텍스트 파서가 내는 형식
+    response = bulk(client, (series(ids, ids["students"][0], "09:00", "09:50"), {"start_time": "10:00", "end_time": "10:50"}))
+    assert response.status_code == 200
+    assert response.json() == {"updated": 1, "ids": [sid]}
+    assert times(client, ids)[ids["students"][0]] == (DAY, 600, 650)
+
+def test_multi_item_update_moves_each_series(client):
+    ids = setup(client, "BU-MULTI")
+    a, b = ids["students"]
+    create(client, ids, a, "13:00", "14:00")
+    create(client, ids, b, "14:00", "15:00")
+    # 서로 자리를 바꾼다: 따로 하면 중간에 겹치지만 한 번에 검사하므로 된다
+    response = bulk(client,
+                    (series(ids, a, "13:00", "14:00"), {"start_time": "14:00", "end_time": "15:00"}),
+                    (series(ids, b, "14:00", "15:00"), {"start_time": "13:00", "end_time": "14:00"}))
+    assert response.status_code == 200
+    assert response.json()["updated"] == 2
+    assert times(client, ids) == {a: (DAY, 840, 900), b: (DAY, 780, 840)}
+
+def test_invalid_merged_time_changes_nothing(client):
+    ids = setup(client, "BU-INVALID")
+    a, b = ids["students"]
+    create(client, ids, a, "16:00", "17:00")
+    create(client, ids, b, "17:00", "18:00")
+    before = times(client, ids)
+    response = bulk(client,
+                    (series(ids, a, "16:00", "17:00"), {"day_of_week": "토요일"}),
+                    (series(ids, b, "17:00", "18:00"), {"start_time": "18:30"}))  # 끝(18:00)보다 늦은 시작
+    assert response.status_code == 422
+    assert times(client, ids) == before
+    assert bulk(client, (series(ids, a, "16:00", "17:00"), {"start_time": "25:00"})).status_code == 422
+
+def test_conflict_rolls_back_every_item(client):
+    ids = setup(client, "BU-CONFLICT", students=3)
+    a, b, c = ids["students"]
+    create(client, ids, a, "19:00", "20:00")
+    create(client, ids, b, "20:00", "21:00")
+    create(client, ids, c, "21:00", "22:00")
+    before = times(client, ids)
+    response = bulk(client,
+                    (series(ids, a, "19:00", "20:00"), {"day_of_week": "토요일"}),
+                    (series(ids, b, "20:00", "21:00"), {"start_time": "21:30", "end_time": "22:30"}))
+    assert response.status_code == 409
+    assert times(client, ids) == before
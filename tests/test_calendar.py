@@ -0,0 +1,62 @@
+import asyncio
+from datetime import date
+from app import database, occurrences
+from app.occurrences import WeekCache
+from app.timetable_cache import Revisions
+
+# 달력 (GET /calendar): 정규 수업 펼치기와 "변경" 대체, 한 주씩 읽는 생성기, 수업 수로 제한하는 주 캐시.
+
+def entity(client, kind: str, name: str) -> int:
+    body = {"name": name, "subject": "국어"} if kind == "teacher" else {"name": name}
+    return client.post(f"/{kind}s/", json=body).json()["id"]
+
+def calendar(client, start: str, end: str, **filters):
+    response = client.get("/calendar", params={"from": start, "to": end, **filters})
+    assert response.status_code == 200
+    return [(o["date"], o["start_time"], o["schedule_id"]) for o in response.json()]
+
+def test_weekly_lessons_and_changes(client):
+    teacher, room = entity(client, "teacher", "CAL-T"), entity(client, "room", "CAL-R")
+    lesson = client.post("/schedules/", json={"teacher_id": teacher, "room_id": room, "day_of_week": "목요일",
+                                              "start_time": "15:00", "end_time": "16:00", "type": "수업"}).json()["id"]
+    change = client.post("/schedules/", json={
+        "teacher_id": teacher, "room_id": room, "day_of_week": "금요일", "start_time": "17:00", "end_time": "18:00",
+        "type": "수업", "is_regular": False, "change_type": "변경", "effective_from": "2031-03-14"}).json()["id"]
+    # 2031-03-06, 03-13, 03-20 은 목요일. 03-13 수업은 그 주 금요일 변경으로 바뀐다
+    assert calendar(client, "2031-03-05", "2031-03-21", teacher_id=teacher) == [
+        ("2031-03-06", "15:00", lesson), ("2031-03-14", "17:00", change), ("2031-03-20", "15:00", lesson)]
+    assert calendar(client, "2031-03-07", "2031-03-13", room_id=room) == []
+    assert client.get("/calendar", params={"from": "2031-03-05", "to": "2031-03-01"}).status_code == 400
+
+def test_occurrences_reads_one_week_at_a_time(client, monkeypatch):
+    teacher, room = entity(client, "teacher", "CAL-LAZY-T"), entity(client, "room", "CAL-LAZY-R")
+    client.post("/schedules/", json={"teacher_id": teacher, "room_id": room, "day_of_week": "월요일",
+                                     "start_time": "10:00", "end_time": "11:00", "type": "수업"})
+    occurrences.week_cache.clear()
+    queried = []
+    week_query = occurrences.week_query
+    monkeypatch.setattr(occurrences, "week_query", lambda monday, **kw: queried.append(monday) or week_query(monday, **kw))
+
+    async def first():
+        async with database.ReadSessionLocal() as db:
+            async for item in occurrences.occurrences(db, date(2032, 1, 1), date(2032, 12, 31), teacher_id=teacher):
+                return item
+
+    assert asyncio.run(first())["date"] == "2032-01-05"
+    assert queried == [date(2031, 12, 29), date(2032, 1, 5)]
+
+def test_week_cache_is_bounded_by_occurrences():
+    revisions = Revisions()
+    cache = WeekCache(revisions, max_occurrences=5)
+    everything = ("all", 0)
+    cache.put("a", everything, revisions.get(*everything), [{}] * 2)
+    cache.put("b", everything, revisions.get(*everything), [{}] * 2)
+    assert cache.get("a") is not None  # a 가 최근, b 가 가장 오래됨
+    cache.put("c", everything, revisions.get(*everything), [{}] * 3)
+    assert cache.stats()["occurrences"] == 5 and cache.get("b") is None
+    cache.put("big", everything, revisions.get(*everything), [{}] * 6)  # 한도보다 큰 주는 담지 않는다
+    assert cache.get("big") is None and cache.stats()["occurrences"] == 5
+    cache.put("c", everything, revisions.get(*everything), [{}])  # 같은 키를 다시 넣으면 바꾼다
+    assert cache.stats()["occurrences"] == 3
+    revisions.touch()
+    assert cache.get("a") is None and cache.stats()["occurrences"] == 1
@@ -0,0 +1,70 @@
+import asyncio
+import sqlite3
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app import database
+
+# tuned SQLite: 쓰기 트랜잭션은 첫 문장(읽기여도)에서 쓰기 잠금을 잡고, 조회 전용 엔진은 잡지 않는다.
+# 워커 안의 쓰기 세션(get_db)은 write_gate 로 하나씩 열린다.
+
+def other_writer_locked(path: str) -> bool:
+    conn = sqlite3.connect(path, timeout=0, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("ROLLBACK")
+        return False
+    except sqlite3.OperationalError:
+        return True
+    finally:
+        conn.close()
+
+@pytest.fixture
+def target(tmp_path):
+    path = str(tmp_path / "immediate.db")
+    db = database.Database(f"sqlite+aiosqlite:///{path}", profile="tuned")
+    db.create_tables()
+    yield db, path
+    asyncio.run(db.dispose())
+
+def test_write_session_begins_immediate(target):
+    db, path = target
+    assert database.begins_immediate(db.engine_sync())
+    with Session(db.engine_sync()) as session:
+        session.execute(text("SELECT count(*) FROM schedules")).scalar()
+        assert other_writer_locked(path)
+    assert not other_writer_locked(path)
+
+def test_read_engine_does_not_take_write_lock(target):
+    db, path = target
+
+    async def read():
+        async with AsyncSession(db.engine_read_async()) as session:
+            await session.execute(text("SELECT count(*) FROM schedules"))
+            return other_writer_locked(path)
+
+    assert not database.begins_immediate(db.engine_read_async().sync_engine)
+    assert asyncio.run(read()) is False
+
+def test_basic_profile_keeps_driver_default(tmp_path):
+    db = database.Database(f"sqlite+aiosqlite:///{tmp_path / 'basic.db'}", profile="basic")
+    assert not database.begins_immediate(db.engine_sync())
+    assert not database.begins_immediate(db.engine_async().sync_engine)
+
+def test_write_gate_opens_one_session_at_a_time(target):
+    db, _ = target
+    inside, seen = [], []
+
+    async def write(n: int):
+        async with db.write_gate():
+            inside.append(n)
+            seen.append(len(inside))
+            await asyncio.sleep(0.01)
+            inside.remove(n)
+
+    async def main():
+        await asyncio.gather(*(write(n) for n in range(5)))
+
+    asyncio.run(main())
+    assert seen == [1] * 5
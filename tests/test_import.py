@@ -0,0 +1,76 @@
+import pytest
+
+# POST /schedules/import: 배치 안의 겹침, 기존 시간표와의 겹침, on_conflict(abort/skip/allow), dry run.
+
+def row(prefix: str, teacher: str, room: str, start: str, end: str, day: str = "목요일", student: str = None) -> dict:
+    return dict(teacher=f"{prefix}-{teacher}", room=f"{prefix}-{room}", student=student and f"{prefix}-{student}",
+                day_of_week=day, start_time=start, end_time=end, type="수업", subject="수학")
+
+def names(client, kind: str, prefix: str) -> set:
+    return {e["name"] for e in client.get(f"/{kind}s/").json() if e["name"].startswith(prefix + "-")}
+
+def schedules_in(client, prefix: str) -> list:
+    rooms = [e["id"] for e in client.get("/rooms/").json() if e["name"].startswith(prefix + "-")]
+    return [s for r in rooms for s in client.get(f"/rooms/{r}/schedules").json()]
+
+def run(client, rows, **options):
+    return client.post("/schedules/import", json={"rows": rows, **options})
+
+def test_conflict_within_batch_aborts_everything(client):
+    rows = [row("IMA", "T1", "R1", "10:00", "11:00", student="S1"),
+            row("IMA", "T2", "R1", "10:30", "11:30"),   # 0번과 같은 공간
+            row("IMA", "T1", "R2", "10:45", "11:15")]   # 0번과 같은 선생님
+    response = run(client, rows)
+    assert response.status_code == 409
+    detail = response.json()["detail"]
+    assert detail["inserted"] == 0 and detail["skipped"] == 3
+    assert (detail["created_teachers"], detail["created_rooms"], detail["created_students"]) == (0, 0, 0)
+    assert [(c["row"], c["kind"], c["other_row"]) for c in detail["conflicts"]] == [(1, "room", 0), (2, "teacher", 0)]
+    assert not names(client, "teacher", "IMA") and not names(client, "room", "IMA") and not names(client, "student", "IMA")
+
+def test_conflict_with_existing_schedule(client):
+    assert run(client, [row("IME", "T1", "R1", "14:00", "15:00")]).json()["inserted"] == 1
+    existing = schedules_in(client, "IME")[0]["id"]
+    response = run(client, [row("IME", "T2", "R1", "14:30", "15:30"), row("IME", "T3", "R2", "14:30", "15:30")])
+    assert response.status_code == 409
+    conflicts = response.json()["detail"]["conflicts"]
+    assert [(c["row"], c["kind"], c["schedule_id"]) for c in conflicts] == [(0, "room", existing)]
+    assert names(client, "teacher", "IME") == {"IME-T1"}
+
+def test_skip_inserts_only_rows_without_conflicts(client):
+    rows = [row("IMS", "T1", "R1", "09:00", "10:00"),
+            row("IMS", "T2", "R1", "09:30", "10:30"),
+            row("IMS", "T3", "R2", "09:30", "10:30", student="S1")]
+    body = run(client, rows, on_conflict="skip").json()
+    assert (body["inserted"], body["skipped"]) == (2, 1)
+    assert (body["created_teachers"], body["created_rooms"], body["created_students"]) == (3, 2, 1)
+    assert sorted(s["teacher"]["name"] for s in schedules_in(client, "IMS")) == ["IMS-T1", "IMS-T3"]
+
+def test_skip_with_every_row_conflicting_creates_nothing(client):
+    assert run(client, [row("IMK", "T1", "R1", "16:00", "18:00")]).json()["inserted"] == 1
+    rows = [row("IMK", "T2", "R1", "16:00", "17:00", student="S1"), row("IMK", "T3", "R1", "17:00", "18:00")]
+    body = run(client, rows, on_conflict="skip").json()
+    assert (body["inserted"], body["skipped"]) == (0, 2)
+    assert (body["created_teachers"], body["created_rooms"], body["created_students"]) == (0, 0, 0)
+    assert names(client, "teacher", "IMK") == {"IMK-T1"} and not names(client, "student", "IMK")
+
+def test_allow_inserts_conflicting_rows(client):
+    rows = [row("IML", "T1", "R1", "19:00", "20:00"), row("IML", "T2", "R1", "19:00", "20:00")]
+    body = run(client, rows, on_conflict="allow").json()
+    assert (body["inserted"], body["skipped"], len(body["conflicts"])) == (2, 0, 1)
+    assert len(schedules_in(client, "IML")) == 2
+
+@pytest.mark.parametrize("on_conflict", ["abort", "skip", "allow"])
+def test_dry_run_writes_nothing(client, on_conflict):
+    prefix = f"IMD{on_conflict}"
+    rows = [row(prefix, "T1", "R1", "11:00", "12:00", student="S1"), row(prefix, "T2", "R1", "11:30", "12:30")]
+    response = run(client, rows, on_conflict=on_conflict, dry_run=True)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["dry_run"] and body["inserted"] == 0
+    assert (body["created_teachers"], body["created_rooms"], body["created_students"]) == (2, 1, 1)
+    assert [(c["row"], c["other_row"]) for c in body["conflicts"]] == [(1, 0)]
+    assert not names(client, "teacher", prefix) and not names(client, "room", prefix)
+    # 같은 입력을 실제로 넣으면 dry run 과 같은 결과
+    real = run(client, rows, on_conflict="allow").json()
+    assert (real["created_teachers"], real["created_rooms"], real["created_students"]) == (2, 1, 1)
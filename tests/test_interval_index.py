@@ -0,0 +1,102 @@
+import os
+from sqlalchemy.orm import Session
+from app import crud, database, schemas
+from app.interval_index import IntervalIndex, schedule_index
+
+# 겹침 인덱스: 추가/삭제, 단체수업 예외, 만료된 인덱스 다시 읽기, 다른 워커의 쓰기("schedules" 버전) 반영.
+
+DAY = "수요일"
+
+def add(index: IntervalIndex, sid: int, start: int, end: int, *, teacher: int = 1, room: int = 1, exempt: bool = False):
+    index.add(sid, teacher_id=teacher, room_id=room, day_of_week=DAY, start_min=start, end_min=end, exempt=exempt)
+
+def conflicts(index: IntervalIndex, start: int, end: int, *, teacher: int = 99, room: int = 1, exclude=None) -> bool:
+    return index.conflicts(teacher_id=teacher, room_id=room, day_of_week=DAY, start_min=start, end_min=end,
+                           exclude_schedule_id=exclude)
+
+def test_add_remove():
+    index = IntervalIndex()
+    add(index, 1, 600, 660)
+    add(index, 2, 700, 760)
+    assert conflicts(index, 630, 690)
+    assert conflicts(index, 590, 601)
+    assert not conflicts(index, 660, 700)  # 끝과 시작이 맞닿는 것은 겹침이 아니다
+    assert not conflicts(index, 630, 690, exclude=1)
+    assert conflicts(index, 600, 660, teacher=1, room=5)  # 같은 선생님
+    assert not conflicts(index, 600, 660, room=None, teacher=None)
+    index.remove(1)
+    assert not conflicts(index, 630, 690)
+    add(index, 2, 600, 660)  # 같은 id 를 다시 넣으면 옮긴다
+    assert conflicts(index, 630, 690)
+    assert not conflicts(index, 720, 740)
+    assert len(index) == 1
+
+def test_removing_longest_interval_shrinks_scan():
+    index = IntervalIndex()
+    add(index, 1, 0, 1200)
+    for sid in range(2, 12):
+        add(index, sid, 60 * sid, 60 * sid + 30)
+    key = ("room", 1, DAY)
+    assert index._max_len[key] == 1200
+    assert conflicts(index, 1170, 1180)
+    index.remove(1)
+    assert index._max_len[key] == 30
+    assert not conflicts(index, 1170, 1180)
+    assert conflicts(index, 665, 670)
+    for sid in range(2, 12):
+        index.remove(sid)
+    assert key not in index._max_len
+    assert not index._buckets[key]
+
+def test_exempt_entries_are_not_indexed():
+    index = IntervalIndex()
+    add(index, 1, 600, 660, exempt=True)
+    assert not conflicts(index, 600, 660)
+    assert not conflicts(index, 600, 660, teacher=1)
+    index.remove(1)
+    assert len(index) == 0
+
+def create(client, teacher_id: int, room_id: int, start: str, end: str, day: str = DAY):
+    return client.post("/schedules/", json={"teacher_id": teacher_id, "room_id": room_id, "day_of_week": day,
+                                            "start_time": start, "end_time": end, "type": "수업"})
+
+def entity(client, kind: str, name: str) -> int:
+    body = {"name": name, "subject": "수학"} if kind == "teacher" else {"name": name}
+    return client.post(f"/{kind}s/", json=body).json()["id"]
+
+def test_group_class_teacher_may_overlap(client):
+    teacher = entity(client, "teacher", crud.GROUP_CLASS_TEACHERS[0])
+    rooms = [entity(client, "room", f"IX-GROUP-{i}") for i in range(3)]
+    assert create(client, teacher, rooms[0], "10:00", "12:00").status_code == 200
+    assert create(client, teacher, rooms[1], "11:00", "13:00").status_code == 200
+    other = entity(client, "teacher", "IX-GROUP-T")
+    # 단체수업과 겹쳐도 되지만, 같은 공간의 보통 수업과는 겹치면 안 된다
+    assert create(client, other, rooms[0], "11:00", "11:30").status_code == 200
+    assert create(client, other, rooms[2], "11:15", "11:45").status_code == 409
+
+def test_stale_index_is_rebuilt_from_database(client):
+    teacher, room = entity(client, "teacher", "IX-STALE-T"), entity(client, "room", "IX-STALE-R")
+    assert create(client, teacher, room, "09:00", "10:00").status_code == 200
+    schedule_index.invalidate()
+    schedule_index.clear()
+    assert create(client, teacher, room, "09:30", "10:30").status_code == 409
+    assert not schedule_index.is_stale()
+    assert create(client, teacher, room, "10:00", "11:00").status_code == 200
+
+def test_other_worker_write_is_seen(client):
+    # 같은 DB 를 쓰는 다른 워커: 따로 만든 Database 는 자기 인덱스와 버전 도장(PerDatabase)을 갖는다
+    teacher, room = entity(client, "teacher", "IX-WORKER-T"), entity(client, "room", "IX-WORKER-R")
+    assert create(client, teacher, room, "15:00", "16:00").status_code == 200  # 이 워커의 인덱스를 채운다
+    version = crud.schedule_version.stats()["version"]
+    other = database.Database(os.environ["DATABASE_URL"])
+    token = database.use(other)
+    try:
+        with Session(other.engine_sync()) as db:
+            crud.create_schedule(db, schemas.ScheduleCreate(
+                teacher_id=teacher, room_id=room, day_of_week=DAY, start_time="17:00", end_time="18:00", type="수업"))
+    finally:
+        database.reset(token)
+        other.engine_sync().dispose()
+    assert create(client, teacher, room, "17:30", "18:30").status_code == 409
+    assert crud.schedule_version.stats()["version"] == version + 1
+    assert create(client, teacher, room, "18:00", "19:00").status_code == 200
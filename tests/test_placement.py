@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing
+from itertools import combinations
+from app import placement
+from app.placement import Lesson, Slot, solve
+
+# 자동 배치: 겹치지 않는 배치, 기존 시간표/단체수업 예외, 되돌리기, 자리가 없을 때의 사유, 계산 프로세스 종료.
+
+MON, TUE = "월요일", "화요일"
+WINDOW = dict(window_start=600, window_end=780, step=30, max_backtracks=100)
+
+def lesson(teacher: int, duration: int, days=(MON,), rooms=(1,), student=None, exempt=False) -> Lesson:
+    return Lesson(teacher, student, duration, tuple(days), tuple(rooms), exempt)
+
+def assert_no_overlap(lessons, placed, existing=()):
+    booked = [(("room", room), ("teacher", teacher), ("student", student), day, start, end, exempt)
+              for day, start, end, room, teacher, student, exempt in existing]
+    for i, slot in placed.items():
+        l = lessons[i]
+        assert slot.day in l.days and slot.room_id in l.room_ids
+        assert WINDOW["window_start"] <= slot.start and slot.start + l.duration <= WINDOW["window_end"]
+        booked.append((("room", slot.room_id), ("teacher", l.teacher_id), ("student", l.student_id),
+                       slot.day, slot.start, slot.start + l.duration, l.exempt))
+    for a, b in combinations(booked, 2):
+        if a[3] != b[3] or not (a[4] < b[5] and b[4] < a[5]):
+            continue
+        shared = {k for k in a[:3] if k[1] is not None} & set(b[:3])
+        if a[6] or b[6]:
+            shared = {k for k in shared if k[0] == "student"}
+        assert not shared, (a, b)
+
+def test_places_lessons_without_overlap():
+    lessons = [lesson(1, 60, rooms=(1, 2, 3), student=1), lesson(1, 60, rooms=(1, 2, 3), student=2),
+               lesson(2, 90, rooms=(1, 2, 3), student=1), lesson(3, 60, rooms=(1, 2, 3)), lesson(4, 90, rooms=(1, 2, 3))]
+    placed, unplaced = solve(lessons, [], **WINDOW)
+    assert unplaced == []
+    assert_no_overlap(lessons, placed)
+
+def test_respects_existing_schedules_and_group_classes():
+    existing = [(MON, 600, 720, 1, 9, None, False),   # 공간 1 의 10:00~12:00
+                (MON, 600, 780, 2, 8, None, True)]    # 공간 2 전체, 단체수업이라 공간을 막지 않는다
+    lessons = [lesson(1, 60, rooms=(1,)), lesson(2, 120, rooms=(2,))]
+    placed, unplaced = solve(lessons, existing, **WINDOW)
+    assert unplaced == []
+    assert placed[0] == Slot(MON, 720, 1)
+    assert placed[1] == Slot(MON, 600, 2)
+    assert_no_overlap(lessons, placed, existing)
+
+def test_backtracking_moves_a_placed_lesson():
+    # 앞서 넣은 90분 수업을 옮겨야 세 수업이 모두 들어간다
+    lessons = [lesson(2, 90, days=(TUE, MON), rooms=(2,), student=2),
+               lesson(2, 120, days=(MON, TUE), rooms=(2,), student=2),
+               lesson(3, 120, days=(TUE,), rooms=(2, 1), student=1)]
+    greedy, _ = solve(lessons, [], **{**WINDOW, "max_backtracks": 0})
+    placed, unplaced = solve(lessons, [], **WINDOW)
+    assert len(greedy) == 2
+    assert unplaced == [] and len(placed) == 3
+    assert_no_overlap(lessons, placed)
+
+def test_reports_lessons_that_cannot_be_placed():
+    lessons = [lesson(1, 240),                      # 창(3시간)보다 길다
+               lesson(1, 120), lesson(1, 120),      # 같은 선생님, 하나만 들어간다
+               lesson(2, 60, days=(TUE,), rooms=(5,))]
+    existing = [(TUE, 600, 780, 5, 7, None, False)]
+    placed, unplaced = solve(lessons, existing, **WINDOW)
+    assert unplaced == [(0, "no_candidate"), (2, "no_free_slot"), (3, "no_free_slot")]
+    assert list(placed) == [1]
+
+def test_auto_place_endpoint_commits(client):
+    teacher = client.post("/teachers/", json={"name": "AP-T", "subject": "과학"}).json()["id"]
+    room = client.post("/rooms/", json={"name": "AP-R"}).json()["id"]
+    body = {"lessons": [{"teacher_id": teacher, "duration": 60, "days": [MON], "room_ids": [room]}] * 3,
+            "start_time": "20:00", "end_time": "22:00", "step": 60, "commit": True}
+    result = client.post("/schedules/auto_place", json=body).json()
+    assert result["committed"]
+    assert [(p["start_time"], p["end_time"]) for p in result["placed"]] == [("20:00", "21:00"), ("21:00", "22:00")]
+    assert result["unplaced"] == [{"lesson": 2, "reason": "no_free_slot"}]
+    assert len(client.get(f"/rooms/{room}/schedules").json()) == 2
+
+def test_shutdown_stops_worker_processes(monkeypatch):
+    monkeypatch.setattr(placement, "PLACEMENT_WORKERS", 1)
+    placement.shutdown()
+    placed, _ = asyncio.run(placement.run_solve([lesson(1, 60)], [], **WINDOW))
+    assert placed == {0: Slot(MON, 600, 1)}
+    assert multiprocessing.active_children()
+    placement.shutdown()
+    assert placement._executor is None
+    assert not multiprocessing.active_children()
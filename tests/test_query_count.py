@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import event
+from app import database, models
+from app.timetable_cache import timetable_cache
+
+# 목록/주간 시간표 조회의 SQL 문장 수는 행 수와 상관없이 일정해야 한다 (N+1 회귀 방지).
+# 같은 선생님/공간/학생의 시간표를 늘려 가며 같은 요청의 문장 수를 비교한다.
+
+PATHS = [
+    "/schedules/?limit=1000",
+    "/schedules/?limit=1000&compact=true",
+    "/schedules/?limit=1000&fields=id,teacher,room",
+    "/teachers/{teacher}/schedules",
+    "/teachers/{teacher}/schedules?compact=true",
+    "/rooms/{room}/schedules",
+    "/rooms/by_name/QC-R/schedules",
+    "/students/{student}/schedules",
+]
+
+@pytest.fixture
+def statements(client):
+    engines = {database.get_engine_async().sync_engine, database.get_engine_read_async().sync_engine}
+    seen = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count)
+    yield seen
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", count)
+
+def add_schedules(client, n: int):
+    rows = [
+        dict(teacher="QC-T", room="QC-R", student="QC-S", day_of_week=models.DAYS_OF_WEEK[i % 7],
+             start_time=f"{9 + i % 12:02d}:00", end_time=f"{10 + i % 12:02d}:00", type="수업")
+        for i in range(n)
+    ]
+    response = client.post("/schedules/import", json={"rows": rows, "on_conflict": "allow"})
+    assert response.status_code == 200
+    assert response.json()["inserted"] == n
+
+def entity_ids(client) -> dict:
+    ids = {}
+    for kind, name in (("teacher", "QC-T"), ("room", "QC-R"), ("student", "QC-S")):
+        ids[kind] = next(e["id"] for e in client.get(f"/{kind}s/").json() if e["name"] == name)
+    return ids
+
+def measure(client, statements, path: str):
+    # 한 번 호출해 차원 캐시와 버전 확인을 채운 뒤, 응답 캐시를 비우고 다시 호출한 문장 수
+    assert client.get(path).status_code == 200
+    timetable_cache.clear()
+    statements.clear()
+    response = client.get(path)
+    assert response.status_code == 200
+    return len(statements), len(response.content)
+
+@pytest.mark.parametrize("path", PATHS)
+def test_statement_count_does_not_grow_with_rows(client, statements, path):
+    add_schedules(client, 3)
+    path = path.format(**entity_ids(client))
+    few, small_body = measure(client, statements, path)
+    add_schedules(client, 60)
+    many, large_body = measure(client, statements, path)
+    assert large_body > small_body
+    assert many == few
+    assert few <= 4  # 행 + compact 조회표(선생님/공간/학생)
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app import database, models, revision_log
+
+# 변경 기록 정리(compact)와 GET /schedules/changes: 같은 시간표의 이전 기록 합치기, 보존 기간/최대 행 수로 앞부분
+# 지우기, 지운 범위보다 오래된 since 는 resync.
+
+R = models.ScheduleRevision
+
+def log(db: Session, *ops):
+    for op, schedule_id in ops:
+        revision_log.append(db, op, [schedule_id])
+    db.commit()
+
+def revs(db: Session) -> list:
+    return db.execute(select(R.rev, R.schedule_id, R.op).order_by(R.rev)).all()
+
+def new_db(tmp_path) -> Session:
+    db = database.Database(f"sqlite+aiosqlite:///{tmp_path / 'log.db'}")
+    db.create_tables()
+    return Session(db.engine_sync())
+
+def test_compact_keeps_last_entry_per_schedule(tmp_path):
+    with new_db(tmp_path) as db:
+        log(db, ("insert", 1), ("insert", 2), ("update", 1), ("update", 1), ("delete", 2), ("insert", 3))
+        result = revision_log.compact(db, retention_days=30, max_rows=1000)
+        # 맨 앞 기록(rev 1)은 floor 를 지키려고 남는다
+        assert result == {"collapsed": 2, "expired": 0, "floor": 0, "rev": 6}
+        assert [tuple(r) for r in revs(db)] == [(1, 1, "insert"), (4, 1, "update"), (5, 2, "delete"), (6, 3, "insert")]
+        body = revision_log.changes(db, 0)
+        assert not body["resync"] and body["rev"] == 6 and body["deleted"] == [1, 2, 3]  # 시간표 행이 없다
+
+def test_compact_expires_by_rows_and_age(tmp_path):
+    with new_db(tmp_path) as db:
+        log(db, *(("insert", i) for i in range(1, 11)))
+        old = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=40)
+        db.execute(update(R).where(R.rev <= 3).values(created_at=old))
+        db.commit()
+        assert revision_log.compact(db, retention_days=30, max_rows=1000)["expired"] == 3
+        assert revision_log.bounds(db) == (3, 10)
+        assert revision_log.changes(db, 2)["resync"]
+        assert not revision_log.changes(db, 3)["resync"]
+        # 방금 남긴 기록은 보존 기간 안이다
+        assert revision_log.compact(db, retention_days=1, max_rows=1000)["expired"] == 0
+        result = revision_log.compact(db, retention_days=30, max_rows=2)
+        assert (result["expired"], result["floor"], result["rev"]) == (5, 8, 10)
+        # 마지막 기록은 항상 남는다
+        assert revision_log.compact(db, retention_days=0, max_rows=0)["rev"] == 10
+        assert [r.rev for r in revs(db)] == [10]
+
+def test_changes_after_compaction_needs_resync(client):
+    teacher = client.post("/teachers/", json={"name": "RL-T", "subject": "수학"}).json()["id"]
+    room = client.post("/rooms/", json={"name": "RL-R"}).json()["id"]
+    body = {"teacher_id": teacher, "room_id": room, "day_of_week": "일요일", "type": "수업"}
+    first = client.post("/schedules/", json={**body, "start_time": "09:00", "end_time": "10:00"}).json()["id"]
+    since = client.get("/schedules/changes").json()["rev"]
+    second = client.post("/schedules/", json={**body, "start_time": "10:00", "end_time": "11:00"}).json()["id"]
+    client.patch(f"/schedules/{first}", json={"end_time": "09:30"})
+    changes = client.get("/schedules/changes", params={"since": since}).json()
+    assert not changes["resync"] and sorted(s["id"] for s in changes["changed"]) == sorted([first, second])
+    with Session(database.engine_sync) as db:
+        revision_log.compact(db, max_rows=1)
+    changes = client.get("/schedules/changes", params={"since": since}).json()
+    assert changes["resync"] and changes["changed"] == []
+    current = client.get("/schedules/changes").json()["rev"]
+    assert client.get("/schedules/changes", params={"since": current}).json() == {
+        "rev": current, "resync": False, "more": False, "changed": [], "deleted": []}
@@ -0,0 +1,27 @@
+import os
+from bench import bench_startup
+
+# app.main import 는 DB 에 손대지 않고, 시작 시간과 import 메모리가 기준 안에 있어야 한다 (bench.bench_startup 과 같은 검사).
+# 기준은 느린 CI 머신에 맞게 환경 변수로 늘릴 수 있다.
+
+MAX_IMPORT_MS = float(os.getenv("STARTUP_MAX_IMPORT_MS", "3000"))
+MAX_FIRST_REQUEST_MS = float(os.getenv("STARTUP_MAX_FIRST_REQUEST_MS", "6000"))
+MAX_IMPORT_MEMORY_MB = float(os.getenv("STARTUP_MAX_IMPORT_MEMORY_MB", "80"))
+RUNS = 3
+
+def test_import_has_no_database_side_effects(tmp_path):
+    assert bench_startup.side_effects(str(tmp_path)) == []
+
+def test_import_memory(tmp_path):
+    result = bench_startup.import_check(f"sqlite+aiosqlite:///{tmp_path / 'startup.db'}", str(tmp_path / "absent.db"))
+    assert "error" not in result
+    assert result["engines"] == [] and result["connections"] == 0
+    assert result["memory_mb"] <= MAX_IMPORT_MEMORY_MB
+
+def test_startup_time(tmp_path):
+    env = bench_startup.child_env(DATABASE_URL=f"sqlite+aiosqlite:///{tmp_path / 'startup.db'}",
+                                  DATABASE_READ_URL=None, SQLALCHEMY_DATABASE_URL=None, DB_CREATE_SCHEMA=None)
+    bench_startup.first_request(1, {**env, "DB_CREATE_SCHEMA": "1"})
+    import_ms, _ = bench_startup.import_time(RUNS, env)
+    assert import_ms <= MAX_IMPORT_MS
+    assert bench_startup.first_request(RUNS, env) <= MAX_FIRST_REQUEST_MS
@@ -0,0 +1,85 @@
+import os
+import pytest
+from app import tenancy
+
+# 지점 라우팅: 경로 접두사(/branches/<지점>/...)와 헤더(X-Branch), 없는 지점은 404 (DB 파일을 만들지 않음),
+# POST /admin/branches/{지점}, 열린 지점 LRU 내보내기.
+
+def branch_path(tmp_path, name: str) -> str:
+    return str(tmp_path / f"branch_{name}.db")
+
+@pytest.fixture
+def registry(client, tmp_path, monkeypatch):
+    # 앱의 지점 레지스트리를 임시 디렉터리의 SQLite 틀로 바꾼다 (conftest 는 TENANT_DATABASE_URL 을 비운다)
+    registry = tenancy.TenantRegistry(f"sqlite+aiosqlite:///{tmp_path}/branch_{{tenant}}.db", allowed=[], max_open=2)
+    monkeypatch.setattr(tenancy, "registry", registry)
+    yield registry
+    client.portal.call(registry.close)
+
+def teachers(client, prefix: str = "", **headers) -> list:
+    response = client.get(f"{prefix}/teachers/", headers=headers)
+    assert response.status_code == 200
+    return [t["name"] for t in response.json()]
+
+def test_create_branch_requires_routing(client):
+    assert client.post("/admin/branches/tn-off").status_code == 400
+
+def test_unknown_branch_is_404_without_creating_a_file(client, registry, tmp_path):
+    assert client.get("/branches/tn-none/teachers/").status_code == 404
+    assert client.get("/teachers/", headers={"X-Branch": "tn-none"}).status_code == 404
+    assert client.post("/admin/branches/Bad!").status_code == 404
+    assert not os.path.exists(branch_path(tmp_path, "tn-none"))
+    assert registry.stats()["opened"] == 0
+
+def test_admin_creates_branch(client, registry, tmp_path):
+    response = client.post("/admin/branches/tn-new")
+    assert response.status_code == 201 and response.json() == {"branch": "tn-new"}
+    assert os.path.exists(branch_path(tmp_path, "tn-new"))
+    assert teachers(client, "/branches/tn-new") == []
+    assert client.post("/admin/branches/tn-new").status_code == 201  # 이미 있으면 그대로
+
+def test_allowlist_limits_branches(client, registry, tmp_path):
+    registry.allowed = {"tn-allowed"}
+    assert client.post("/admin/branches/tn-other").status_code == 404
+    assert client.post("/admin/branches/tn-allowed").status_code == 201
+    assert not os.path.exists(branch_path(tmp_path, "tn-other"))
+
+def test_routes_by_path_prefix_and_header(client, registry):
+    for name in ("tn-a", "tn-b"):
+        assert client.post(f"/admin/branches/{name}").status_code == 201
+    assert client.post("/branches/tn-a/teachers/", json={"name": "TN-A", "subject": "수학"}).status_code == 200
+    assert client.post("/teachers/", json={"name": "TN-B", "subject": "수학"}, headers={"X-Branch": "tn-b"}).status_code == 200
+    assert teachers(client, "/branches/tn-a") == ["TN-A"]
+    assert teachers(client, **{"X-Branch": "tn-b"}) == ["TN-B"]
+    assert teachers(client, "/branches/tn-a", **{"X-Branch": "tn-b"}) == ["TN-A"]  # 경로 접두사가 먼저
+    assert not {"TN-A", "TN-B"} & set(teachers(client))  # 기본 DB 에는 없다
+    # 지점마다 id 가 따로 매겨지고 겹침 검사도 지점 안에서만 한다
+    for name in ("tn-a", "tn-b"):
+        assert client.post(f"/branches/{name}/rooms/", json={"name": "TN-R"}).json()["id"] == 1
+    body = {"teacher_id": 1, "room_id": 1, "day_of_week": "월요일", "start_time": "15:00", "end_time": "16:00", "type": "수업"}
+    assert client.post("/branches/tn-a/schedules/", json=body).status_code == 200
+    assert client.post("/branches/tn-b/schedules/", json=body).status_code == 200
+    assert client.post("/branches/tn-a/schedules/", json=body).status_code == 409
+
+def test_least_recently_used_branch_is_closed(client, registry):
+    for name in ("tn-1", "tn-2", "tn-3"):
+        assert client.post(f"/admin/branches/{name}").status_code == 201
+    assert client.post("/branches/tn-1/teachers/", json={"name": "TN-1", "subject": "수학"}).status_code == 200
+    teachers(client, "/branches/tn-2")
+    teachers(client, "/branches/tn-3")  # tn-1 이 가장 오래됨
+    assert [db.name for db in registry.open_databases()] == ["tn-2", "tn-3"]
+    assert registry.stats()["evicted"] >= 1
+    assert teachers(client, "/branches/tn-1") == ["TN-1"]  # 다시 열면 그대로
+    assert [db.name for db in registry.open_databases()] == ["tn-3", "tn-1"]
+
+def test_branch_in_use_is_not_closed(client, registry):
+    for name in ("tn-x", "tn-y", "tn-z"):
+        assert client.post(f"/admin/branches/{name}").status_code == 201
+    held = client.portal.call(registry.acquire, "tn-x")
+    try:
+        teachers(client, "/branches/tn-y")
+        teachers(client, "/branches/tn-z")
+        assert "tn-x" in [db.name for db in registry.open_databases()]
+    finally:
+        client.portal.call(registry.release, held.name)
+    assert len(registry.open_databases()) == 2